@@ -1,4 +1,6 @@
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Iterable
 
@@ -61,6 +63,75 @@ def s3_std_lib(dataset: Iterable):
     return list((p.age * 2 if p.age % 2 == 0 else Person.default() for p in dataset))
 
 
+# s4: many small queries, as ran per request in a service (fliq plan overhead)
+
+def s4_fliq(dataset: Iterable):
+    for _ in range(1_000):
+        q(dataset).where(lambda p: p.age % 2 == 0).select(lambda p: p.name).to_list()
+        q(dataset).where(lambda p: p.age > 50).select(lambda p: p.name).first(default=None)
+
+
+def s4_std_lib(dataset: Iterable):
+    for _ in range(1_000):
+        list(map(lambda p: p.name, filter(lambda p: p.age % 2 == 0, dataset)))
+        next(map(lambda p: p.name, filter(lambda p: p.age > 50, dataset)), None)
+
+
+# s5: a long chain of element-wise stages (fused into a single loop by fliq)
+
+def s5_fliq(dataset: Iterable):
+    return (q(dataset)
+            .where(lambda p: p.age >= 18)
+            .exclude(lambda p: p.gender == 'M')
+            .select(lambda p: (p.name, p.age))
+            .where(lambda pair: pair[1] < 90)
+            .select(lambda pair: pair[0])
+            .exclude(lambda name: name == '')
+            .select(lambda name: name.upper())
+            .to_list())
+
+
+def s5_std_lib(dataset: Iterable):
+    return list(
+        map(lambda name: name.upper(),
+            filter(lambda name: name != '',
+                   map(lambda pair: pair[0],
+                       filter(lambda pair: pair[1] < 90,
+                              map(lambda p: (p.name, p.age),
+                                  filter(lambda p: p.gender != 'M',
+                                         filter(lambda p: p.age >= 18, dataset)))))))
+    )
+
+
+# s6: a selective (1%) filter, following a sort
+
+def s6_fliq(dataset: Iterable):
+    return (q(dataset)
+            .order(by=lambda p: p.name)
+            .where(lambda p: p.age % 100 == 0)
+            .to_list())
+
+
+def s6_std_lib(dataset: Iterable):
+    return [p for p in sorted(dataset, key=lambda p: p.name) if p.age % 100 == 0]
+
+
+# s7: an I/O-bound selector (a 1ms sleep, standing for a lookup), ran on 16 threads
+
+def _lookup(p: Person):
+    time.sleep(0.001)
+    return p.name
+
+
+def s7_fliq(dataset: Iterable):
+    return q(dataset).select_concurrent(_lookup, max_workers=16).to_list()
+
+
+def s7_std_lib(dataset: Iterable):
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        return list(executor.map(_lookup, dataset))
+
+
 def plot_benchmark(csv_path):
     # Read CSV file
     df = pd.read_csv(csv_path)
@@ -145,8 +216,67 @@ BenchmarkRunner(
     output_csv="s3.csv",
 )
 
+BenchmarkRunner(
+    scenario_name="Scenario 4",
+    m1=NamedMethod("Fliq", s4_fliq),
+    m2=NamedMethod("Standard Library", s4_std_lib),
+    dataset_generator=gen_people,
+).run(
+    sizes=[
+        10,
+        1_00,
+    ],
+    output_csv="s4.csv",
+)
+
+BenchmarkRunner(
+    scenario_name="Scenario 5",
+    m1=NamedMethod("Fliq", s5_fliq),
+    m2=NamedMethod("Standard Library", s5_std_lib),
+    dataset_generator=gen_people,
+).run(
+    sizes=[
+        1_00,
+        10_000,
+        1_000_000,
+    ],
+    output_csv="s5.csv",
+)
+
+BenchmarkRunner(
+    scenario_name="Scenario 6",
+    m1=NamedMethod("Fliq", s6_fliq),
+    m2=NamedMethod("Standard Library", s6_std_lib),
+    dataset_generator=gen_people,
+).run(
+    sizes=[
+        1_00,
+        10_000,
+        1_000_000,
+    ],
+    output_csv="s6.csv",
+)
+
+BenchmarkRunner(
+    scenario_name="Scenario 7",
+    m1=NamedMethod("Fliq", s7_fliq),
+    m2=NamedMethod("Standard Library", s7_std_lib),
+    dataset_generator=gen_people,
+).run(
+    sizes=[
+        1_00,
+        1_000,
+        10_000,
+    ],
+    output_csv="s7.csv",
+)
+
 CsvPlotter(Path('s1.csv')).plot_benchmark()
 CsvPlotter(Path('s2.csv')).plot_benchmark()
 CsvPlotter(Path('s3.csv')).plot_benchmark()
+CsvPlotter(Path('s4.csv')).plot_benchmark()
+CsvPlotter(Path('s5.csv')).plot_benchmark()
+CsvPlotter(Path('s6.csv')).plot_benchmark()
+CsvPlotter(Path('s7.csv')).plot_benchmark()
 
 
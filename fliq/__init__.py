@@ -1,3 +1,23 @@
+from typing import Any
+
 from .query import Query as q  # noqa: F401
 from .query import Query  # noqa: F401
-__all__ = ['q', 'Query']
+from .cancellation import CancelToken  # noqa: F401
+__all__ = ['q', 'Query', 'AsyncQuery', 'SharedSnapshot', 'Cluster', 'CancelToken']
+
+# exports imported only once accessed, as their modules import heavy dependencies (e.g., asyncio,
+# multiprocessing)
+_LAZY_EXPORTS = {
+    'AsyncQuery': '.async_query',
+    'Cluster': '.cluster',
+    'SharedSnapshot': '.shared_snapshot',
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
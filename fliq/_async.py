@@ -0,0 +1,70 @@
+"""
+Driving (sync) queries from async code, without blocking the event loop.
+
+The query is iterated in batches on the default executor of the running loop (a pool of threads),
+so CPU-bound mappers (e.g., `order()`) run off the loop, and the loop serves other tasks between
+batches. Batches are run one at a time, so the query is never iterated by two threads at once.
+"""
+from __future__ import annotations
+
+import asyncio
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, List, Optional
+
+
+async def run_in_batches(items: Callable[[], Iterable[Any]],
+                         consume: Callable[[List[Any]], Any],
+                         batch_size: int,
+                         done: Optional[Callable[[], bool]] = None) -> None:
+    """
+    Consumes the items in batches of `batch_size`, each pulled (and passed to `consume`) on the
+    executor. The items are created on the executor as well, on the first batch (so lowering the
+    query, e.g., sorting it, does not block the loop either).
+    Once cancelled, no further batches are started (a running batch completes in the background).
+    In case `done` is given, it is checked after every batch, and no further batches are started
+    once it returns True.
+
+    Raises:
+        ValueError: In case batch_size is not positive.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be positive, got {batch_size}")
+    loop = asyncio.get_running_loop()
+    iterator: Optional[Iterator[Any]] = None
+
+    def next_batch() -> bool:
+        nonlocal iterator
+        if iterator is None:
+            iterator = iter(items())
+        batch = list(islice(iterator, batch_size))
+        consume(batch)
+        # a partial batch means the items are exhausted
+        return len(batch) == batch_size and (done is None or not done())
+
+    while await loop.run_in_executor(None, next_batch):
+        pass
+
+
+async def iterate_in_batches(items: Callable[[], Iterable[Any]],
+                             batch_size: int) -> AsyncIterator[Any]:
+    """
+    Yields the items, pulled in batches of `batch_size` on the executor (see `run_in_batches`), so
+    a slow source (e.g., a query with CPU-bound mappers) does not block the loop.
+    A batch is pulled only once the previous one is consumed.
+    """
+    loop = asyncio.get_running_loop()
+    iterator: Optional[Iterator[Any]] = None
+
+    def next_batch() -> List[Any]:
+        nonlocal iterator
+        if iterator is None:
+            iterator = iter(items())
+        return list(islice(iterator, batch_size))
+
+    while True:
+        batch = await loop.run_in_executor(None, next_batch)
+        for item in batch:
+            yield item
+        if len(batch) < batch_size:
+            # a partial batch means the items are exhausted
+            return
@@ -0,0 +1,61 @@
+"""
+Code generation of fused pipeline loops.
+
+A run of element-wise operators is generated into the source of a single generator function,
+so every element goes through one loop, instead of through a chain of iterators (one per operator).
+Generated functions are cached by the shape of the run (the kinds of operators, in order), and are
+called with the actual callables of the operators upon lowering.
+Guarded functions call a fallback for elements an operator raises on (instead of raising).
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+# operator kind -> statement applied on the current element `x`, `f` is the operator callable
+_STATEMENTS: Dict[str, str] = {
+    'where': "if not {f}(x): continue",
+    'exclude': "if {f}(x): continue",
+    'select': "x = {f}(x)",
+}
+
+FusedFunction = Callable[..., Iterator[Any]]
+
+_functions: Dict[Tuple[Tuple[str, ...], bool], FusedFunction] = {}
+
+
+def fused_function(kinds: Tuple[str, ...], guarded: bool = False) -> FusedFunction:
+    """
+    Returns a generator function that applies the given kinds of operators (in order)
+    to every element. The generator function accepts the items, followed by the callables
+    of the operators (positionally, in the same order).
+    Guarded functions (of filters only) accept a fallback predicate right after the items, which
+    decides whether to keep an element any of the operators raised on.
+    """
+    function = _functions.get((kinds, guarded))
+    if function is None:
+        function = _functions[(kinds, guarded)] = _generate(kinds, guarded)
+    return function
+
+
+def _generate(kinds: Tuple[str, ...], guarded: bool) -> FusedFunction:
+    names = [f"f{i}" for i in range(len(kinds))]
+    statements = [_STATEMENTS[kind].format(f=name) for kind, name in zip(kinds, names)]
+    lines: List[str] = [
+        f"def fused(items, {'fallback, ' if guarded else ''}{', '.join(names)}):",
+        "    for x in items:",
+    ]
+    if guarded:
+        lines.append("        try:")
+        lines.extend(f"            {statement}" for statement in statements)
+        lines.extend([
+            "        except Exception:",
+            "            if not fallback(x): continue",
+        ])
+    else:
+        lines.extend(f"        {statement}" for statement in statements)
+    lines.append("        yield x")
+
+    namespace: Dict[str, Any] = {}
+    name = f"<fliq {'guarded' if guarded else 'fused'} {'-'.join(kinds)}>"
+    exec(compile("\n".join(lines), name, "exec"), namespace)
+    return namespace['fused']  # type: ignore # (generated above)
@@ -0,0 +1,273 @@
+"""
+Compilation of query plans into a single generated generator function.
+
+Every operator of the plan is generated into the body of one loop (nested per operator), so elements
+go through no intermediate iterators at all. Plain lambdas are inlined into the loop as expressions,
+saving a function call per element per operator (other callables are called as is).
+Generated code is cached by the shape of the pipeline, so compiling the same pipeline again (e.g.,
+a query built in a function) reuses it.
+"""
+from __future__ import annotations
+
+import ast
+import dis
+import inspect
+import linecache
+import sys
+import types
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from fliq import _plan
+
+CompiledFunction = Callable[[Iterable[Any]], Iterator[Any]]
+
+_PREFIX = '_fliq_'
+_ELEMENT = f'{_PREFIX}x'
+
+# nodes that open a new scope, or bind names, cannot be inlined as is
+_NOT_INLINABLE = (
+    ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp,
+    ast.NamedExpr, ast.Yield, ast.YieldFrom, ast.Await,
+)
+
+_codes: Dict[Tuple[Hashable, ...], types.CodeType] = {}
+
+
+class _Stage:
+    """
+    A single operator of a compiled pipeline.
+    The shape identifies the generated code of the operator, while the arguments are the runtime
+    values it uses (passed to the generated function).
+    """
+    __slots__ = ('shape', 'arguments')
+
+    def __init__(self, shape: Tuple[Any, ...], arguments: Tuple[Any, ...] = ()):
+        self.shape = shape
+        self.arguments = arguments
+
+
+def compile_plan(plan: List[_plan.PlanNode]) -> CompiledFunction:
+    """
+    Compiles the plan into a function, that accepts a source iterable and returns an iterator
+    over the elements yielded by the plan applied on top of it.
+
+    Raises:
+        TypeError: In case the plan contains an operator that cannot be compiled.
+    """
+    scope: Dict[str, Any] = {}
+    stages = [_stage(node, scope) for node in plan]
+    shape = tuple(stage.shape for stage in stages)
+    arguments = tuple(argument for stage in stages for argument in stage.arguments)
+
+    code = _codes.get(shape)
+    if code is None:
+        code = _codes[shape] = _generate(shape)
+    function = types.FunctionType(code, scope.get('globals', {'__builtins__': __builtins__}))
+
+    def compiled(items: Iterable[Any]) -> Iterator[Any]:
+        return function(items, *arguments)  # type: ignore # (generator function)
+
+    return compiled
+
+
+def _stage(node: _plan.PlanNode, scope: Dict[str, Any]) -> _Stage:
+    if isinstance(node, _plan.ElementWise):
+        expression = _inlinable_expression(node.function, scope)
+        if expression is not None:
+            return _Stage((node.kind, expression))
+        return _Stage((node.kind, None), (node.function,))
+    if isinstance(node, _plan.Distinct):
+        return _Stage(('distinct',))
+    if isinstance(node, _plan.Slice):
+        # validates the indices, the same way a non-compiled slice does
+        islice((), node.start, node.stop, node.step)
+        return _Stage(
+            ('slice', node.start != 0, node.stop is not None, node.step != 1),
+            (node.start, node.stop, node.step),
+        )
+    if isinstance(node, (_plan.Append, _plan.Prepend)):
+        return _Stage(('append' if isinstance(node, _plan.Append) else 'prepend',), (node.items,))
+    raise TypeError(f"Only where, exclude, select, distinct, slice, take, skip, append and prepend "
+                    f"can be compiled, found `{node!r}`")
+
+
+def _inlinable_expression(function: Callable[[Any], Any], scope: Dict[str, Any]) -> Optional[str]:
+    """
+    Returns the body of the given lambda, as an expression over the loop element, or None in case
+    it cannot be inlined safely (in which case, it is called as is).
+    Only lambdas of a single argument, without closures or defaults, sharing the globals of the
+    other inlined lambdas, are inlined. The extracted body is verified to compile to the exact
+    same bytecode as the lambda itself.
+    """
+    if sys.version_info < (3, 11):
+        # source positions of bytecode instructions are required for extracting the body
+        return None
+    code = getattr(function, '__code__', None)
+    if (not isinstance(function, types.LambdaType)
+            or code is None
+            or function.__name__ != '<lambda>'
+            or function.__closure__ is not None
+            or function.__defaults__ is not None
+            or function.__kwdefaults__ is not None
+            or code.co_argcount != 1
+            or code.co_kwonlyargcount != 0
+            or code.co_flags & (inspect.CO_VARARGS | inspect.CO_VARKEYWORDS)
+            or scope.get('globals', function.__globals__) is not function.__globals__):
+        return None
+
+    body = _body_source(function)
+    if body is None:
+        return None
+    try:
+        tree = ast.parse(f"({body})", mode='eval')
+        parameter = code.co_varnames[0]
+        expected = compile(f"lambda {parameter}: ({body})", code.co_filename, 'eval')
+    except SyntaxError:
+        return None
+    compiled_lambda = next(
+        const for const in expected.co_consts if isinstance(const, types.CodeType))
+    if (compiled_lambda.co_code != code.co_code
+            or compiled_lambda.co_consts != code.co_consts
+            or compiled_lambda.co_names != code.co_names
+            or compiled_lambda.co_varnames != code.co_varnames):
+        return None
+
+    for sub_node in ast.walk(tree):
+        if isinstance(sub_node, _NOT_INLINABLE):
+            return None
+        if isinstance(sub_node, ast.Name):
+            if sub_node.id.startswith(_PREFIX):
+                return None
+            if sub_node.id == parameter:
+                sub_node.id = _ELEMENT
+
+    scope['globals'] = function.__globals__
+    return f"({ast.unparse(tree)})"
+
+
+def _body_source(function: Callable[[Any], Any]) -> Optional[str]:
+    """
+    Extracts the source of the body of a lambda, using the source positions of its instructions.
+    """
+    code = function.__code__
+    spans: List[Tuple[int, int, int, int]] = []
+    for instruction in dis.get_instructions(code):
+        if instruction.opname in ('RESUME', 'RETURN_VALUE') or instruction.positions is None:
+            continue
+        line, end_line, column, end_column = instruction.positions
+        if line is None or end_line is None or column is None or end_column is None:
+            continue
+        spans.append((line, column, end_line, end_column))
+    lines = linecache.getlines(code.co_filename, function.__globals__)
+    if not spans or not lines:
+        return None
+    start_line, start_column = min((span[0], span[1]) for span in spans)
+    end_line, end_column = max((span[2], span[3]) for span in spans)
+    if end_line > len(lines):
+        return None
+
+    # offsets are in bytes of the utf-8 encoded lines
+    encoded = [line.encode('utf-8') for line in lines[start_line - 1:end_line]]
+    encoded[-1] = encoded[-1][:end_column]
+    encoded[0] = encoded[0][start_column:]
+    return b''.join(encoded).decode('utf-8')
+
+
+def _generate(shape: Tuple[Tuple[Any, ...], ...]) -> types.CodeType:
+    """
+    Generates the code of a generator function for the given pipeline shape.
+
+    The source is iterated by a single loop, each operator nests the operators after it.
+    Prepended items are iterated by their own loop (before the source), and appended items after
+    it, each going only through the operators following them.
+    Once a slice reaches its stop, the loop feeding it stops (so no additional element is pulled),
+    and loops that only feed it are skipped.
+    """
+    parameters = [f'{_PREFIX}items']
+    init: List[str] = []
+    # (position in pipeline, iterable name): prepends (reversed), source, appends
+    prepends: List[Tuple[int, str]] = []
+    appends: List[Tuple[int, str]] = []
+    bounded_slices: List[int] = []
+    for i, stage_shape in enumerate(shape):
+        kind = stage_shape[0]
+        if kind in ('where', 'exclude', 'select') and stage_shape[1] is None:
+            parameters.append(f'{_PREFIX}f{i}')
+        elif kind == 'distinct':
+            init.append(f'{_PREFIX}seen{i} = set()')
+        elif kind == 'slice':
+            _, _, has_stop, _ = stage_shape
+            parameters.extend([f'{_PREFIX}start{i}', f'{_PREFIX}stop{i}', f'{_PREFIX}step{i}'])
+            init.append(f'{_PREFIX}i{i} = -1')
+            if has_stop:
+                bounded_slices.append(i)
+                init.append(f'{_PREFIX}done{i} = {_PREFIX}stop{i} <= 0')
+        elif kind in ('append', 'prepend'):
+            parameters.append(f'{_PREFIX}{kind}{i}')
+            (appends if kind == 'append' else prepends).append((i, f'{_PREFIX}{kind}{i}'))
+
+    loops = [*reversed(prepends), (-1, f'{_PREFIX}items'), *appends]
+
+    lines = [f"def {_PREFIX}compiled({', '.join(parameters)}):"]
+    lines.extend(f"    {statement}" for statement in init)
+    for position, iterable in loops:
+        guards = [f'{_PREFIX}done{i}' for i in bounded_slices if i > position]
+        indent = "    "
+        if guards:
+            lines.append(f"{indent}if not ({' or '.join(guards)}):")
+            indent += "    "
+        lines.append(f"{indent}for {_ELEMENT} in {iterable}:")
+        lines.extend(_body(shape, position + 1, indent + "    "))
+
+    namespace: Dict[str, Any] = {}
+    kinds = '-'.join(stage_shape[0] for stage_shape in shape)
+    exec(compile("\n".join(lines), f"<fliq compiled {kinds}>", "exec"), namespace)
+    return namespace[f'{_PREFIX}compiled'].__code__  # type: ignore # (generated above)
+
+
+def _body(shape: Tuple[Tuple[Any, ...], ...], start: int, indent: str) -> List[str]:
+    """
+    Generates the loop body, applying the operators from the given position on the element.
+    """
+    if start == len(shape):
+        return [f"{indent}yield {_ELEMENT}"]
+
+    kind, *details = shape[start]
+    i = start
+    rest = start + 1
+    if kind in ('where', 'exclude', 'select'):
+        expression = details[0] or f'{_PREFIX}f{i}({_ELEMENT})'
+        if kind == 'select':
+            return [f"{indent}{_ELEMENT} = {expression}", *_body(shape, rest, indent)]
+        condition = expression if kind == 'where' else f"not {expression}"
+        return [f"{indent}if {condition}:", *_body(shape, rest, indent + "    ")]
+    if kind == 'distinct':
+        return [
+            f"{indent}if {_ELEMENT} not in {_PREFIX}seen{i}:",
+            f"{indent}    {_PREFIX}seen{i}.add({_ELEMENT})",
+            *_body(shape, rest, indent + "    "),
+        ]
+    if kind == 'slice':
+        has_start, has_stop, has_step = details
+        index = f'{_PREFIX}i{i}'
+        lines = [f"{indent}{index} += 1"]
+        conditions = []
+        if has_start:
+            conditions.append(f"{index} >= {_PREFIX}start{i}")
+        if has_step:
+            conditions.append(f"({index} - {_PREFIX}start{i}) % {_PREFIX}step{i} == 0")
+        if conditions:
+            lines.append(f"{indent}if {' and '.join(conditions)}:")
+            lines.extend(_body(shape, rest, indent + "    "))
+        else:
+            lines.extend(_body(shape, rest, indent))
+        if has_stop:
+            lines.extend([
+                f"{indent}if {index} + 1 >= {_PREFIX}stop{i}:",
+                f"{indent}    {_PREFIX}done{i} = True",
+                f"{indent}    break",
+            ])
+        return lines
+    # append and prepend do not affect the elements passing through them
+    return _body(shape, rest, indent)
@@ -0,0 +1,361 @@
+"""
+Rewrite rules for query plans, applied right before a plan is lowered into iterators.
+Every rule returns a plan that yields the same elements, in the same order, as the original plan.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Tuple, Type
+
+from fliq._plan import PlanNode, ElementWise, Fused, Order, OrderHead, Select, Slice, Where, \
+    Exclude, Reverse, Shuffle, Distinct, Append, Prepend, Flatten, GroupBy, ConsecutiveDistinct, \
+    ConsecutiveGroupBy, Properties, UNKNOWN, AdaptiveFilter, Parallel, ParallelMap, \
+    SelectConcurrent, ParallelGroupBy, ParallelOrder, Pipelined, Prefetch, Distributed, \
+    DistributedMap
+
+# operators that yield the same elements (though, maybe in a different order),
+# regardless of the order of their input
+_ORDER_INDEPENDENT = (ElementWise, Fused, Distinct, Append, Prepend, Flatten, Parallel,
+                      SelectConcurrent, Pipelined, Prefetch, Distributed)
+
+# operators that yield exactly one element per element of their input (in the same position,
+# unless unordered, where any position is valid)
+_ONE_TO_ONE = (Select, SelectConcurrent, Parallel, Pipelined, Prefetch, Distributed)
+
+# shorter runs are as fast with stacked builtins (filter, map), which are cheaper to lower
+MIN_FUSED_RUN = 3
+
+# shorter sources are iterated faster through stacked builtins than a fused loop is lowered
+MIN_FUSED_LENGTH = 128
+
+# the node types (including subclasses) triggering each rule, which is skipped for plans without
+# them (most plans are short, and the rules would cost more than iterating them)
+_ELEMENT_WISE = frozenset({Where, Exclude, Select})
+_REORDERS = frozenset({Order, OrderHead, ParallelOrder, Reverse, Shuffle})
+_FILTERS = frozenset({Where, Exclude})
+_SLICED = frozenset({Slice})
+_SLICE_PUSHERS = frozenset(_ONE_TO_ONE)
+_PROPERTY_EXPLOITERS = frozenset({Distinct, GroupBy})
+
+
+def optimize(plan: List[PlanNode],
+             limit: Optional[int] = None,
+             ordered: bool = True,
+             properties: Properties = UNKNOWN,
+             adaptive_sample: Optional[int] = None,
+             length: Optional[int] = None) -> List[PlanNode]:
+    """
+    Args:
+        plan: The plan to optimize.
+        limit: Optional. The maximal number of elements expected to be consumed from the plan
+            (e.g., 1 for `first()`), or None if unknown.
+        ordered: Optional. Whether the order of the elements matters to the consumer of the plan
+            (e.g., it does not for `count()`). Defaults to True.
+        properties: Optional. The properties of the source the plan is applied on.
+            Defaults to nothing known.
+        adaptive_sample: Optional. The number of elements to sample for reordering runs of
+            filters at runtime, or None to keep the declared order. Defaults to None.
+        length: Optional. The number of elements of the source, if known. Defaults to None.
+    """
+    if len(plan) < MIN_FUSED_RUN and adaptive_sample is None and \
+            _ELEMENT_WISE.issuperset(map(type, plan)):
+        # no rule applies to a short run of element-wise operators (the most common plans)
+        return plan
+    types = set(map(type, plan))
+    if not ordered and not types.isdisjoint(_REORDERS):
+        plan = drop_reorders(plan)
+        types = set(map(type, plan))
+    if not types.isdisjoint(_FILTERS) and not types.isdisjoint(_REORDERS):
+        plan = push_down_predicates(plan)
+    if not types.isdisjoint(_SLICED) and not types.isdisjoint(_SLICE_PUSHERS):
+        plan = push_down_slices(plan)
+    if Order in types:
+        plan = top_k(plan, limit)
+    if not types.isdisjoint(_PROPERTY_EXPLOITERS):
+        plan = exploit_properties(plan, properties)
+    if Parallel in types:
+        plan = parallelize(plan, limit)
+    if Distributed in types:
+        plan = distribute(plan)
+    if adaptive_sample is not None and not types.isdisjoint(_FILTERS):
+        plan = adapt_filters(plan, adaptive_sample)
+    if len(plan) < MIN_FUSED_RUN or (length is not None and length < MIN_FUSED_LENGTH):
+        return plan
+    return fuse(plan)
+
+
+def drop_reorders(plan: List[PlanNode]) -> List[PlanNode]:
+    """
+    Drops operators that only reorder elements (order, reverse and shuffle), in case the order of
+    the elements does not matter to the consumer of the plan, and all the operators following them
+    yield the same elements regardless of the order of their input.
+    """
+    dropped = plan
+    for i in range(len(plan) - 1, -1, -1):
+        node = plan[i]
+        if isinstance(node, (Order, Reverse, Shuffle)):
+            if dropped is plan:
+                dropped = list(plan)
+            del dropped[i]
+        elif not isinstance(node, _ORDER_INDEPENDENT):
+            break
+    return dropped
+
+
+def push_down_predicates(plan: List[PlanNode]) -> List[PlanNode]:
+    """
+    Moves filters (where, exclude) below operators that only reorder elements (order, reverse and
+    an unseeded shuffle), so these operate on fewer elements.
+    Sorting is stable, so filtering before or after it yields the same elements in the same order.
+    Seeded shuffles are not reordered, as their (reproducible) result depends on their input.
+    """
+    if len(plan) < 2:
+        return plan
+    pushed: List[PlanNode] = []
+    for node in plan:
+        position = len(pushed)
+        if isinstance(node, (Where, Exclude)):
+            while position > 0 and _only_reorders(pushed[position - 1], on_source=position == 1):
+                position -= 1
+        pushed.insert(position, node)
+    return pushed
+
+
+def _only_reorders(node: PlanNode, on_source: bool) -> bool:
+    if isinstance(node, Shuffle):
+        # a fair shuffle requires a sizeable input
+        return node.seed is None and not node.fair
+    if isinstance(node, Reverse):
+        # reversing the source itself fails for irreversible sources, which filtering hides
+        return not on_source
+    return isinstance(node, Order)
+
+
+def push_down_slices(plan: List[PlanNode]) -> List[PlanNode]:
+    """
+    Moves slices (including take and skip) below selects (including concurrent ones), so elements
+    that are sliced out are never mapped. Selects map every element to exactly one element, so
+    positions are unchanged. Slices are moved below parallel (and distributed) markers as well, so
+    these are not sliced in the workers, and below pipelined stages (and prefetches), so these stop
+    once the slice is taken.
+    """
+    if len(plan) < 2:
+        return plan
+    pushed: List[PlanNode] = []
+    for node in plan:
+        position = len(pushed)
+        if isinstance(node, Slice):
+            while position > 0 and isinstance(pushed[position - 1], _ONE_TO_ONE):
+                position -= 1
+        pushed.insert(position, node)
+    return pushed
+
+
+def top_k(plan: List[PlanNode], limit: Optional[int] = None) -> List[PlanNode]:
+    """
+    Bounds sorts that only have their first k elements consumed (e.g., `order().take(k)`),
+    so these are selected using a bounded heap, instead of sorting all elements.
+    Sorts at the end of the plan, expected (but not guaranteed) to be consumed up to the limit,
+    are bounded only for their first elements.
+    """
+    optimized = plan
+    for i, node in enumerate(plan):
+        if type(node) is not Order:
+            continue
+        following = _skip_selects(plan, i + 1)
+        bounded: Order
+        if following is None and limit is not None:
+            bounded = OrderHead(node.by, node.ascending, limit)
+        elif isinstance(following, Slice) and _is_bounded(following):
+            bounded = Order(node.by, node.ascending, following.stop)
+        else:
+            continue
+        if optimized is plan:
+            optimized = list(plan)
+        optimized[i] = bounded
+    return optimized
+
+
+def _skip_selects(plan: List[PlanNode], start: int) -> Optional[PlanNode]:
+    """
+    Returns the first node from `start` that is not a select (which does not change the number of
+    elements) or a parallel marker, or None if the end of the plan is reached.
+    """
+    for node in plan[start:]:
+        if not isinstance(node, _ONE_TO_ONE):
+            return node
+    return None
+
+
+def _is_bounded(node: Slice) -> bool:
+    # invalid slices are left as is, to raise upon lowering
+    return node.stop is not None and node.stop >= 0 and node.start >= 0 and node.step > 0
+
+
+def exploit_properties(plan: List[PlanNode], properties: Properties = UNKNOWN) -> List[PlanNode]:
+    """
+    Replaces operators with cheaper equivalents, given the properties of their input.
+    Distinct is dropped on unique input, and keeps only the first of every run of equal elements on
+    input sorted by the elements themselves (in constant memory). Group by on input sorted by the
+    grouping key yields every group as soon as it ends.
+    """
+    exploited: Optional[List[PlanNode]] = None
+    for i, node in enumerate(plan):
+        replacement: Optional[PlanNode] = node
+        if type(node) is Distinct:
+            if properties.unique:
+                replacement = None
+            elif properties.sorted_by(None) is not None:
+                replacement = ConsecutiveDistinct()
+        elif type(node) is GroupBy and properties.sorted_by(node.key) is not None:
+            replacement = ConsecutiveGroupBy(node.key)
+        properties = node.properties(properties)
+        if replacement is not node and exploited is None:
+            exploited = plan[:i]
+        if exploited is not None and replacement is not None:
+            exploited.append(replacement)
+    return plan if exploited is None else exploited
+
+
+def parallelize(plan: List[PlanNode], limit: Optional[int] = None) -> List[PlanNode]:
+    """
+    Replaces parallel markers, together with the run of element-wise operators following them,
+    with a node executing the run on a pool of workers. A group by directly following the run is
+    executed on the workers as well, and so is a sort (each worker sorting a run of the elements).
+    Markers not followed by any of these are dropped.
+    Workers are stopped once enough elements are yielded, if that is known (a bounded slice
+    follows, or the consumer has a limit).
+    """
+    if not any(isinstance(node, Parallel) for node in plan):
+        return plan
+    parallelized: List[PlanNode] = []
+    i = 0
+    while i < len(plan):
+        node = plan[i]
+        i += 1
+        if not isinstance(node, Parallel):
+            parallelized.append(node)
+            continue
+        run: List[ElementWise] = []
+        while i < len(plan) and isinstance(plan[i], ElementWise):
+            run.append(plan[i])  # type: ignore # (element-wise)
+            i += 1
+        if i < len(plan) and type(plan[i]) is GroupBy:
+            parallelized.append(ParallelGroupBy(node, run, plan[i].key))  # type: ignore
+            i += 1
+            continue
+        if i < len(plan) and type(plan[i]) in (Order, OrderHead):
+            parallelized.append(ParallelOrder(node, run, plan[i]))  # type: ignore
+            i += 1
+            continue
+        if not run:
+            continue
+        following = _skip_selects(plan, i)
+        run_limit = limit if following is None else None
+        if isinstance(following, Slice) and _is_bounded(following):
+            run_limit = following.stop
+        parallelized.append(ParallelMap(node, run, run_limit))
+    return parallelized
+
+
+def distribute(plan: List[PlanNode]) -> List[PlanNode]:
+    """
+    Replaces distributed markers, together with the run of element-wise operators following them,
+    with a node executing the run on the workers of a cluster. Markers not followed by such a run
+    are dropped.
+    """
+    if not any(isinstance(node, Distributed) for node in plan):
+        return plan
+    distributed: List[PlanNode] = []
+    i = 0
+    while i < len(plan):
+        node = plan[i]
+        i += 1
+        if not isinstance(node, Distributed):
+            distributed.append(node)
+            continue
+        run: List[ElementWise] = []
+        while i < len(plan) and isinstance(plan[i], ElementWise):
+            run.append(plan[i])  # type: ignore # (element-wise)
+            i += 1
+        if run:
+            distributed.append(DistributedMap(node, run))
+    return distributed
+
+
+def detach_parallel(plan: List[PlanNode]) -> Optional[Tuple[Parallel, List[ElementWise]]]:
+    """
+    Removes a parallel marker at the end of the plan (followed only by element-wise operators),
+    together with these operators, and returns them, so a materializer can execute them on the
+    workers along with its own reduction. Returns None (leaving the plan intact) otherwise.
+    """
+    return _detach(plan, Parallel)  # type: ignore # (a parallel marker)
+
+
+def detach_distributed(plan: List[PlanNode]) -> Optional[Tuple[Distributed, List[ElementWise]]]:
+    """
+    Same as `detach_parallel`, for a distributed marker (executed on the workers of a cluster).
+    """
+    return _detach(plan, Distributed)  # type: ignore # (a distributed marker)
+
+
+def _detach(plan: List[PlanNode],
+            marker_type: Type[PlanNode]) -> Optional[Tuple[PlanNode, List[ElementWise]]]:
+    i = len(plan)
+    while i > 0 and isinstance(plan[i - 1], ElementWise):
+        i -= 1
+    if i == 0 or not isinstance(plan[i - 1], marker_type):
+        return None
+    marker = plan[i - 1]
+    run: List[ElementWise] = plan[i:]  # type: ignore # (element-wise)
+    del plan[i - 1:]
+    return marker, run
+
+
+def adapt_filters(plan: List[PlanNode], sample_size: int) -> List[PlanNode]:
+    """
+    Replaces runs of consecutive filters (where, exclude) with a single node, that reorders them
+    at runtime, by their cost and selectivity measured over the first `sample_size` elements.
+    """
+    adapted: List[PlanNode] = []
+    run: List[ElementWise] = []
+    for node in plan:
+        if isinstance(node, (Where, Exclude)):
+            run.append(node)
+            continue
+        _flush_filters(run, adapted, sample_size)
+        run = []
+        adapted.append(node)
+    _flush_filters(run, adapted, sample_size)
+    return adapted
+
+
+def _flush_filters(run: List[ElementWise], adapted: List[PlanNode], sample_size: int) -> None:
+    if len(run) < 2:
+        adapted.extend(run)
+    else:
+        adapted.append(AdaptiveFilter(run, sample_size))
+
+
+def fuse(plan: List[PlanNode]) -> List[PlanNode]:
+    """
+    Fuses runs of consecutive element-wise operators (where, exclude, select) into a single node,
+    so elements go through one loop for the entire run, regardless of its length.
+    """
+    fused: List[PlanNode] = []
+    run: List[ElementWise] = []
+    for node in plan:
+        if isinstance(node, ElementWise):
+            run.append(node)
+            continue
+        _flush(run, fused)
+        run = []
+        fused.append(node)
+    _flush(run, fused)
+    return fused
+
+
+def _flush(run: List[ElementWise], fused: List[PlanNode]) -> None:
+    if len(run) < MIN_FUSED_RUN:
+        fused.extend(run)
+    else:
+        fused.append(Fused(run))
@@ -0,0 +1,412 @@
+"""
+Parallel execution of element-wise operators (where, exclude, select) on a pool of workers.
+
+The source is split into chunks (in the consuming process), which are sent to the workers, each
+applying the operators on a whole chunk in a single fused loop (optionally reducing the chunk,
+e.g., into a partial grouping, so only the reduced result is sent back). Only a bounded window of
+chunks is in flight at any time, and chunks are submitted only as results are consumed, so
+consumers that stop early (e.g., `take()`) stop feeding the workers.
+
+Concurrent selects (for I/O-bound selectors) are executed per element on a pool of threads,
+with a bounded window of elements in flight.
+
+Pipelined stages (and prefetched sources) are executed each on a thread of its own, handing its
+elements to the next stage over a bounded queue.
+"""
+from __future__ import annotations
+
+import os
+import pickle
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+from itertools import islice
+from time import perf_counter
+from typing import Any, Callable, Deque, Generator, Iterable, Iterator, List, Optional, Tuple
+
+from fliq import _codegen
+
+BACKENDS = ('process', 'thread')
+
+# chunks in flight, per worker
+_WINDOW_PER_WORKER = 2
+
+Chunk = List[Any]
+
+# the operators (and reducer) applied by a worker process (set once, when the worker starts)
+_worker_apply: Optional[Callable[[Chunk], Any]] = None
+
+
+def parallel_map(items: Iterable[Any],
+                 kinds: Tuple[str, ...],
+                 functions: List[Callable[[Any], Any]],
+                 workers: Optional[int],
+                 backend: str,
+                 chunksize: int,
+                 ordered: bool,
+                 limit: Optional[int] = None) -> Iterator[Any]:
+    """
+    Returns an iterator over the items, after applying the given kinds of operators with their
+    callables (in order) on a pool of workers.
+    Workers are started only once the iterator is iterated, and are shut down once it is exhausted,
+    closed, or `limit` elements were yielded (the rest, if iterated, are processed in-process).
+
+    Raises:
+        TypeError: In case a callable cannot be pickled (for the process backend).
+    """
+    return _flattened(_chunk_results(items, kinds, functions, None, workers, backend, chunksize,
+                                     ordered, limit))
+
+
+def parallel_chunks(items: Iterable[Any],
+                    kinds: Tuple[str, ...],
+                    functions: List[Callable[[Any], Any]],
+                    reducer: Callable[[Iterable[Any]], Any],
+                    workers: Optional[int],
+                    backend: str,
+                    chunksize: int) -> Iterator[Any]:
+    """
+    Returns an iterator over the results of the reducer, applied by the workers on every chunk of
+    the items (after applying the given kinds of operators with their callables), in the order of
+    the chunks. Workers return these (e.g., partial groupings) instead of the elements themselves.
+
+    Raises:
+        TypeError: In case a callable cannot be pickled (for the process backend).
+    """
+    return _chunk_results(items, kinds, functions, reducer, workers, backend, chunksize,
+                          ordered=True, limit=None)
+
+
+def _chunk_results(items: Iterable[Any],
+                   kinds: Tuple[str, ...],
+                   functions: List[Callable[[Any], Any]],
+                   reducer: Optional[Callable[[Iterable[Any]], Any]],
+                   workers: Optional[int],
+                   backend: str,
+                   chunksize: int,
+                   ordered: bool,
+                   limit: Optional[int]) -> Generator[Any, None, None]:
+    workers = workers or os.cpu_count() or 1
+    apply = partial(_apply, _codegen.fused_function(kinds), functions, reducer)
+    start_executor: Callable[[], Executor]
+    submit: Callable[[Executor, Chunk], Future[Any]]
+    if backend == 'process':
+        # imported lazily, so importing fliq does not import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        payload = _pickled(functions, reducer)
+        start_executor = partial(ProcessPoolExecutor, workers, initializer=_initialize_worker,
+                                 initargs=(kinds, payload))
+        submit = _submit_to_process
+    else:
+        start_executor = partial(ThreadPoolExecutor, workers)
+        submit = partial(_submit_to_thread, apply)
+
+    chunks = iter(partial(_next_chunk, iter(items), chunksize), [])
+    return _results(chunks, start_executor, submit, apply, workers * _WINDOW_PER_WORKER, ordered,
+                    limit)
+
+
+def _flattened(results: Generator[Chunk, None, None]) -> Iterator[Any]:
+    try:
+        for result in results:
+            yield from result
+    finally:
+        results.close()
+
+
+def _results(chunks: Iterator[Chunk],
+             start_executor: Callable[[], Executor],
+             submit: Callable[[Executor, Chunk], Future[Any]],
+             apply: Callable[[Chunk], Any],
+             window: int,
+             ordered: bool,
+             limit: Optional[int]) -> Generator[Any, None, None]:
+    """
+    Yields the results of the processed chunks, in the order of the source (if `ordered`) or as
+    chunks complete. A processed chunk is replaced with a new one (from the source) before its
+    result is yielded, so the workers keep busy while it is consumed.
+    Once `limit` elements are reached (results being the elements of the chunks), chunks not
+    started yet are cancelled and the workers are shut down. Chunks cancelled or not submitted are
+    processed in-process, in case the consumer continues anyway.
+    """
+    executor = start_executor()
+    running = True
+    yielded = 0
+    in_flight: Deque[Tuple[Future[Any], Chunk]] = deque(
+        (submit(executor, chunk), chunk) for chunk in islice(chunks, window))
+    try:
+        while in_flight:
+            if ordered:
+                future, chunk = in_flight.popleft()
+            else:
+                wait([future for future, _ in in_flight], return_when=FIRST_COMPLETED)
+                future, chunk = next(pair for pair in in_flight if pair[0].done())
+                in_flight.remove((future, chunk))
+            result = apply(chunk) if future.cancelled() else future.result()
+            if limit is not None:
+                yielded += len(result)
+            if running and limit is not None and yielded >= limit:
+                # stop before yielding, the consumer may not pull (or close) the iterator again
+                running = False
+                for pending, _ in in_flight:
+                    pending.cancel()
+                executor.shutdown(wait=False)
+            elif running:
+                in_flight.extend((submit(executor, chunk), chunk) for chunk in islice(chunks, 1))
+            yield result
+        for chunk in chunks:
+            yield apply(chunk)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _next_chunk(items: Iterator[Any], chunksize: int) -> Chunk:
+    return list(islice(items, chunksize))
+
+
+def _pickled(functions: List[Callable[[Any], Any]],
+             reducer: Optional[Callable[[Iterable[Any]], Any]]) -> bytes:
+    for function in [*functions, reducer]:
+        try:
+            pickle.dumps(function)
+        except Exception as e:
+            raise TypeError(
+                f"Callables executed in parallel must be picklable for the process backend "
+                f"(e.g., module level functions, rather than lambdas or local functions), "
+                f"found {function!r}. Consider using backend='thread' instead.") from e
+    return pickle.dumps((functions, reducer))
+
+
+def _initialize_worker(kinds: Tuple[str, ...], payload: bytes) -> None:
+    global _worker_apply
+    functions, reducer = pickle.loads(payload)
+    _worker_apply = partial(_apply, _codegen.fused_function(kinds), functions, reducer)
+
+
+def _submit_to_process(executor: Executor, chunk: Chunk) -> Future[Any]:
+    return executor.submit(_apply_in_worker, chunk)
+
+
+def _submit_to_thread(apply: Callable[[Chunk], Any],
+                      executor: Executor,
+                      chunk: Chunk) -> Future[Any]:
+    return executor.submit(apply, chunk)
+
+
+def _apply_in_worker(chunk: Chunk) -> Any:
+    return _worker_apply(chunk)  # type: ignore # (set by the worker initializer)
+
+
+def _apply(fused: _codegen.FusedFunction,
+           functions: List[Callable[[Any], Any]],
+           reducer: Optional[Callable[[Iterable[Any]], Any]],
+           chunk: Chunk) -> Any:
+    items = fused(chunk, *functions)
+    return list(items) if reducer is None else reducer(items)
+
+
+def concurrent_map(items: Iterable[Any],
+                   function: Callable[[Any], Any],
+                   max_workers: Optional[int],
+                   max_in_flight: Optional[int],
+                   ordered: bool) -> Iterator[Any]:
+    """
+    Returns an iterator over the results of the function applied on every item, on a pool of
+    threads. At most `max_in_flight` items are submitted (and not yet consumed) at any time.
+    Threads are started only once the iterator is iterated, and pending calls are cancelled once it
+    is closed (e.g., the consumer stops iterating) or a call raises.
+    """
+    max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    max_in_flight = max_in_flight or max_workers * _WINDOW_PER_WORKER
+    return _concurrent_results(iter(items), function, max_workers, max_in_flight, ordered)
+
+
+def _concurrent_results(items: Iterator[Any],
+                        function: Callable[[Any], Any],
+                        max_workers: int,
+                        max_in_flight: int,
+                        ordered: bool) -> Iterator[Any]:
+    executor = ThreadPoolExecutor(max_workers)
+    try:
+        in_flight: Deque[Future[Any]] = deque(
+            executor.submit(function, item) for item in islice(items, max_in_flight))
+        while in_flight:
+            if ordered:
+                future = in_flight.popleft()
+            else:
+                wait(in_flight, return_when=FIRST_COMPLETED)
+                future = next(future for future in in_flight if future.done())
+                in_flight.remove(future)
+            # refill before waiting, so the window stays full
+            in_flight.extend(executor.submit(function, item) for item in islice(items, 1))
+            yield future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class StageMetrics:
+    """
+    Metrics of a pipelined stage, and of the queue it hands its elements over (see `pipelined()`).
+    Updated while the query is iterated.
+
+    Attributes:
+        name: The name of the stage (e.g., the mappers it runs).
+        buffer: The capacity of the queue.
+        items: The number of elements handed over.
+        max_depth: The maximal number of elements in the queue.
+        put_wait: Seconds the stage waited for the queue to have room (the following stages were
+            slower).
+        get_wait: Seconds the following stages waited for the stage to hand an element over (this
+            stage, or the ones before it, were slower).
+    """
+    __slots__ = ('name', 'buffer', 'items', 'max_depth', 'total_depth', 'put_wait', 'get_wait')
+
+    def __init__(self, name: str, buffer: int):
+        self.name = name
+        self.buffer = buffer
+        self.items = 0
+        self.max_depth = 0
+        self.total_depth = 0
+        self.put_wait = 0.0
+        self.get_wait = 0.0
+
+    @property
+    def mean_depth(self) -> float:
+        """
+        The mean number of elements in the queue, sampled whenever an element is handed over.
+        """
+        return self.total_depth / self.items if self.items else 0.0
+
+    def __repr__(self) -> str:
+        return (f"StageMetrics(name={self.name!r}, items={self.items}, "
+                f"mean_depth={self.mean_depth:.1f}/{self.buffer}, max_depth={self.max_depth}, "
+                f"put_wait={self.put_wait:.3f}s, get_wait={self.get_wait:.3f}s)")
+
+
+class _Failure:
+    """
+    An exception raised by a producer (e.g., a stage, or a merged async source), to be raised by
+    the consumer.
+    """
+    __slots__ = ('error',)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_DONE = object()
+
+# seconds between checks whether the consumer stopped, while a stage waits for room in its queue
+_STOP_POLL_INTERVAL = 0.1
+
+
+def staged(items: Iterable[Any], buffer: int, metrics: StageMetrics) -> Iterator[Any]:
+    """
+    Returns an iterator over the items, which are iterated on a thread of their own (started once
+    the iterator is iterated), and handed over a queue of `buffer` elements.
+    The thread stops once the iterator is exhausted or closed (e.g., the consumer stops early).
+    """
+    handoff: queue.Queue[Any] = queue.Queue(buffer)
+    stopped = threading.Event()
+    thread = threading.Thread(target=_produce, args=(items, handoff, stopped, metrics),
+                              name=f"fliq-stage-{metrics.name}", daemon=True)
+    thread.start()
+    try:
+        while True:
+            try:
+                item = handoff.get_nowait()
+            except queue.Empty:
+                start = perf_counter()
+                item = handoff.get()
+                metrics.get_wait += perf_counter() - start
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
+        # make room for a stage waiting to hand an element over, so it notices it should stop
+        while not handoff.empty():
+            handoff.get_nowait()
+
+
+def prefetched(items: Iterable[Any], n: int, batch: int) -> Iterator[Any]:
+    """
+    Returns an iterator over the items, which are read ahead (up to about `n` elements) on a
+    thread of their own, and handed over in batches of `batch` elements.
+    An exception raised by the items is raised after the elements preceding it.
+    """
+    metrics = StageMetrics('prefetch', -(-n // batch))
+    for chunk in staged(_batches(items, batch), metrics.buffer, metrics):
+        yield from chunk
+
+
+def _batches(items: Iterable[Any], batch: int) -> Iterator[Chunk]:
+    iterator = iter(items)
+    chunk: Chunk = []
+    try:
+        for item in iterator:
+            chunk.append(item)
+            if len(chunk) == batch:
+                yield chunk
+                chunk = []
+    except Exception:
+        if chunk:
+            # elements read before the error are handed over first
+            yield chunk
+        raise
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            close()
+    if chunk:
+        yield chunk
+
+
+def _produce(items: Iterable[Any],
+             handoff: queue.Queue[Any],
+             stopped: threading.Event,
+             metrics: StageMetrics) -> None:
+    iterator = iter(items)
+    try:
+        for item in iterator:
+            try:
+                handoff.put_nowait(item)
+            except queue.Full:
+                start = perf_counter()
+                put = _put(handoff, item, stopped)
+                metrics.put_wait += perf_counter() - start
+                if not put:
+                    return
+            depth = handoff.qsize()
+            metrics.items += 1
+            metrics.total_depth += depth
+            if depth > metrics.max_depth:
+                metrics.max_depth = depth
+            if stopped.is_set():
+                return
+        _put(handoff, _DONE, stopped)
+    except BaseException as e:
+        _put(handoff, _Failure(e), stopped)
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            close()
+
+
+def _put(handoff: queue.Queue[Any], item: Any, stopped: threading.Event) -> bool:
+    """
+    Puts the item in the queue, waiting for room unless the consumer stopped.
+    Returns whether the item was put.
+    """
+    while not stopped.is_set():
+        try:
+            handoff.put(item, timeout=_STOP_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
@@ -0,0 +1,1135 @@
+"""
+Deferred (logical) query plans.
+
+A plan is a linear chain of operator nodes, applied (in order) on top of the source iterable of
+a query. Mappers do not touch the data, they only append a node to the plan.
+The plan is lowered into (standard library) iterators only once the query is materialized,
+which gives a single place to inspect (and later optimize) the whole pipeline before it runs.
+"""
+from __future__ import annotations
+
+import collections.abc
+import heapq
+import logging
+import os
+import random
+from collections import defaultdict, deque, Counter
+from functools import partial, reduce
+from itertools import islice, chain, zip_longest, groupby
+from operator import attrgetter, itemgetter
+from time import perf_counter
+from typing import Any, Callable, Dict, Generator, Hashable, Iterable, Iterator, List, Optional, \
+    Tuple, Type, Union, TYPE_CHECKING
+
+from fliq import _codegen, _parallel
+from fliq import cancellation as _cancellation
+from fliq._types import MISSING, Missing
+from fliq.exceptions import NotEnoughElementsException
+
+if TYPE_CHECKING:
+    from fliq import cluster as _cluster  # pragma: no cover
+
+Key = Union[str, Callable[[Any], Any], None]
+
+logger = logging.getLogger(__name__)
+
+
+class Properties:
+    """
+    Facts known about the elements yielded by a plan (or a source), which following operators can
+    exploit: whether the elements are sorted (by which key, and in which direction), and whether
+    they are unique. Lengths are propagated separately (see `length`).
+    """
+    __slots__ = ('is_sorted', 'by', 'ascending', 'unique')
+
+    def __init__(self,
+                 is_sorted: bool = False,
+                 by: Key = None,
+                 ascending: bool = True,
+                 unique: bool = False):
+        self.is_sorted = is_sorted
+        self.by = by
+        self.ascending = ascending
+        self.unique = unique
+
+    def sorted_by(self, by: Key) -> Optional[bool]:
+        """
+        Returns whether the elements are sorted ascending (True) or descending (False) by the given
+        key, or None in case they are not known to be sorted by it.
+        Keys are the same if they are the same selector, or the same attribute name (None stands
+        for the elements themselves).
+        """
+        if not self.is_sorted:
+            return None
+        if self.by is by or (isinstance(by, str) and by == self.by):
+            return self.ascending
+        return None
+
+    def __repr__(self) -> str:
+        facts = []
+        if self.is_sorted:
+            facts.append(f"sorted({'ascending' if self.ascending else 'descending'})")
+        if self.unique:
+            facts.append('unique')
+        return f"Properties({', '.join(facts)})"
+
+
+UNKNOWN = Properties()
+
+
+class PlanNode:
+    """
+    A single (deferred) operator in a query plan.
+    Each node knows how to lower itself on top of the items yielded by the previous node.
+    """
+    __slots__ = ()
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        raise NotImplementedError()  # pragma: no cover
+
+    def length(self, length: int) -> Optional[int]:
+        """
+        Returns the exact number of elements yielded by the node, given the number of elements
+        it consumes, or None in case it cannot be known without iterating.
+        """
+        return None
+
+    def properties(self, properties: Properties) -> Properties:
+        """
+        Returns the properties of the elements yielded by the node, given the properties of the
+        elements it consumes. Nothing is known by default.
+        """
+        return UNKNOWN
+
+    def __repr__(self) -> str:
+        return type(self).__name__
+
+
+class ElementWise(PlanNode):
+    """
+    An operator that applies a function to every element on its own (where, exclude, select).
+    A run of such operators can be fused into a single loop.
+    """
+    __slots__ = ('function',)
+    kind: str
+
+    def __init__(self, function: Callable[[Any], Any]):
+        self.function = function
+
+    def properties(self, properties: Properties) -> Properties:
+        # filters yield a subsequence of their input
+        return properties
+
+
+class Where(ElementWise):
+    __slots__ = ()
+    kind = 'where'
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return filter(self.function, items)
+
+
+class Exclude(ElementWise):
+    __slots__ = ()
+    kind = 'exclude'
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        predicate = self.function
+        return filter(lambda x: not predicate(x), items)
+
+
+class Select(ElementWise):
+    __slots__ = ()
+    kind = 'select'
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return map(self.function, items)
+
+    def length(self, length: int) -> Optional[int]:
+        return length
+
+    def properties(self, properties: Properties) -> Properties:
+        return UNKNOWN
+
+
+class Fused(PlanNode):
+    """
+    A run of element-wise operators, lowered into a single generated loop.
+    """
+    __slots__ = ('kinds', 'functions')
+
+    def __init__(self, nodes: List[ElementWise]):
+        self.kinds = tuple([node.kind for node in nodes])
+        self.functions = [node.function for node in nodes]
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return _codegen.fused_function(self.kinds)(items, *self.functions)
+
+    def length(self, length: int) -> Optional[int]:
+        return length if all(kind == 'select' for kind in self.kinds) else None
+
+    def properties(self, properties: Properties) -> Properties:
+        return UNKNOWN if 'select' in self.kinds else properties
+
+    def __repr__(self) -> str:
+        return f"Fused({', '.join(self.kinds)})"
+
+
+class Parallel(PlanNode):
+    """
+    Marks the run of element-wise operators following it, to be executed on a pool of workers.
+    Replaced (together with the run) by a ParallelMap, once the plan is optimized.
+    """
+    __slots__ = ('workers', 'backend', 'chunksize', 'ordered')
+
+    def __init__(self, workers: Optional[int], backend: str, chunksize: int, ordered: bool):
+        self.workers = workers
+        self.backend = backend
+        self.chunksize = chunksize
+        self.ordered = ordered
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return items
+
+    def length(self, length: int) -> Optional[int]:
+        return length
+
+    def properties(self, properties: Properties) -> Properties:
+        return properties if self.ordered else Properties(unique=properties.unique)
+
+
+class Pipelined(PlanNode):
+    """
+    Ends a pipelined stage: the nodes before it (back to the previous stage) are executed on a
+    thread of their own, handing their elements over a bounded queue (see `_parallel`).
+    """
+    __slots__ = ('buffer', 'metrics')
+
+    def __init__(self, buffer: int, metrics: _parallel.StageMetrics):
+        self.buffer = buffer
+        self.metrics = metrics
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return _parallel.staged(items, self.buffer, self.metrics)
+
+    def length(self, length: int) -> Optional[int]:
+        return length
+
+    def properties(self, properties: Properties) -> Properties:
+        return properties
+
+
+class Prefetch(PlanNode):
+    """
+    Reads the items ahead on a thread of their own, in batches (see `_parallel`).
+    """
+    __slots__ = ('n', 'batch')
+
+    def __init__(self, n: int, batch: int):
+        self.n = n
+        self.batch = batch
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return _parallel.prefetched(items, self.n, self.batch)
+
+    def length(self, length: int) -> Optional[int]:
+        return length
+
+    def properties(self, properties: Properties) -> Properties:
+        return properties
+
+
+class SelectConcurrent(PlanNode):
+    """
+    A select, executed concurrently on a pool of threads (see `_parallel`).
+    """
+    __slots__ = ('function', 'max_workers', 'max_in_flight', 'ordered')
+
+    def __init__(self,
+                 function: Callable[[Any], Any],
+                 max_workers: Optional[int],
+                 max_in_flight: Optional[int],
+                 ordered: bool):
+        self.function = function
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self.ordered = ordered
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return _parallel.concurrent_map(items, self.function, self.max_workers,
+                                        self.max_in_flight, self.ordered)
+
+    def length(self, length: int) -> Optional[int]:
+        return length
+
+
+class ParallelMap(PlanNode):
+    """
+    A run of element-wise operators, executed on a pool of workers (see `_parallel`).
+    Workers are stopped once `limit` elements are yielded, if set.
+    """
+    __slots__ = ('kinds', 'functions', 'parallel', 'limit')
+
+    def __init__(self, parallel: Parallel, nodes: List[ElementWise], limit: Optional[int] = None):
+        self.kinds = tuple([node.kind for node in nodes])
+        self.functions = [node.function for node in nodes]
+        self.parallel = parallel
+        self.limit = limit
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        parallel = self.parallel
+        return _parallel.parallel_map(items, self.kinds, self.functions, parallel.workers,
+                                      parallel.backend, parallel.chunksize, parallel.ordered,
+                                      self.limit)
+
+    def length(self, length: int) -> Optional[int]:
+        return length if all(kind == 'select' for kind in self.kinds) else None
+
+    def properties(self, properties: Properties) -> Properties:
+        if 'select' in self.kinds:
+            return UNKNOWN
+        return properties if self.parallel.ordered else Properties(unique=properties.unique)
+
+    def __repr__(self) -> str:
+        return f"ParallelMap({', '.join(self.kinds)})"
+
+
+class Distributed(PlanNode):
+    """
+    Marks the run of element-wise operators following it, to be executed on the workers of a
+    cluster. Replaced (together with the run) by a DistributedMap, once the plan is optimized.
+    """
+    __slots__ = ('cluster', 'by', 'chunksize', 'ordered')
+
+    def __init__(self,
+                 cluster: _cluster.Cluster,
+                 by: Optional[Callable[[Any], int]],
+                 chunksize: int,
+                 ordered: bool):
+        self.cluster = cluster
+        self.by = by
+        self.chunksize = chunksize
+        self.ordered = ordered
+
+    def scatter(self,
+                items: Iterable[Any],
+                nodes: List[ElementWise],
+                reducer: Optional[Callable[[Iterable[Any]], Any]] = None) -> Iterator[Any]:
+        """
+        Executes the element-wise operators (and the reducer, if given) on the workers of the
+        cluster (see `cluster`).
+        """
+        # imported lazily, so importing fliq does not import multiprocessing.connection
+        from fliq import cluster as _cluster
+
+        return _cluster.scatter(self.cluster, items, tuple([node.kind for node in nodes]),
+                                [node.function for node in nodes], reducer, self.by,
+                                self.chunksize, self.ordered)
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return items
+
+    def length(self, length: int) -> Optional[int]:
+        return length
+
+    def properties(self, properties: Properties) -> Properties:
+        return properties if self.ordered else Properties(unique=properties.unique)
+
+
+class DistributedMap(PlanNode):
+    """
+    A run of element-wise operators, executed on the workers of a cluster (see `cluster`).
+    """
+    __slots__ = ('distributed', 'nodes')
+
+    def __init__(self, distributed: Distributed, nodes: List[ElementWise]):
+        self.distributed = distributed
+        self.nodes = nodes
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return self.distributed.scatter(items, self.nodes)
+
+    def length(self, length: int) -> Optional[int]:
+        return length if all(node.kind == 'select' for node in self.nodes) else None
+
+    def properties(self, properties: Properties) -> Properties:
+        if any(node.kind == 'select' for node in self.nodes):
+            return UNKNOWN
+        return properties if self.distributed.ordered else Properties(unique=properties.unique)
+
+    def __repr__(self) -> str:
+        return f"DistributedMap({', '.join([node.kind for node in self.nodes])})"
+
+
+class ParallelGroupBy(PlanNode):
+    """
+    A run of element-wise operators followed by a group by, executed on a pool of workers (see
+    `_parallel`). Every worker groups the elements of its chunks (combining the elements of each
+    group, if `combine` is set), and the partial groups are merged in the order of the chunks, so
+    groups keep the order of their first appearance (and elements their order within a group).
+    """
+    __slots__ = ('kinds', 'functions', 'parallel', 'key', 'combine')
+
+    def __init__(self,
+                 parallel: Parallel,
+                 nodes: List[ElementWise],
+                 key: Union[str, Callable[[Any], Any]],
+                 combine: Optional[Callable[[Any, Any], Any]] = None):
+        self.kinds = tuple([node.kind for node in nodes])
+        self.functions = [node.function for node in nodes]
+        self.parallel = parallel
+        self.key = key
+        self.combine = combine
+
+    def groups(self, items: Iterable[Any]) -> Dict[Any, Any]:
+        parallel = self.parallel
+        reducer = partial(group_by, key=self.key, combine=self.combine)
+        partial_groups = _parallel.parallel_chunks(items, self.kinds, self.functions, reducer,
+                                                   parallel.workers, parallel.backend,
+                                                   parallel.chunksize)
+        return merge_groups(partial_groups, self.combine)
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return self.groups(items).values()
+
+    def __repr__(self) -> str:
+        return f"ParallelGroupBy({', '.join([*self.kinds, 'group_by'])})"
+
+
+class AdaptiveFilter(PlanNode):
+    """
+    A run of filters (where, exclude), reordered at runtime to minimize the cost of evaluating them.
+    The first `sample_size` elements are filtered in the declared order, while measuring the cost
+    and the selectivity of every predicate. The rest are filtered by the predicates ordered by
+    their expected cost per element they reject (cheap and selective ones first).
+    Elements any predicate raises on are filtered again in the declared order, so the result is
+    identical to it (for predicates without side effects).
+    The chosen order is kept in `order` (as declared positions), and logged in debug level.
+    """
+    __slots__ = ('kinds', 'functions', 'sample_size', 'order')
+
+    def __init__(self, nodes: List[ElementWise], sample_size: int):
+        self.kinds = tuple([node.kind for node in nodes])
+        self.functions = [node.function for node in nodes]
+        self.sample_size = sample_size
+        self.order: Optional[List[int]] = None
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return self._generator(iter(items))
+
+    def _generator(self, items: Iterator[Any]) -> Iterator[Any]:
+        kinds, functions = self.kinds, self.functions
+        count = len(kinds)
+        costs = [0.0] * count
+        calls = [0] * count
+        rejections = [0] * count
+        for item in islice(items, self.sample_size):
+            for i in range(count):
+                start = perf_counter()
+                keep = bool(functions[i](item)) == (kinds[i] == 'where')
+                costs[i] += perf_counter() - start
+                calls[i] += 1
+                if not keep:
+                    rejections[i] += 1
+                    break
+            else:
+                yield item
+
+        def rank(i: int) -> Tuple[bool, float]:
+            # expected cost per rejected element, predicates never called are kept last
+            if calls[i] == 0:
+                return True, 0.0
+            if rejections[i] == 0:
+                return False, float('inf')
+            return False, costs[i] / rejections[i]
+
+        self.order = order = sorted(range(count), key=rank)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Adaptive filter order (of %d sampled elements): %s", calls[0], ", ".join(
+                f"{kinds[i]}#{i} {getattr(functions[i], '__qualname__', functions[i])!r} "
+                f"({calls[i]} calls, {rejections[i]} rejected, {costs[i] * 1e6:.0f}us)"
+                for i in order))
+
+        function = _codegen.fused_function(tuple([kinds[i] for i in order]), guarded=True)
+        yield from function(items, self._declared, *[functions[i] for i in order])
+
+    def _declared(self, item: Any) -> bool:
+        # whether the item is kept by the filters in the declared order (raises as these do)
+        return all(bool(function(item)) == (kind == 'where')
+                   for kind, function in zip(self.kinds, self.functions))
+
+    def properties(self, properties: Properties) -> Properties:
+        return properties
+
+    def __repr__(self) -> str:
+        if self.order is None:
+            return f"AdaptiveFilter({', '.join(self.kinds)})"
+        return f"AdaptiveFilter({', '.join(f'{self.kinds[i]}#{i}' for i in self.order)})"
+
+
+class Distinct(PlanNode):
+    __slots__ = ()
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        def generator(internal_items: Iterable[Any]) -> Iterable[Any]:
+            seen = set()
+            for item in internal_items:
+                if item not in seen:
+                    seen.add(item)
+                    yield item
+
+        return generator(items)
+
+    def properties(self, properties: Properties) -> Properties:
+        return _unique(properties)
+
+
+class ConsecutiveDistinct(PlanNode):
+    """
+    Distinct over elements sorted by their own value, where equal elements are adjacent.
+    Yields the first element of every run of equal elements, in constant memory.
+    """
+    __slots__ = ()
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return map(next, map(itemgetter(1), groupby(items)))
+
+    def properties(self, properties: Properties) -> Properties:
+        return _unique(properties)
+
+
+class Order(PlanNode):
+    """
+    A stable sort. In case a limit is set, only the first `limit` elements (of the sorted order)
+    are yielded, selected using a bounded heap (O(n log k) time, O(k) memory), instead of sorting
+    (see `sorted_head()`).
+    """
+    __slots__ = ('by', 'ascending', 'limit')
+
+    def __init__(self,
+                 by: Optional[Callable[[Any], Any]],
+                 ascending: bool,
+                 limit: Optional[int] = None):
+        self.by = by
+        self.ascending = ascending
+        self.limit = limit
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        if self.limit is not None:
+            return self._head(items, self.limit)
+        return self._sorted(items)
+
+    def length(self, length: int) -> Optional[int]:
+        return length if self.limit is None else min(length, self.limit)
+
+    def properties(self, properties: Properties) -> Properties:
+        return Properties(True, self.by, self.ascending, properties.unique)
+
+    def _sorted(self, items: Iterable[Any]) -> List[Any]:
+        # assumed to be comparable
+        if self.by is None:
+            return sorted(items, reverse=not self.ascending)
+        return sorted(items, key=self.by, reverse=not self.ascending)
+
+    def _head(self, items: Iterable[Any], n: int) -> List[Any]:
+        return sorted_head(items, n, self.by, self.ascending)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(limit={self.limit})" if self.limit is not None else "Order"
+
+
+class OrderHead(Order):
+    """
+    A stable sort, expected to be consumed only up to its first `limit` elements
+    (e.g., by `first()`). These are selected using a bounded heap, while the rest of the elements
+    are sorted only if they are iterated as well.
+    """
+    __slots__ = ()
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        all_items = list(items)
+        head = self._head(all_items, self.limit)  # type: ignore # (limit is always set)
+
+        def generator() -> Iterable[Any]:
+            yield from head
+            yield from islice(self._sorted(all_items), len(head), None)
+
+        return generator()
+
+    def length(self, length: int) -> Optional[int]:
+        return length
+
+
+class ParallelOrder(Order):
+    """
+    A run of element-wise operators followed by a stable sort, executed on a pool of workers
+    (see `_parallel`). The elements are split into a run per worker, each sorted by its worker
+    (which also computes the keys), and the sorted runs are merged (k-way, using a heap) as the
+    merged elements are consumed, so the first ones are available before the merge completes.
+    Ties are kept in the order of the runs, so the result equals the serial (stable) sort.
+    In case a limit is set, workers select only the first `limit` elements of their runs.
+    """
+    __slots__ = ('kinds', 'functions', 'parallel')
+
+    def __init__(self, parallel: Parallel, nodes: List[ElementWise], order: Order):
+        # a head of a sort is only expected (not guaranteed) to be consumed, so sort all elements
+        super().__init__(order.by, order.ascending,
+                         order.limit if type(order) is Order else None)
+        self.kinds = tuple([node.kind for node in nodes])
+        self.functions = [node.function for node in nodes]
+        self.parallel = parallel
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return self._merged(items)
+
+    def length(self, length: int) -> Optional[int]:
+        if not all(kind == 'select' for kind in self.kinds):
+            return None
+        return super().length(length)
+
+    def _merged(self, items: Iterable[Any]) -> Iterator[Any]:
+        parallel = self.parallel
+        all_items = list(items)
+        # a single run per worker, so the merge is over as few runs as possible
+        workers = parallel.workers or os.cpu_count() or 1
+        run_size = max(parallel.chunksize, -(-len(all_items) // workers))
+        reducer = partial(sorted_run, by=self.by, ascending=self.ascending, limit=self.limit)
+        runs = list(_parallel.parallel_chunks(all_items, self.kinds, self.functions, reducer,
+                                              parallel.workers, parallel.backend, run_size))
+        del all_items
+        if self.limit is not None:
+            yield from self._head(list(chain.from_iterable(runs)), self.limit)
+        elif self.by is None:
+            yield from heapq.merge(*runs, reverse=not self.ascending)
+        else:
+            # runs are of (key, element) pairs
+            merged = heapq.merge(*runs, key=itemgetter(0), reverse=not self.ascending)
+            yield from map(itemgetter(1), merged)
+
+    def __repr__(self) -> str:
+        kinds = ', '.join([*self.kinds, 'order'])
+        return f"ParallelOrder({kinds}, limit={self.limit})" if self.limit is not None \
+            else f"ParallelOrder({kinds})"
+
+
+# a bounded heap selects the first k elements faster than sorting only if there are at least
+# this many times more elements (it keeps elements as (key, index, element) triplets)
+_HEAP_RATIO = 32
+
+
+def sorted_head(items: Iterable[Any],
+                n: int,
+                by: Optional[Callable[[Any], Any]],
+                ascending: bool) -> List[Any]:
+    """
+    Returns the first n elements of the items in (stable) sorted order, selected using a bounded
+    heap, unless the items are sized and not many more than n, in which case they are sorted.
+    """
+    if isinstance(items, collections.abc.Sized) and n * _HEAP_RATIO > len(items):
+        if by is None:
+            return sorted(items, reverse=not ascending)[:n]
+        return sorted(items, key=by, reverse=not ascending)[:n]
+    select = heapq.nsmallest if ascending else heapq.nlargest
+    return select(n, items, key=by)
+
+
+def sorted_run(items: Iterable[Any],
+               by: Optional[Callable[[Any], Any]],
+               ascending: bool,
+               limit: Optional[int]) -> List[Any]:
+    """
+    Sorts (stable) a run of elements, for merging with other runs. In case a selector is given,
+    the run is of (key, element) pairs, so keys are not computed again while merging.
+    In case a limit is given, only the first `limit` elements are selected (as is).
+    """
+    if limit is not None:
+        # the run is in memory anyway, listing it tells its length
+        return sorted_head(list(items), limit, by, ascending)
+    if by is None:
+        return sorted(items, reverse=not ascending)
+    return sorted([(by(item), item) for item in items], key=itemgetter(0), reverse=not ascending)
+
+
+class Shuffle(PlanNode):
+    """
+    A fair shuffle (of a sizeable iterable), or an unfair (buffered) shuffle,
+    which supports infinite iterables.
+    """
+
+    __slots__ = ('buffer_size', 'seed', 'fair')
+
+    def __init__(self, buffer_size: int, seed: Optional[Hashable], fair: bool = False):
+        self.buffer_size = buffer_size
+        self.seed = seed
+        self.fair = fair
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        ran = random.Random(self.seed) if self.seed is not None else random.Random()
+        buffer_size = self.buffer_size
+
+        if self.fair:
+            if not isinstance(items, collections.abc.Sized):
+                raise TypeError("Fair shuffle is not supported for non-sizeable iterables")
+            shuffled_items = list(items)
+            ran.shuffle(shuffled_items)
+            return shuffled_items
+
+        def shuffled_generator(internal_items: Iterable[Any]) -> Iterable[Any]:
+            buffer: List[Any] = []
+            sentinel = object()
+            items_iter = iter(internal_items)
+
+            # fill the buffer
+            for _ in range(buffer_size):
+                item = next(items_iter, sentinel)
+                if item is sentinel:
+                    # iterable exhausted (smaller than buffer size)
+                    break
+                buffer.append(item)
+
+            ran.shuffle(buffer)
+
+            # if buffer was not filled, it means the iterable was too short
+            if len(buffer) < buffer_size:
+                yield from buffer
+                return
+
+            for item in items_iter:
+                # yield a random item from the buffer and replace it with the new item
+                idx = ran.randrange(len(buffer))
+                yield buffer[idx]
+                buffer[idx] = item
+
+            # yield the remaining items in the buffer
+            yield from buffer
+
+        return shuffled_generator(items)
+
+    def length(self, length: int) -> Optional[int]:
+        return length
+
+    def properties(self, properties: Properties) -> Properties:
+        return Properties(unique=properties.unique)
+
+
+class Reverse(PlanNode):
+    __slots__ = ()
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        if isinstance(items, _cancellation.Checkpoint) and \
+                not isinstance(items, collections.abc.Sequence):
+            # checked items are reversible as the items they wrap are (iterators are listed through
+            # the checkpoint, so reading them is still checked)
+            if isinstance(items.items, collections.abc.Iterator):
+                return reversed(list(items))
+            return reversed(items.items)  # type: ignore # (irreversible iterables raise TypeError)
+        if isinstance(items, collections.abc.Iterator):
+            return reversed(list(items))
+        return reversed(items)  # type: ignore # (irreversible iterables raise TypeError)
+
+    def length(self, length: int) -> Optional[int]:
+        return length
+
+    def properties(self, properties: Properties) -> Properties:
+        return Properties(properties.is_sorted, properties.by, not properties.ascending,
+                          properties.unique)
+
+
+class Slice(PlanNode):
+    __slots__ = ('start', 'stop', 'step')
+
+    def __init__(self, start: int, stop: Optional[int], step: int):
+        self.start = start
+        self.stop = stop
+        self.step = step
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        start, stop, step = self.start, self.stop, self.step
+        valid = start >= 0 and step > 0 and (stop is None or stop >= 0)
+        if valid and isinstance(items, collections.abc.Sequence):
+            if isinstance(items, range):
+                return items[start:stop:step]
+            indices = range(len(items))[start:stop:step]
+            if len(indices) < start:
+                # index directly, rather than iterating over the (more numerous) skipped elements
+                return map(items.__getitem__, indices)
+        return islice(items, start, stop, step)
+
+    def length(self, length: int) -> Optional[int]:
+        start, stop, step = self.start, self.stop, self.step
+        if start < 0 or step <= 0 or (stop is not None and stop < 0):
+            # raises upon lowering
+            return None
+        return len(range(length)[start:stop:step])
+
+    def properties(self, properties: Properties) -> Properties:
+        # slices yield a subsequence of their input
+        return properties
+
+
+class Zip(PlanNode):
+    __slots__ = ('iterables', 'longest', 'fill')
+
+    def __init__(self, iterables: Tuple[Iterable[Any], ...], longest: bool, fill: Any):
+        self.iterables = iterables
+        self.longest = longest
+        self.fill = fill
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        if self.longest:
+            return zip_longest(items, *self.iterables, fillvalue=self.fill)
+        return zip(items, *self.iterables)
+
+    def length(self, length: int) -> Optional[int]:
+        lengths = _lengths(self.iterables)
+        if lengths is None:
+            return None
+        return max((length, *lengths)) if self.longest else min((length, *lengths))
+
+
+class Slide(PlanNode):
+    __slots__ = ('window', 'overlap', 'pad')
+
+    def __init__(self, window: int, overlap: int, pad: Any):
+        self.window = window
+        self.overlap = overlap
+        self.pad = pad
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        window, overlap, pad = self.window, self.overlap, self.pad
+        deque_window: deque[Any] = deque(maxlen=window)
+
+        def _window(internal_items: Iterable[Any]) -> Generator[Tuple[Any, ...], None, None]:
+            has_any_items = False
+
+            for item in internal_items:
+                has_any_items = True
+                if len(deque_window) == window:
+                    # make room for new items (leave 'overlap' items in the window)
+                    for _ in range(window - overlap):
+                        deque_window.popleft()
+                # insert new items to the window
+                deque_window.append(item)
+                if len(deque_window) == window:
+                    yield tuple(deque_window)
+
+            if not has_any_items or len(deque_window) == window:
+                # last window contained the last item, no need for another window
+                return
+
+            # another window needed, pad with 'fill'
+            while len(deque_window) < window:
+                deque_window.append(pad)
+            yield tuple(deque_window)
+
+        return _window(items)
+
+    def length(self, length: int) -> Optional[int]:
+        step = self.window - self.overlap
+        if self.window <= 0 or step <= 0:
+            return None
+        if length <= self.window:
+            return 1 if length > 0 else 0
+        # first window, and then a window for every `step` elements (last one may be padded)
+        return 1 + -(-(length - self.window) // step)
+
+
+class Append(PlanNode):
+    __slots__ = ('items',)
+
+    def __init__(self, items: Iterable[Any]):
+        self.items = items
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return chain(items, self.items)
+
+    def length(self, length: int) -> Optional[int]:
+        lengths = _lengths([self.items])
+        return None if lengths is None else length + lengths[0]
+
+
+class Prepend(PlanNode):
+    __slots__ = ('items',)
+
+    def __init__(self, items: Iterable[Any]):
+        self.items = items
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return chain(self.items, items)
+
+    def length(self, length: int) -> Optional[int]:
+        lengths = _lengths([self.items])
+        return None if lengths is None else length + lengths[0]
+
+
+class GroupBy(PlanNode):
+    __slots__ = ('key',)
+
+    def __init__(self, key: Union[str, Callable[[Any], Any]]):
+        self.key = key
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return group_by(items, self.key).values()
+
+
+class ConsecutiveGroupBy(GroupBy):
+    """
+    Group by over elements sorted by the grouping key, where elements of the same group are
+    adjacent. Groups are yielded as soon as they end, without holding all of them.
+    """
+    __slots__ = ()
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        return map(list, map(itemgetter(1), groupby(items, _key_selector(self.key))))
+
+
+class Top(PlanNode):
+    __slots__ = ('n', 'by')
+
+    def __init__(self, n: int, by: Optional[Callable[[Any], Any]]):
+        self.n = n
+        self.by = by
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        n, by = self.n, self.by
+        if n <= 0:
+            return []
+
+        # heap holds tuples of (value, item), where value is either a numeric value
+        # from the selector or the item itself if no selector is provided
+        heap: List[Tuple[Any, Any]] = []
+        for item in items:
+            value = item if by is None else by(item)
+            if len(heap) < n:
+                heapq.heappush(heap, (value, item))
+            else:
+                heapq.heappushpop(heap, (value, item))
+
+        return [heap_pair[1] for heap_pair in sorted(heap, reverse=True)]
+
+    def length(self, length: int) -> Optional[int]:
+        return max(0, min(length, self.n))
+
+    def properties(self, properties: Properties) -> Properties:
+        return Properties(True, self.by, False, properties.unique)
+
+
+class MostCommon(PlanNode):
+    __slots__ = ('n',)
+
+    def __init__(self, n: int):
+        self.n = n
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        n = self.n
+        top_counts = Counter(items).most_common(n)
+        if len(top_counts) < n:
+            raise NotEnoughElementsException(f"Found {len(top_counts)} items, expected {n}")
+        return [item for item, count in top_counts]
+
+    def properties(self, properties: Properties) -> Properties:
+        return Properties(unique=True)
+
+
+class Flatten(PlanNode):
+    __slots__ = ('max_depth', 'ignore_types')
+
+    def __init__(self, max_depth: Optional[int], ignore_types: Optional[Tuple[Type[Any], ...]]):
+        self.max_depth = max_depth
+        self.ignore_types = ignore_types
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        max_depth, ignore_types = self.max_depth, self.ignore_types
+
+        def _flatten(iterable: Iterable[Any], current_depth: int) -> Iterable[Any]:
+            for item in iterable:
+                type_ignored = ignore_types is not None and isinstance(item, ignore_types)
+                single_char_byte = isinstance(item, (str, bytes)) and len(item) == 1
+                if not single_char_byte and isinstance(item, Iterable) and not type_ignored:
+                    if max_depth is None or current_depth < max_depth:
+                        yield from _flatten(item, current_depth + 1)
+                    else:
+                        yield item
+                else:
+                    yield item
+
+        return _flatten(items, 0)
+
+
+class Interleave(PlanNode):
+    __slots__ = ('iterables',)
+
+    def __init__(self, iterables: Tuple[Iterable[Any], ...]):
+        self.iterables = iterables
+
+    def lower(self, items: Iterable[Any]) -> Iterable[Any]:
+        sentinel = object()
+        zipped = zip_longest(items, *self.iterables, fillvalue=sentinel)
+        flattened_items = chain.from_iterable(zipped)
+        return filter(lambda x: x is not sentinel, flattened_items)
+
+    def length(self, length: int) -> Optional[int]:
+        lengths = _lengths(self.iterables)
+        return None if lengths is None else length + sum(lengths)
+
+
+def group_by(items: Iterable[Any],
+             key: Union[str, Callable[[Any], Any]],
+             groups: Optional[Dict[Any, Any]] = None,
+             combine: Optional[Callable[[Any, Any], Any]] = None) -> Dict[Any, Any]:
+    """
+    Groups the items by the given key, into the given groups (a defaultdict of lists, if provided,
+    e.g., for grouping in batches). In case `combine` is given, the elements of every group are
+    combined (left to right) into a single value, instead of being listed.
+    """
+    if groups is None:
+        groups = defaultdict(list) if combine is None else {}
+    key_selector = _key_selector(key)
+    if combine is None:
+        for item in items:
+            group_key = key_selector(item)
+            groups[group_key].append(item)
+    else:
+        for item in items:
+            group_key = key_selector(item)
+            groups[group_key] = combine(groups[group_key], item) if group_key in groups else item
+    return groups
+
+
+def merge_groups(partial_groups: Iterable[Dict[Any, Any]],
+                 combine: Optional[Callable[[Any, Any], Any]] = None) -> Dict[Any, Any]:
+    """
+    Merges groups (of consecutive parts of the same items), in order, into a single dictionary.
+    Lists of elements are concatenated, or combined values combined again (so `combine` must be
+    associative).
+    """
+    groups: Dict[Any, Any] = {}
+    for part in partial_groups:
+        for group_key, value in part.items():
+            if group_key not in groups:
+                groups[group_key] = value
+            elif combine is None:
+                groups[group_key].extend(value)
+            else:
+                groups[group_key] = combine(groups[group_key], value)
+    return groups
+
+
+def counted(items: Iterable[Any]) -> List[int]:
+    """
+    Returns a list of the number of items (e.g., for counting chunks of the same items).
+    """
+    return [sum(1 for _ in items)]
+
+
+def reduced(items: Iterable[Any],
+            function: Callable[[Any, Any], Any],
+            initial: Any = MISSING) -> List[Any]:
+    """
+    Reduces the items (left to right) with the function, starting from `initial` (if given).
+    Returns a list of the single result, or an empty list in case there is nothing to reduce
+    (e.g., for reducing chunks of the same items, some of which may be empty).
+    """
+    # `initial` may have been pickled, so it is checked by type
+    if not isinstance(initial, Missing):
+        return [reduce(function, items, initial)]
+    iterator = iter(items)
+    first = next(iterator, MISSING)
+    if first is MISSING:
+        return []
+    return [reduce(function, iterator, first)]
+
+
+def summed(items: Iterable[Any]) -> List[Any]:
+    """
+    Returns a list of the sum of the items (or an empty list, in case there are none), using the
+    builtin `sum` (e.g., for summing chunks of the same items).
+    """
+    iterator = iter(items)
+    first = next(iterator, MISSING)
+    if first is MISSING:
+        return []
+    return [sum(iterator, start=first)]
+
+
+def extremum(items: Iterable[Any],
+             function: Callable[..., Any],
+             by: Optional[Callable[[Any], Any]]) -> List[Any]:
+    """
+    Returns a list of the minimal (or maximal, by the given builtin `min` or `max`) element, or an
+    empty list in case there are no items.
+    """
+    value = function(items, key=by, default=MISSING)
+    return [] if value is MISSING else [value]
+
+
+def _key_selector(key: Union[str, Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    if callable(key):
+        return key
+    # key is a string
+    return attrgetter(key)
+
+
+def _unique(properties: Properties) -> Properties:
+    return Properties(properties.is_sorted, properties.by, properties.ascending, unique=True)
+
+
+def _lengths(iterables: Iterable[Iterable[Any]]) -> Optional[List[int]]:
+    """
+    Returns the lengths of the given iterables, or None in case any of them is not sized.
+    """
+    lengths = []
+    for iterable in iterables:
+        if not isinstance(iterable, collections.abc.Sized):
+            return None
+        lengths.append(len(iterable))
+    return lengths
+
+
+def length(source: Iterable[Any], plan: List[PlanNode]) -> Optional[int]:
+    """
+    Returns the number of elements the plan yields on top of the source, without iterating.
+    Returns None in case it is unknown.
+    """
+    if not isinstance(source, collections.abc.Sized):
+        return None
+    result = len(source)
+    for node in plan:
+        node_length = node.length(result)
+        if node_length is None:
+            return None
+        result = node_length
+    return result
+
+
+def properties(source: Properties, plan: List[PlanNode]) -> Properties:
+    """
+    Returns the properties of the elements the plan yields on top of a source with the given
+    properties.
+    """
+    result = source
+    for node in plan:
+        result = node.properties(result)
+    return result
+
+
+def lower(source: Iterable[Any],
+          plan: List[PlanNode],
+          budget: Optional[_cancellation.Budget] = None) -> Iterable[Any]:
+    """
+    Lowers a plan into a (lazy) iterable, by stacking its operators on top of the source.
+    Given a budget, the source and the output of every operator are read through a checkpoint
+    (see `cancellation`), besides element-wise ones (which read their checked input for every
+    element they yield, so a slow consumer is checked as well).
+    """
+    if budget is None:
+        items = source
+        for node in plan:
+            items = node.lower(items)
+        return items
+    items = _cancellation.checked(source, budget)
+    for node in plan:
+        items = node.lower(items)
+        if not isinstance(node, (ElementWise, Fused)):
+            items = _cancellation.checkpoint(items, budget, owned=True)
+    return items
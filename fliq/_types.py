@@ -1,4 +1,4 @@
-from typing import TypeVar, Union, Optional, Callable
+from typing import TypeVar, Union, Optional, Callable, Awaitable
 
 
 class Missing:
@@ -19,3 +19,8 @@ Selector = Callable[[T], U]
 
 NumericSelector = Selector[T, Union[int, float]]
 IndexSelector = Selector[T, int]
+
+# async functionality accepts both sync and async callables
+AsyncPredicate = Callable[[T], Union[bool, Awaitable[bool]]]
+AsyncSelector = Callable[[T], Union[U, Awaitable[U]]]
+AsyncNumericSelector = AsyncSelector[T, Union[int, float]]
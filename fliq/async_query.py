@@ -0,0 +1,518 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from inspect import isawaitable
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Generic, Iterable, \
+    List, Optional, Sequence, Tuple, Union
+
+from fliq._parallel import _DONE, _Failure
+from fliq._types import T, U, MISSING, MissingOrOptional, AsyncPredicate, AsyncSelector, \
+    AsyncNumericSelector
+from fliq.exceptions import QueryIsUnexpectedlyEmptyException
+
+
+class AsyncQuery(Generic[T], AsyncIterable[T]):
+    """
+    A query over an async iterable (e.g., an async generator, or a stream of messages).
+    Elements are awaited one at a time, so the event loop is never blocked waiting for the source.
+
+    Callables given to the query (predicates and selectors) may be either plain functions or
+    coroutine functions (in which case, their results are awaited).
+    Mappers are lazy, and materializers are coroutines that must be awaited.
+
+    Examples:
+        >>> import asyncio
+        >>> from fliq import q
+        >>> async def numbers():
+        ...     for i in range(10):
+        ...         yield i
+        >>> asyncio.run(q.aio(numbers()).where(lambda x: x % 2 == 0).select(str).to_list())
+        ['0', '2', '4', '6', '8']
+    """
+
+    def __init__(self, iterable: Union[AsyncIterable[T], Iterable[T]]):
+        """
+        Create an AsyncQuery object to allow fluent processing of async iterables.
+        Sync iterables are accepted as well, and are iterated as is.
+
+        Args:
+            iterable: The async (or sync) iterable to query.
+        """
+        self._items: AsyncIterator[Any] = _aiter(iterable)
+
+    def __aiter__(self) -> AsyncQuery[T]:
+        return self
+
+    async def __anext__(self) -> T:
+        return await self._items.__anext__()  # type: ignore # (items are of type T)
+
+    def _self(self, items: AsyncIterator[Any]) -> AsyncQuery[Any]:
+        self._items = items
+        return self
+
+    # region Mappers
+
+    def where(self,
+              predicate: Optional[AsyncPredicate[T]] = None,
+              concurrency: Optional[int] = None,
+              ordered: bool = True) -> AsyncQuery[T]:
+        """
+        Yields elements that satisfy the predicate (aka filter).
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> async def is_even(x):
+            ...     return x % 2 == 0
+            >>> asyncio.run(q.aio(range(10)).where(is_even).to_list())
+            [0, 2, 4, 6, 8]
+
+        Args:
+            predicate: Optional. The predicate (sync or async) to filter the query by.
+                If None is given, no filtering takes place.
+            concurrency: Optional. The maximal number of predicate calls awaited concurrently.
+                Defaults to None (one at a time).
+            ordered: Optional. Whether to yield the elements in their original order, relevant
+                only when `concurrency` is given. Defaults to True.
+
+        Raises:
+            ValueError: In case concurrency is not positive.
+        """
+        if predicate is None:
+            return self
+        if concurrency is not None:
+            return self._self(_concurrent_where(self._items, predicate, concurrency, ordered))
+
+        async def _where(items: AsyncIterator[Any]) -> AsyncIterator[Any]:
+            async for item in items:
+                result = predicate(item)
+                if isawaitable(result):
+                    result = await result
+                if result:
+                    yield item
+
+        return self._self(_where(self._items))
+
+    def select(self,
+               selector: AsyncSelector[T, U],
+               concurrency: Optional[int] = None,
+               ordered: bool = True) -> AsyncQuery[U]:
+        """
+        Yields the result of applying the selector function to each element (aka map).
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> async def double(x):
+            ...     return x * 2
+            >>> asyncio.run(q.aio(range(5)).select(double, concurrency=2).to_list())
+            [0, 2, 4, 6, 8]
+
+        Args:
+            selector: The selector function (sync or async) to apply to each element.
+            concurrency: Optional. The maximal number of selector calls awaited concurrently.
+                Defaults to None (one at a time).
+            ordered: Optional. Whether to yield the results in the original order, relevant
+                only when `concurrency` is given. Defaults to True.
+
+        Raises:
+            ValueError: In case concurrency is not positive.
+        """
+        if concurrency is not None:
+            return self._self(_concurrent_select(self._items, selector, concurrency, ordered))
+
+        async def _select(items: AsyncIterator[Any]) -> AsyncIterator[Any]:
+            async for item in items:
+                result = selector(item)
+                if isawaitable(result):
+                    result = await result
+                yield result
+
+        return self._self(_select(self._items))
+
+    def distinct(self) -> AsyncQuery[T]:
+        """
+        Yields distinct elements, preserving their original order.
+        Elements must be hashable.
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> asyncio.run(q.aio([0, 1, 1, 2, 0]).distinct().to_list())
+            [0, 1, 2]
+        """
+
+        async def _distinct(items: AsyncIterator[Any]) -> AsyncIterator[Any]:
+            seen = set()
+            async for item in items:
+                if item not in seen:
+                    seen.add(item)
+                    yield item
+
+        return self._self(_distinct(self._items))
+
+    def take(self, n: int = 1, predicate: Optional[AsyncPredicate[T]] = None) -> AsyncQuery[T]:
+        """
+        Yields up to n items that satisfy the predicate (if provided).
+        The source is not iterated beyond the n-th element.
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> asyncio.run(q.aio(range(10)).take(3).to_list())
+            [0, 1, 2]
+            >>> asyncio.run(q.aio(range(10)).take(2, lambda x: x > 5).to_list())
+            [6, 7]
+
+        Args:
+            n: Optional. The number of elements to take. Defaults to 1.
+            predicate: Optional. The predicate (sync or async) to filter the query by.
+
+        Raises:
+            ValueError: In case n is negative.
+        """
+        if n < 0:
+            raise ValueError(f"n must be non-negative, got {n}")
+
+        async def _take(items: AsyncIterator[Any]) -> AsyncIterator[Any]:
+            if n == 0:
+                return
+            taken = 0
+            async for item in items:
+                yield item
+                taken += 1
+                if taken == n:
+                    # the source is not iterated any further
+                    await _aclose(items)
+                    return
+
+        query = self.where(predicate)
+        return query._self(_take(query._items))
+
+    def slide(self,
+              window: int,
+              overlap: int,
+              pad: Optional[T] = None) -> AsyncQuery[Tuple[T, ...]]:
+        """
+        Yields a sliding window over the query, the same way `Query.slide()` does.
+        These are tuples of size 'window', overlapping by 'overlap' elements.
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> asyncio.run(q.aio(range(5)).slide(window=3, overlap=1).to_list())
+            [(0, 1, 2), (2, 3, 4)]
+            >>> asyncio.run(q.aio(range(4)).slide(window=3, overlap=1, pad=-1).to_list())
+            [(0, 1, 2), (2, 3, -1)]
+
+        Args:
+            window: The size of the tuples to be returned.
+            overlap: The number of elements that should overlap between consecutive tuples.
+            pad: The value to use for padding the last window when the iterable is exhausted.
+        """
+
+        async def _slide(items: AsyncIterator[Any]) -> AsyncIterator[Tuple[Any, ...]]:
+            deque_window: deque[Any] = deque(maxlen=window)
+            has_any_items = False
+            async for item in items:
+                has_any_items = True
+                if len(deque_window) == window:
+                    # make room for new items (leave 'overlap' items in the window)
+                    for _ in range(window - overlap):
+                        deque_window.popleft()
+                deque_window.append(item)
+                if len(deque_window) == window:
+                    yield tuple(deque_window)
+
+            if not has_any_items or len(deque_window) == window:
+                # last window contained the last item, no need for another window
+                return
+
+            while len(deque_window) < window:
+                deque_window.append(pad)
+            yield tuple(deque_window)
+
+        return self._self(_slide(self._items))
+
+    def interleave(self,
+                   *iterables: Union[AsyncIterable[U], Iterable[U]],
+                   weights: Optional[Sequence[int]] = None,
+                   buffer: int = 1) -> AsyncQuery[Union[T, U]]:
+        """
+        Merges the elements of the query with the elements of the provided (async) iterables, as
+        they become ready (aka fan-in). A slow source does not stall the others: every source is
+        iterated concurrently, into a buffer of its own.
+        Ready sources are served in turns (the query first), each yielding up to its weight in
+        elements per turn. The elements of each source keep their order.
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> async def merged():
+            ...     return await q.aio([1, 2, 3]).interleave([4, 5, 6]).to_list()
+            >>> sorted(asyncio.run(merged()))
+            [1, 2, 3, 4, 5, 6]
+
+        Args:
+            *iterables: One or more async (or sync) iterables to merge with the query.
+            weights: Optional. The number of elements each source (the query, followed by the
+                iterables) may yield per turn, while ready. Defaults to 1 for every source.
+            buffer: Optional. The number of ready elements buffered per source. Defaults to 1.
+
+        Raises:
+            ValueError: In case the weights do not match the sources, or weights or buffer are
+                not positive.
+        """
+        sources = [self._items, *(_aiter(iterable) for iterable in iterables)]
+        if weights is None:
+            weights = [1] * len(sources)
+        if len(weights) != len(sources):
+            raise ValueError(f"Expected a weight for each of the {len(sources)} sources "
+                             f"(the query first), got {len(weights)}")
+        if any(weight < 1 for weight in weights):
+            raise ValueError(f"weights must be positive, got {list(weights)}")
+        if buffer < 1:
+            raise ValueError(f"buffer must be positive, got {buffer}")
+        return self._self(_merged(sources, weights, buffer))
+
+    # endregion
+
+    # region Materializers
+
+    async def first(self,
+                    predicate: Optional[AsyncPredicate[T]] = None,
+                    default: MissingOrOptional[T] = MISSING) -> Optional[T]:
+        """
+        Returns the first element in the query that satisfies the predicate (if provided),
+            or a default value if the query is empty.
+            If default is not provided, raises QueryIsUnexpectedlyEmptyException in case the query
+            is empty.
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> asyncio.run(q.aio(range(10)).first(lambda x: x > 3))
+            4
+            >>> asyncio.run(q.aio([]).first(default=-1))
+            -1
+
+        Args:
+            predicate: Optional. The predicate (sync or async) to filter the query by.
+            default: Optional. The default value to return in case the query is empty.
+                Defaults to raise an exception if the query is empty.
+
+        Raises:
+            QueryIsUnexpectedlyEmptyException: In case the query is empty.
+        """
+        async for item in self.where(predicate):
+            await _aclose(self._items)
+            return item
+        if default is MISSING:
+            raise QueryIsUnexpectedlyEmptyException()
+        return default  # type: ignore # default is not MISSING
+
+    async def to_list(self) -> List[T]:
+        """
+        Returns the elements of the query as a list.
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> async def numbers():
+            ...     for i in range(3):
+            ...         yield i
+            >>> asyncio.run(q.aio(numbers()).to_list())
+            [0, 1, 2]
+        """
+        return [item async for item in self]
+
+    async def sum(self,
+                  by: Optional[AsyncNumericSelector[T]] = None,
+                  accumulator: Union[int, float] = 0) -> Union[int, float]:
+        """
+        Returns the sum of the elements in the query.
+        If a selector is provided, the sum of the selected elements is returned.
+        If an accumulator is provided, it is used as the initial value for the summation.
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> asyncio.run(q.aio(range(5)).sum())
+            10
+            >>> asyncio.run(q.aio(range(5)).sum(by=lambda x: x * 2, accumulator=1))
+            21
+
+        Args:
+            by: Optional. The selector function (sync or async) to apply to each element.
+            accumulator: Optional. The initial value of the sum. Defaults to 0.
+        """
+        query = self
+        if by is not None:
+            query = self.select(by)  # type: ignore # (here `by` is subtype of select `by`)
+        async for item in query:
+            accumulator += item  # type: ignore # (query type is okay)
+        return accumulator
+
+    # endregion
+
+
+def _concurrent_select(items: AsyncIterator[Any],
+                       selector: Callable[[Any], Any],
+                       concurrency: int,
+                       ordered: bool) -> AsyncIterator[Any]:
+    _validate_concurrency(concurrency)
+
+    async def _select() -> AsyncIterator[Any]:
+        async for _, result in _concurrent_results(items, selector, concurrency, ordered):
+            yield result
+
+    return _select()
+
+
+def _concurrent_where(items: AsyncIterator[Any],
+                      predicate: Callable[[Any], Any],
+                      concurrency: int,
+                      ordered: bool) -> AsyncIterator[Any]:
+    _validate_concurrency(concurrency)
+
+    async def _where() -> AsyncIterator[Any]:
+        async for item, result in _concurrent_results(items, predicate, concurrency, ordered):
+            if result:
+                yield item
+
+    return _where()
+
+
+async def _merged(sources: List[AsyncIterator[Any]],
+                  weights: Sequence[int],
+                  buffer: int) -> AsyncIterator[Any]:
+    """
+    Yields the elements of all sources, as they become ready. Every source is pumped by a task of
+    its own into a bounded queue, and ready queues are served in (weighted) turns.
+    Pumping tasks are started on the first element pulled, and cancelled once the iterator is
+    closed (e.g., the consumer stops iterating), or a source raises.
+    """
+    queues: List[asyncio.Queue[Any]] = [asyncio.Queue(buffer) for _ in sources]
+    ready = asyncio.Event()
+
+    async def _pump(source: AsyncIterator[Any], queue: asyncio.Queue[Any]) -> None:
+        try:
+            async for item in source:
+                await queue.put(item)
+                ready.set()
+            await queue.put(_DONE)
+        except Exception as e:
+            await queue.put(_Failure(e))
+        ready.set()
+
+    pumps = [asyncio.ensure_future(_pump(source, queue)) for source, queue in zip(sources, queues)]
+    try:
+        turns = deque(range(len(sources)))
+        # consecutive turns without any ready element
+        idle = 0
+        while turns:
+            i = turns[0]
+            queue = queues[i]
+            taken = 0
+            exhausted = False
+            while taken < weights[i] and not queue.empty():
+                item = queue.get_nowait()
+                if item is _DONE:
+                    exhausted = True
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                taken += 1
+                yield item
+            if exhausted:
+                turns.popleft()
+                idle = 0
+                continue
+            turns.rotate(-1)
+            idle = 0 if taken else idle + 1
+            if idle >= len(turns):
+                # no source is ready, wait for any of them
+                ready.clear()
+                if all(queues[j].empty() for j in turns):
+                    await ready.wait()
+                idle = 0
+    finally:
+        for pump in pumps:
+            pump.cancel()
+        await asyncio.gather(*pumps, return_exceptions=True)
+
+
+def _validate_concurrency(concurrency: int) -> None:
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be positive, got {concurrency}")
+
+
+async def _concurrent_results(items: AsyncIterator[Any],
+                              function: Callable[[Any], Any],
+                              concurrency: int,
+                              ordered: bool) -> AsyncIterator[Tuple[Any, Any]]:
+    """
+    Yields pairs of every item and the (awaited) result of the function applied on it, running up
+    to `concurrency` calls as concurrent tasks. Items are pulled from the source only as tasks
+    complete, so at most `concurrency` tasks (and items) are kept at any time.
+    Pending tasks are cancelled once the iterator is closed (e.g., the consumer stops iterating),
+    or a call raises.
+    """
+    # tasks are kept in the order of their items (dicts preserve insertion order)
+    in_flight: Dict[asyncio.Future[Any], Any] = {}
+    exhausted = False
+
+    async def _fill() -> None:
+        nonlocal exhausted
+        while not exhausted and len(in_flight) < concurrency:
+            try:
+                item = await items.__anext__()
+            except StopAsyncIteration:
+                exhausted = True
+            else:
+                in_flight[asyncio.ensure_future(_call(function, item))] = item
+
+    try:
+        await _fill()
+        while in_flight:
+            if ordered:
+                task = next(iter(in_flight))
+                if not task.done():
+                    await asyncio.wait((task,))
+            else:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                task = next(task for task in in_flight if task in done)
+            item = in_flight.pop(task)
+            # refill before yielding, so the window stays full while the consumer is busy
+            await _fill()
+            yield item, task.result()
+    finally:
+        for task in in_flight:
+            task.cancel()
+        if in_flight:
+            await asyncio.wait(in_flight)
+
+
+async def _call(function: Callable[[Any], Any], item: Any) -> Any:
+    result = function(item)
+    if isawaitable(result):
+        result = await result
+    return result
+
+
+def _aiter(iterable: Union[AsyncIterable[Any], Iterable[Any]]) -> AsyncIterator[Any]:
+    if isinstance(iterable, AsyncIterable):
+        return iterable.__aiter__()
+    return _from_sync(iterable)
+
+
+async def _from_sync(iterable: Iterable[Any]) -> AsyncIterator[Any]:
+    for item in iterable:
+        yield item
+
+
+async def _aclose(items: AsyncIterator[Any]) -> None:
+    aclose = getattr(items, 'aclose', None)
+    if aclose is not None:
+        await aclose()
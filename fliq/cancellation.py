@@ -0,0 +1,205 @@
+"""
+Cooperative cancellation of queries, by a deadline or by a cancel token (see `with_deadline()`
+and `with_cancel()`).
+
+Once a query has a budget, its source and the output of every stage of its plan are read through
+a checkpoint, which checks the budget every so often. Checks are spaced adaptively: the interval
+(in elements) doubles while checks are less than a millisecond apart, and halves otherwise, so
+fast stages check about once a millisecond, and slow ones on every element.
+Queries without a budget are lowered as is, without any checkpoints.
+"""
+from __future__ import annotations
+
+import collections.abc
+from itertools import chain, islice
+from time import monotonic
+from typing import Any, Iterable, Iterator, Optional, Sequence, Tuple
+
+from fliq.exceptions import QueryCancelledException
+
+# seconds between checks of a budget, below which the interval (in elements) is doubled
+_CHECK_PERIOD = 0.001
+
+# elements between checks of a budget, at most
+_MAX_INTERVAL = 4096
+
+
+class CancelToken:
+    """
+    A token for cancelling queries (see `Query.with_cancel()`), possibly from another thread.
+    Once cancelled, queries holding the token raise `QueryCancelledException` at their next check.
+
+    Examples:
+        >>> from fliq import q, CancelToken
+        >>> token = CancelToken()
+        >>> query = q(range(10)).with_cancel(token).select(lambda x: x * 2)
+        >>> next(query)
+        0
+        >>> token.cancel()
+        >>> query.to_list()
+        Traceback (most recent call last):
+        ...
+        fliq.exceptions.QueryCancelledException: Query was cancelled
+    """
+    __slots__ = ('_cancelled',)
+
+    def __init__(self) -> None:
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """
+        Cancels the queries holding the token.
+        """
+        self._cancelled = True
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        Whether the token was cancelled.
+        """
+        return self._cancelled
+
+    def __repr__(self) -> str:
+        return f"CancelToken(cancelled={self._cancelled})"
+
+
+class Budget:
+    """
+    The budget of a query: a deadline (in `time.monotonic()` seconds) and cancel tokens.
+    """
+    __slots__ = ('deadline', 'tokens')
+
+    def __init__(self, deadline: Optional[float] = None, tokens: Tuple[CancelToken, ...] = ()):
+        self.deadline = deadline
+        self.tokens = tokens
+
+    def until(self, deadline: float) -> Budget:
+        """
+        Returns a budget ending at the given deadline, or at the current one if earlier.
+        """
+        if self.deadline is not None:
+            deadline = min(deadline, self.deadline)
+        return Budget(deadline, self.tokens)
+
+    def cancelled_by(self, token: CancelToken) -> Budget:
+        """
+        Returns a budget also cancelled by the given token.
+        """
+        return Budget(self.deadline, (*self.tokens, token))
+
+    def check(self, now: float) -> None:
+        """
+        Raises:
+            QueryCancelledException: In case a token was cancelled, or the deadline has passed.
+        """
+        for token in self.tokens:
+            if token.cancelled:
+                raise QueryCancelledException("Query was cancelled")
+        if self.deadline is not None and now >= self.deadline:
+            raise QueryCancelledException("Query exceeded its deadline")
+
+
+class Checkpoint:
+    """
+    Yields the items, while checking the budget every so often (see module docs).
+    Once the budget is exceeded, the iterator of the items is closed (if `owned`, e.g., a stage
+    executing on workers, which are then shut down), rather than kept alive by the traceback.
+    """
+    __slots__ = ('items', 'budget', 'owned')
+
+    def __init__(self, items: Iterable[Any], budget: Budget, owned: bool = False):
+        self.items = items
+        self.budget = budget
+        self.owned = owned
+
+    def __iter__(self) -> Iterator[Any]:
+        # elements flow through (C level) slices of the iterator, the budget is checked once per
+        # slice, before the next one is taken
+        segments = _Segments(iter(self.items), self.budget, self.owned)
+        return chain.from_iterable(iter(segments.next, _END))
+
+
+class SizedCheckpoint(Checkpoint):
+    """
+    A checkpoint of sized items (e.g., a set), keeping their size known.
+    """
+    __slots__ = ()
+
+    def __len__(self) -> int:
+        return len(self.items)  # type: ignore # (items are sized)
+
+
+class SequenceCheckpoint(SizedCheckpoint, Sequence[Any]):
+    """
+    A checkpoint of a sequence (e.g., a sorted list), keeping its elements accessible by index
+    (without checks), for materializers exploiting it (e.g., `count()` or `max()`).
+    """
+    __slots__ = ()
+
+    def __getitem__(self, index: Any) -> Any:
+        return self.items[index]  # type: ignore # (items are a sequence)
+
+
+def checkpoint(items: Iterable[Any], budget: Budget, owned: bool = False) -> Checkpoint:
+    """
+    Returns the items read through a checkpoint of the budget (keeping them sized, or a sequence).
+    """
+    if isinstance(items, collections.abc.Sequence):
+        return SequenceCheckpoint(items, budget, owned)
+    if isinstance(items, collections.abc.Sized):
+        return SizedCheckpoint(items, budget, owned)
+    return Checkpoint(items, budget, owned)
+
+
+class _Segments:
+    """
+    Slices of an iterator, alternating between an element read ahead (after which the budget is
+    checked, or _END once the iterator is exhausted) and a slice of the elements following it.
+    """
+    __slots__ = ('iterator', 'budget', 'owned', 'interval', 'last', 'read_ahead')
+
+    def __init__(self, iterator: Iterator[Any], budget: Budget, owned: bool):
+        self.iterator = iterator
+        self.budget = budget
+        self.owned = owned
+        self.interval = 1
+        self.last = monotonic()
+        self.read_ahead = False
+        budget.check(self.last)
+
+    def next(self) -> Any:
+        """
+        Returns the next slice of the items, or _END.
+        """
+        if self.read_ahead:
+            self.read_ahead = False
+            return islice(self.iterator, self.interval - 1)
+        item = next(self.iterator, _END)
+        if item is _END:
+            return _END
+        now = monotonic()
+        try:
+            self.budget.check(now)
+        except QueryCancelledException:
+            if self.owned and hasattr(self.iterator, 'close'):
+                self.iterator.close()
+            raise
+        if now - self.last < _CHECK_PERIOD:
+            self.interval = min(self.interval * 2, _MAX_INTERVAL)
+        elif self.interval > 1:
+            self.interval //= 2
+        self.last = now
+        self.read_ahead = True
+        return (item,)
+
+
+_END: Any = object()
+
+
+def checked(source: Iterable[Any], budget: Budget) -> Iterable[Any]:
+    """
+    Returns the source read through a checkpoint of the budget (unless it already is).
+    """
+    if isinstance(source, Checkpoint) and source.budget is budget:
+        return source
+    return checkpoint(source, budget)
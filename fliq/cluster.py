@@ -0,0 +1,605 @@
+"""
+Distributed execution of element-wise operators (where, exclude, select) on worker processes,
+reached over `multiprocessing.connection` (e.g., on other machines, or spawned on localhost).
+
+The source is partitioned (in the consuming process) into chunks, either consecutive ones
+(round-robin over the workers) or by a partition index (every worker receiving its own partition).
+The operators (the pipeline) are pickled once and sent to every worker, followed by the chunks,
+of which only a bounded window is in flight per worker. Workers send back the processed chunks
+(or their partial reductions, e.g., partial sums), which are gathered in order, or as they
+complete. Chunks in flight on a worker that is lost (e.g., its process died) are re-dispatched
+to the other workers.
+
+Workers are started with `serve()` (e.g., `python -m fliq.cluster localhost:6000`, reading the
+authentication key from the `FLIQ_CLUSTER_AUTHKEY` environment variable), or with
+`Cluster.local()`.
+"""
+from __future__ import annotations
+
+import heapq
+import multiprocessing
+import os
+import pickle
+import sys
+from collections import deque
+from functools import partial
+from itertools import count, islice
+from multiprocessing.connection import Client, Connection, Listener, wait
+from types import TracebackType
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, \
+    Tuple, Type, Union
+
+from fliq import _codegen, _parallel
+
+Address = Union[str, Tuple[str, int]]
+
+# chunks in flight, per worker
+_WINDOW_PER_WORKER = 2
+
+# seconds to wait for a local worker to exit, once the cluster is closed
+_SHUTDOWN_TIMEOUT = 1.0
+
+
+class Cluster:
+    """
+    A set of worker processes, executing the element-wise mappers following `distributed()`
+    (and the partial reductions of `sum()`, `count()`, `to_dict()` and others) on chunks of the
+    elements sent to them.
+
+    Workers are reached by their addresses (see `serve()`), or spawned on localhost with
+    `Cluster.local()`. Connections are opened on first use, and closed by `close()` (which also
+    stops local workers). Used as a context manager, the cluster is closed on exit.
+    A cluster runs a single query at a time.
+
+    Examples:
+        >>> from fliq import q, Cluster
+        >>> with Cluster.local(workers=2) as cluster:
+        ...     q(range(10)).distributed(cluster, chunksize=3).select(abs).sum()
+        45
+
+    Notes:
+        Workers unpickle the pipelines and chunks they receive, so they should only be reachable
+        by trusted clients (which know the authentication key).
+    """
+
+    def __init__(self, addresses: Sequence[Address], authkey: bytes):
+        """
+        Create a cluster of the workers serving at the given addresses.
+
+        Args:
+            addresses: The addresses of the workers (e.g., `('10.0.0.7', 6000)`).
+            authkey: The authentication key the workers were started with.
+
+        Raises:
+            ValueError: In case no addresses are given.
+        """
+        if not addresses:
+            raise ValueError("A cluster requires at least one worker address")
+        self.addresses: List[Address] = list(addresses)
+        self._authkey = authkey
+        # connections by worker, None for workers that are not connected (or were lost)
+        self._connections: List[Optional[Connection]] = [None] * len(self.addresses)
+        self._processes: List[multiprocessing.process.BaseProcess] = []
+        self._chunk_ids = count()
+
+    @staticmethod
+    def local(workers: Optional[int] = None) -> Cluster:
+        """
+        Spawns worker processes on localhost (with a random authentication key), and returns
+        a cluster of them. The workers are stopped once the cluster is closed.
+
+        Args:
+            workers: Optional. The number of worker processes. Defaults to the number of CPUs.
+
+        Raises:
+            ValueError: In case workers is not positive.
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError(f"workers must be positive, got {workers}")
+        authkey = os.urandom(32)
+        processes: List[multiprocessing.process.BaseProcess] = []
+        addresses = []
+        for _ in range(workers):
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_serve_local, args=(sender, authkey),
+                                              daemon=True)
+            process.start()
+            sender.close()
+            addresses.append(receiver.recv())
+            receiver.close()
+            processes.append(process)
+        cluster = Cluster(addresses, authkey)
+        cluster._processes = processes
+        return cluster
+
+    @property
+    def workers(self) -> int:
+        """
+        The number of workers in the cluster (including lost ones).
+        """
+        return len(self.addresses)
+
+    def close(self) -> None:
+        """
+        Closes the connections to the workers, and stops the local workers (if spawned by
+        `local()`). Remote workers keep serving other clients.
+        """
+        for i, connection in enumerate(self._connections):
+            if connection is None:
+                continue
+            if self._processes:
+                try:
+                    connection.send(('shutdown',))
+                except OSError:
+                    pass  # already lost
+            connection.close()
+            self._connections[i] = None
+        for process in self._processes:
+            process.join(_SHUTDOWN_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._processes = []
+
+    def __enter__(self) -> Cluster:
+        return self
+
+    def __exit__(self,
+                 exc_type: Optional[Type[BaseException]],
+                 exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self.close()
+
+    def _connect(self) -> Dict[int, Connection]:
+        """
+        Returns the connections to the reachable workers (by worker), connecting to workers not
+        connected yet.
+
+        Raises:
+            ConnectionError: In case no worker is reachable.
+        """
+        for i, address in enumerate(self.addresses):
+            if self._connections[i] is None:
+                try:
+                    self._connections[i] = Client(address, authkey=self._authkey)
+                except OSError:
+                    pass  # unreachable, retried by the next query
+        connections = {i: connection for i, connection in enumerate(self._connections)
+                       if connection is not None}
+        if not connections:
+            raise ConnectionError(f"No worker of the cluster is reachable at {self.addresses}")
+        return connections
+
+    def _lose(self, worker: int) -> None:
+        connection = self._connections[worker]
+        if connection is not None:
+            connection.close()
+            self._connections[worker] = None
+
+    def __repr__(self) -> str:
+        return f"Cluster({self.addresses!r})"
+
+
+class _Chunk:
+    """
+    A chunk of elements, sent to a worker. `first` is the position of its first element in the
+    source (for merging partitions in order).
+    """
+    __slots__ = ('id', 'items', 'first', 'worker')
+
+    def __init__(self, chunk_id: int, items: List[Any], first: int, worker: Optional[int]):
+        self.id = chunk_id
+        self.items = items
+        self.first = first
+        self.worker = worker
+
+
+class _Partitioner:
+    """
+    Splits the items into chunks: consecutive ones (for any worker), or by the partition index of
+    every element (for its worker), in which case elements can be paired with their position.
+    """
+
+    def __init__(self,
+                 items: Iterable[Any],
+                 by: Optional[Callable[[Any], int]],
+                 workers: int,
+                 chunksize: int,
+                 chunk_ids: Iterator[int],
+                 paired: bool):
+        self._items = iter(items)
+        self._by = by
+        self._paired = paired
+        self._workers = workers
+        self._chunksize = chunksize
+        self._chunk_ids = chunk_ids
+        self._position = 0
+        # elements of every partition, not sent yet (with the position of the first one)
+        self._buffers: List[List[Any]] = [[] for _ in range(workers)]
+        self._firsts: List[int] = [0] * workers
+        self._flushed: Deque[_Chunk] = deque()
+        self._read = False
+
+    @property
+    def position(self) -> int:
+        """
+        The position of the next element to read.
+        """
+        return self._position
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        Whether all chunks were returned.
+        """
+        return self._read and not self._flushed
+
+    def next_chunk(self) -> Optional[_Chunk]:
+        if self._by is None:
+            items = list(islice(self._items, self._chunksize))
+            if not items:
+                self._read = True
+                return None
+            chunk = _Chunk(next(self._chunk_ids), items, self._position, None)
+            self._position += len(items)
+            return chunk
+
+        while not self._flushed and not self._read:
+            item = next(self._items, _END)
+            if item is _END:
+                self._read = True
+                self._flush_all()
+                break
+            worker = self._by(item)
+            if not isinstance(worker, int):
+                raise TypeError(f"Partition index must be an integer, found `{worker!r}`")
+            if not 0 <= worker < self._workers:
+                raise ValueError(f"Partition index {worker} is not in range [0, {self._workers})")
+            buffer = self._buffers[worker]
+            if not buffer:
+                self._firsts[worker] = self._position
+            buffer.append((self._position, item) if self._paired else item)
+            self._position += 1
+            if len(buffer) == self._chunksize:
+                self._flush(worker)
+        return self._flushed.popleft() if self._flushed else None
+
+    def next_buffered_chunk(self, before: int) -> Optional[_Chunk]:
+        """
+        Returns a chunk of elements already read, without reading more: a flushed chunk, or the
+        partial buffer holding the first element not sent yet (if it is before the given position).
+        """
+        if not self._flushed:
+            firsts = [(self._firsts[i], i) for i, buffer in enumerate(self._buffers) if buffer]
+            if firsts and min(firsts)[0] < before:
+                self._flush(min(firsts)[1])
+        return self._flushed.popleft() if self._flushed else None
+
+    def pending_first(self) -> int:
+        """
+        Returns the first position of elements not sent yet (buffered, or not read).
+        """
+        firsts = [self._firsts[i] for i, buffer in enumerate(self._buffers) if buffer]
+        firsts.extend(chunk.first for chunk in self._flushed)
+        return min(firsts, default=self._position)
+
+    def _flush(self, worker: int) -> None:
+        self._flushed.append(_Chunk(next(self._chunk_ids), self._buffers[worker],
+                                    self._firsts[worker], worker))
+        self._buffers[worker] = []
+
+    def _flush_all(self) -> None:
+        for worker in sorted(range(self._workers), key=lambda i: self._firsts[i]):
+            if self._buffers[worker]:
+                self._flush(worker)
+
+
+_END = object()
+
+
+def scatter(cluster: Cluster,
+            items: Iterable[Any],
+            kinds: Tuple[str, ...],
+            functions: List[Callable[[Any], Any]],
+            reducer: Optional[Callable[[Iterable[Any]], Any]],
+            by: Optional[Callable[[Any], int]],
+            chunksize: int,
+            ordered: bool) -> Iterator[Any]:
+    """
+    Returns an iterator over the items, after applying the given kinds of operators with their
+    callables (in order) on the workers of the cluster, or over the results of the reducer applied
+    by the workers on every chunk (in the order of the chunks, in case of a reducer).
+
+    Raises:
+        TypeError: In case a callable cannot be pickled.
+        ConnectionError: In case no worker is reachable, or all workers were lost.
+    """
+    if reducer is not None:
+        return _gathered(cluster, items, kinds, functions, reducer, by, chunksize, ordered=True)
+    if by is not None and ordered:
+        # elements are paired with their position, to merge the partitions in order
+        functions = [partial(_PAIRED[kind], function) for kind, function in zip(kinds, functions)]
+        heap: List[Tuple[int, Any]] = []
+        return _merged(_gathered(cluster, items, kinds, functions, None, by, chunksize,
+                                 ordered=False, paired=True,
+                                 backlog=lambda: -(-len(heap) // chunksize)), heap)
+    return _flattened(_gathered(cluster, items, kinds, functions, None, by, chunksize, ordered))
+
+
+def _flattened(results: Iterator[Tuple[int, Any]]) -> Iterator[Any]:
+    for _, result in results:
+        yield from result
+
+
+def _merged(results: Iterator[Tuple[int, Any]], heap: List[Tuple[int, Any]]) -> Iterator[Any]:
+    """
+    Merges chunks of (position, element) pairs, given with the first position not done yet
+    (so elements before it are final), into the elements in order of their positions (buffering
+    the rest in the given heap).
+    """
+    for done_until, pairs in results:
+        for pair in pairs:
+            heapq.heappush(heap, pair)
+        while heap and heap[0][0] < done_until:
+            yield heapq.heappop(heap)[1]
+    while heap:
+        yield heapq.heappop(heap)[1]
+
+
+def _gathered(cluster: Cluster,
+              items: Iterable[Any],
+              kinds: Tuple[str, ...],
+              functions: List[Callable[[Any], Any]],
+              reducer: Optional[Callable[[Iterable[Any]], Any]],
+              by: Optional[Callable[[Any], int]],
+              chunksize: int,
+              ordered: bool,
+              paired: bool = False,
+              backlog: Optional[Callable[[], int]] = None) -> Iterator[Any]:
+    """
+    Yields the results of the processed chunks, in the order of the chunks (if `ordered`) or as
+    they complete (elements of partitions are paired with their position, if `paired`).
+    Results are yielded along with the first position (in the source) of elements not processed
+    yet (or the result of a reducer, as is).
+    Results completed but not yielded yet (waiting for the chunks before them), or buffered by the
+    consumer (`backlog`, in chunks), count towards the window of chunks in flight, so no more of the
+    source is read while the window is full.
+    """
+    payload = _pickled(kinds, functions, reducer)
+    connections = cluster._connect()
+    for worker in list(connections):
+        if not _send(cluster, connections, worker, ('pipeline', payload)):
+            connections.pop(worker)
+    partitioner = _Partitioner(items, by, cluster.workers, chunksize, cluster._chunk_ids, paired)
+    in_flight: Dict[int, _Chunk] = {}
+    # chunks waiting for a worker (of their partition, or lost by one)
+    waiting: Deque[_Chunk] = deque()
+    done: Dict[int, Any] = {}
+    chunk_order: Deque[int] = deque()
+
+    while True:
+        _dispatch(cluster, connections, partitioner, in_flight, waiting, chunk_order,
+                  len(done) if backlog is None else backlog())
+        if not in_flight:
+            break
+        busy = {chunk.worker for chunk in in_flight.values()}
+        ready = wait([connections[worker] for worker in busy if worker is not None])
+        for worker, connection in list(connections.items()):
+            if connection not in ready:
+                continue
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                _lost(cluster, connections, worker, in_flight, waiting)
+                continue
+            status, chunk_id, result = message
+            chunk = in_flight.pop(chunk_id, None)
+            if chunk is None:
+                continue  # a result of a query that was not consumed to its end
+            if status == 'error':
+                raise result
+            if reducer is not None or ordered:
+                done[chunk_id] = result
+            else:
+                yield _done_until(partitioner, in_flight, waiting), result
+        while chunk_order and chunk_order[0] in done:
+            result = done.pop(chunk_order.popleft())
+            if reducer is not None:
+                yield result
+            else:
+                yield _done_until(partitioner, in_flight, waiting), result
+
+
+def _dispatch(cluster: Cluster,
+              connections: Dict[int, Connection],
+              partitioner: _Partitioner,
+              in_flight: Dict[int, _Chunk],
+              waiting: Deque[_Chunk],
+              chunk_order: Deque[int],
+              backlog: int) -> None:
+    """
+    Sends chunks to workers with room in their window: waiting chunks first, then new ones.
+    Stops reading the source once a new chunk waits for its (busy) worker, or once the chunks in
+    flight and the backlog (of results not consumed yet) fill the window of all workers (sending
+    only elements already read, holding back the backlog).
+    """
+    while True:
+        if not connections:
+            raise ConnectionError(f"All workers of the cluster were lost {cluster.addresses}")
+        loads = {worker: 0 for worker in connections}
+        for in_flight_chunk in in_flight.values():
+            if in_flight_chunk.worker is not None:
+                loads[in_flight_chunk.worker] += 1
+        available = [worker for worker, load in loads.items() if load < _WINDOW_PER_WORKER]
+        if not available:
+            return
+        chunk = _next_dispatchable(waiting, available)
+        if chunk is None:
+            if waiting or partitioner.exhausted:
+                return
+            if len(in_flight) + backlog >= len(connections) * _WINDOW_PER_WORKER:
+                before = min([c.first for c in in_flight.values()], default=partitioner.position)
+                new_chunk = partitioner.next_buffered_chunk(before)
+            else:
+                new_chunk = partitioner.next_chunk()
+            if new_chunk is None:
+                return
+            chunk = new_chunk
+            chunk_order.append(chunk.id)
+            if chunk.worker is not None and chunk.worker not in available:
+                if chunk.worker in connections:
+                    waiting.append(chunk)
+                    return
+                chunk.worker = None  # its worker was lost, any other worker takes it
+        worker = chunk.worker
+        if worker is None:
+            worker = chunk.worker = min(available, key=lambda i: loads[i])
+        in_flight[chunk.id] = chunk
+        if not _send(cluster, connections, worker, ('chunk', chunk.id, chunk.items)):
+            _lost(cluster, connections, worker, in_flight, waiting)
+
+
+def _next_dispatchable(waiting: Deque[_Chunk], available: List[int]) -> Optional[_Chunk]:
+    for chunk in waiting:
+        if chunk.worker is None or chunk.worker in available:
+            waiting.remove(chunk)
+            return chunk
+    return None
+
+
+def _done_until(partitioner: _Partitioner,
+                in_flight: Dict[int, _Chunk],
+                waiting: Deque[_Chunk]) -> int:
+    firsts = [chunk.first for chunk in in_flight.values()]
+    firsts.extend(chunk.first for chunk in waiting)
+    firsts.append(partitioner.pending_first())
+    return min(firsts)
+
+
+def _send(cluster: Cluster, connections: Dict[int, Connection], worker: int, message: Any) -> bool:
+    try:
+        connections[worker].send(message)
+        return True
+    except OSError:
+        return False
+
+
+def _lost(cluster: Cluster,
+          connections: Dict[int, Connection],
+          worker: int,
+          in_flight: Dict[int, _Chunk],
+          waiting: Deque[_Chunk]) -> None:
+    """
+    Forgets a lost worker, and re-dispatches the chunks it had in flight to the other workers.
+    """
+    cluster._lose(worker)
+    connections.pop(worker, None)
+    for chunk in waiting:
+        if chunk.worker == worker:
+            chunk.worker = None
+    for chunk in [chunk for chunk in in_flight.values() if chunk.worker == worker]:
+        del in_flight[chunk.id]
+        chunk.worker = None
+        waiting.appendleft(chunk)
+
+
+def _pickled(kinds: Tuple[str, ...],
+             functions: List[Callable[[Any], Any]],
+             reducer: Optional[Callable[[Iterable[Any]], Any]]) -> bytes:
+    for function in [*functions, reducer]:
+        try:
+            pickle.dumps(function)
+        except Exception as e:
+            raise TypeError(
+                f"Callables executed on a cluster must be picklable (e.g., module level "
+                f"functions, rather than lambdas or local functions), found {function!r}.") from e
+    return pickle.dumps((kinds, functions, reducer))
+
+
+def _where_paired(predicate: Callable[[Any], Any], pair: Tuple[int, Any]) -> Any:
+    return predicate(pair[1])
+
+
+def _select_paired(selector: Callable[[Any], Any], pair: Tuple[int, Any]) -> Tuple[int, Any]:
+    return pair[0], selector(pair[1])
+
+
+_PAIRED: Dict[str, Callable[..., Any]] = {
+    'where': _where_paired,
+    'exclude': _where_paired,
+    'select': _select_paired,
+}
+
+
+def serve(address: Address, authkey: bytes) -> None:
+    """
+    Runs a worker, serving clients (one at a time) at the given address, until stopped.
+
+    Args:
+        address: The address to listen at (e.g., `('0.0.0.0', 6000)`).
+        authkey: The authentication key clients must know.
+    """
+    with Listener(address, authkey=authkey) as listener:
+        _serve(listener)
+
+
+def _serve_local(address_sender: Connection, authkey: bytes) -> None:
+    with Listener(('localhost', 0), authkey=authkey) as listener:
+        address_sender.send(listener.address)
+        address_sender.close()
+        _serve(listener)
+
+
+def _serve(listener: Listener) -> None:
+    while True:
+        try:
+            connection = listener.accept()
+        except (multiprocessing.AuthenticationError, OSError):
+            continue
+        with connection:
+            if not _serve_client(connection):
+                return
+
+
+def _serve_client(connection: Connection) -> bool:
+    """
+    Processes the chunks sent by a client, until it disconnects (returns True), or asks the
+    worker to shut down (returns False).
+    """
+    apply: Optional[Callable[[List[Any]], Any]] = None
+    while True:
+        try:
+            message = connection.recv()
+        except (EOFError, OSError):
+            return True
+        if message[0] == 'shutdown':
+            return False
+        if message[0] == 'pipeline':
+            kinds, functions, reducer = pickle.loads(message[1])
+            apply = partial(_parallel._apply, _codegen.fused_function(kinds), functions, reducer)
+            continue
+        _, chunk_id, chunk = message
+        try:
+            result = apply(chunk)  # type: ignore # (a pipeline precedes the chunks)
+        except Exception as e:
+            connection.send(('error', chunk_id, _sendable(e)))
+            continue
+        connection.send(('result', chunk_id, result))
+
+
+def _sendable(error: Exception) -> Exception:
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return RuntimeError(f"Worker raised an unpicklable exception: {error!r}")
+
+
+def _main(argv: List[str]) -> None:  # pragma: no cover
+    host, _, port = argv[0].rpartition(':')
+    serve((host, int(port)), os.environ['FLIQ_CLUSTER_AUTHKEY'].encode())
+
+
+if __name__ == '__main__':  # pragma: no cover
+    _main(sys.argv[1:])
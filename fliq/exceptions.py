@@ -17,3 +17,6 @@ class NotEnoughElementsException(BaseQueryException):
 class ElementNotFoundException(BaseQueryException):
     pass
 
+
+class QueryCancelledException(BaseQueryException):
+    pass
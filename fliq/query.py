@@ -1,19 +1,23 @@
 from __future__ import annotations
 
 import collections.abc
-import heapq
 import itertools
+import operator
 import random
-from collections import defaultdict, deque, Counter
-from functools import reduce
+from bisect import bisect_left
+from collections import defaultdict
+from functools import partial, reduce
 from itertools import islice, chain, zip_longest
-from operator import attrgetter
+from time import monotonic
 from typing import Iterable, List, Any, Sized, Iterator, TYPE_CHECKING, Dict, \
-    Tuple, Hashable, Type, Generic, Sequence, Generator, Optional, Union, Callable
+    Tuple, Hashable, Type, Generic, Sequence, Optional, Union, Callable, AsyncIterable, overload
 
+from fliq import _plan, _optimizer, _compiler, _parallel
+from fliq._plan import PlanNode
+from fliq.cancellation import Budget, CancelToken
 from fliq._types import (
     T, U,
-    Predicate, Selector, IndexSelector, NumericSelector,
+    Predicate, Selector, IndexSelector, NumericSelector, AsyncPredicate, AsyncSelector,
     MISSING, MissingOrOptional
 )
 from fliq.exceptions import (
@@ -23,22 +27,109 @@ from fliq.exceptions import (
 
 if TYPE_CHECKING:
     from fliq import q  # noqa: F401 (used in docs)  # pragma: no cover
+    from fliq.async_query import AsyncQuery  # pragma: no cover
+    from fliq.cluster import Cluster  # pragma: no cover
+    from fliq.shared_snapshot import SharedSnapshot  # pragma: no cover
 
 
 class Query(Generic[T], Iterable[T]):
-    def __init__(self, iterable: Iterable[T]):
+    def __init__(self,
+                 iterable: Iterable[T],
+                 presorted_by: MissingOrOptional[Union[str, Selector[T, Any]]] = MISSING):
         """
         Create a Query object to allow fluent iterable processing
-        """
-        self._items: Iterable[T] = iterable
+
+        Args:
+            iterable: The iterable to process.
+            presorted_by: Optional. Declares that the iterable is already sorted (ascending) by the
+                given key (a selector, or the name of an attribute), or by the elements themselves
+                if None. Mappers and materializers exploit this (e.g., `min()` and `max()` return
+                an endpoint), results are undefined if the iterable is not sorted.
+                Defaults to no declared order.
+        """
+        self._source: Iterable[Any] = iterable
+        # deferred plan, applied on top of the source only when the query is materialized
+        self._plan: List[PlanNode] = []
         self._iterator: Optional[Iterator[T]] = None
+        # properties of the source (e.g., sortedness), before the plan is applied
+        self._properties: _plan.Properties = _plan.UNKNOWN
+        if presorted_by is not MISSING:
+            self._properties = _plan.Properties(
+                is_sorted=True, by=presorted_by)  # type: ignore # (presorted_by is not MISSING)
+        # number of elements to sample for adaptive filtering (see `adaptive()`), if enabled
+        self._adaptive_sample: Optional[int] = None
+        # metrics of the pipelined stages (see `pipelined()`)
+        self._stages: List[_parallel.StageMetrics] = []
+        # deadline and cancel tokens, checked while the query runs (see `with_deadline()`)
+        self._budget: Optional[Budget] = None
 
         # COW mode: copy-on-write mode, used to support snapshots
         self._cow_pending: bool = False
 
-    def __iter__(self) -> Query[T]:
+    @property
+    def _items(self) -> Iterable[T]:
+        """
+        The items of the query. Accessing them lowers the plan (built thus far) into iterators,
+        following mappers are planned on top of the lowered items.
+        """
+        return self._lowered()
+
+    def _lowered(self, limit: Optional[int] = None) -> Iterable[T]:
+        """
+        Lowers the plan (built thus far) into iterators, and returns the items of the query.
+
+        Args:
+            limit: Optional. The number of elements the caller expects to consume, if known.
+        """
+        if self._plan or self._budget is not None:
+            plan = _optimizer.optimize(self._plan, limit, True, self._properties,
+                                       self._adaptive_sample, self._source_length())
+            self._source = _plan.lower(self._source, plan, self._budget)
+            self._properties = _plan.properties(self._properties, plan)
+            self._plan = []
+        return self._source
+
+    def _source_length(self) -> Optional[int]:
+        """
+        Returns the number of elements of the source, if it is sized, otherwise None.
+        """
+        return len(self._source) if isinstance(self._source, collections.abc.Sized) else None
+
+    def _iter(self, limit: Optional[int] = None) -> Iterator[T]:
+        """
+        Returns the underlying iterator of the query, to be consumed directly by materializers
+        (without the overhead of going through `__next__` for every element).
+
+        Args:
+            limit: Optional. The number of elements the caller expects to consume, if known.
+        """
         if self._iterator is None:
-            self._iterator = iter(self._items)
+            self._iterator = iter(self._lowered(limit))
+        return self._iterator
+
+    def _unordered(self) -> Tuple[Iterable[T], _plan.Properties]:
+        """
+        Returns the items of the query (and their properties), for a caller indifferent to their
+        order (e.g., `count()`). Operators that only reorder the elements are skipped, by lowering
+        the plan into a separate iterable, so the query itself is left intact for following
+        materializers. This requires a source that can be iterated again (e.g., a list), otherwise
+        the query is lowered as is (see `_lowered()`), and continues its iteration if started.
+        """
+        if self._iterator is None and self._plan \
+                and isinstance(self._source, collections.abc.Collection):
+            plan = _optimizer.drop_reorders(self._plan)
+            if plan is not self._plan:
+                plan = _optimizer.optimize(plan, None, False, self._properties,
+                                           self._adaptive_sample, len(self._source))
+                return (_plan.lower(self._source, plan, self._budget),
+                        _plan.properties(self._properties, plan))
+        if self._iterator is not None:
+            return self._iterator, self._properties
+        return self._lowered(), self._properties
+
+    def __iter__(self) -> Query[T]:
+        # the plan is lowered on the first element pulled, so it is still known when the length
+        # is hinted (e.g., by `list()`, right after calling `iter()`)
         return self
 
     def __next__(self) -> Union[T]:
@@ -47,7 +138,22 @@ class Query(Generic[T], Iterable[T]):
         return next(self._iterator)
 
     def __contains__(self, item: Any) -> bool:
-        return item in self._items
+        return self.contains(item)
+
+    def __length_hint__(self) -> int:
+        """
+        Returns the exact number of elements in the query, without iterating it, so `list()` and
+        others can presize. NotImplemented in case it is unknown (an upper bound, e.g., of a
+        filtered query, could make them overallocate by far).
+        """
+        length: Optional[int]
+        if self._iterator is not None:
+            # already iterating, the iterator itself may know how many elements are left
+            hint = operator.length_hint(self._iterator, -1)
+            length = None if hint == -1 else hint
+        else:
+            length = _plan.length(self._source, self._plan)
+        return NotImplemented if length is None else length  # type: ignore # (unknown length)
 
     def __eq__(self, other: Any) -> bool:
         """
@@ -71,28 +177,41 @@ class Query(Generic[T], Iterable[T]):
 
         return True
 
-    def _self(self, updated_items: Optional[Iterable[U]] = None, in_snap: bool = False) -> Query[U]:
+    def _self(self,
+              node: Optional[PlanNode] = None,
+              in_snap: bool = False,
+              updated_items: Optional[Iterable[U]] = None) -> Query[U]:
         """
-        Adjusts the iterable of the query, and returns the query itself.
+        Adds a node to the plan of the query (or replaces its items, for eagerly evaluated
+        mappers), and returns the query itself.
         This method abstract the need to create a new Query in some situations, to support
         the snapshot functionality.
         """
-        updated_items = self._items if updated_items is None else updated_items  # type: ignore
-
         if in_snap:
             # COW prep: coming from snap, transform to list, don't copy object
             # This will allow multiple passes on this snapshot
-            self._items = list(updated_items)  # type: ignore
+            self._source = list(self._items)
             return self  # type: ignore
         elif self._cow_pending:
             # COW mode: coming from operation in COW mode, copy object
             # This will create a new query object in the first streamer following a snapshot
             # Following streamers will work on that same query object, minimizing object creations
-            snapped_query = Query(iterable=updated_items)  # type: ignore
+            snapped_query: Query[U] = Query(
+                iterable=self._items if updated_items is None else updated_items)  # type: ignore
+            if updated_items is None:
+                snapped_query._properties = self._properties
+            snapped_query._adaptive_sample = self._adaptive_sample
+            snapped_query._budget = self._budget
+            if node is not None:
+                snapped_query._plan.append(node)
             return snapped_query
         else:
-            # non-COW mode: coming from operation in non-COW mode, update iterable
-            self._items = updated_items  # type: ignore
+            # non-COW mode: coming from operation in non-COW mode, update plan
+            if updated_items is not None:
+                self._source = updated_items
+                self._properties = _plan.UNKNOWN
+            if node is not None:
+                self._plan.append(node)
             return self  # type: ignore
 
     def __repr__(self) -> str:  # pragma: no cover
@@ -131,12 +250,17 @@ class Query(Generic[T], Iterable[T]):
 
     # region Special Functionality
 
-    def snap(self) -> Query[T]:
+    def snap(self, shared: bool = False, format: Optional[str] = None) -> Query[T]:
         """
         Yields the same elements, and creates a snapshot for the query.
         This snapshot allows for multiple iterations over the same "snapped" iterable.
         If multiple snapshots are created in a query lifetime, the last one is considered.
 
+        A shared snapshot stores fixed-width elements (numbers, or records of a given format) in
+        shared memory (see `SharedSnapshot`), so other processes (e.g., workers of a pool) attach
+        to it without copying it. The snapshot is available as `shared`, and must be unlinked
+        once no longer needed.
+
         Assumes a finite iterable.
 
         Examples:
@@ -148,10 +272,39 @@ class Query(Generic[T], Iterable[T]):
             0
             >>> evens.select(lambda x: x ** 2).to_list()
             [0, 4, 16, 36, 64]
+            >>> evens = q(range(10)).where(lambda x: x % 2 == 0).snap(shared=True)
+            >>> with evens.shared:
+            ...     evens.where(lambda x: x > 3).to_list(), evens.select(lambda x: x * 2).sum()
+            ([4, 6, 8], 40)
+
+        Args:
+            shared: Optional. Whether to store the snapshot in shared memory. Defaults to False.
+            format: Optional. The struct format of an element, for a shared snapshot.
+                Defaults to integers or floats, in case all elements are numbers
+                (see `SharedSnapshot.create()`).
+
+        Raises:
+            TypeError: In case a shared snapshot has no format, and elements are not all numbers.
+            ValueError: In case elements of a shared snapshot do not fit its format.
         """
         self._cow_pending = True
+        if shared:
+            # imported lazily, so importing fliq does not import multiprocessing.shared_memory
+            from fliq.shared_snapshot import SharedSnapshot
+
+            self._source = SharedSnapshot.create(list(self._items), format)
+            return self
         return self._self(in_snap=True)
 
+    @property
+    def shared(self) -> Optional[SharedSnapshot]:
+        """
+        The shared-memory snapshot the query is over (see `snap(shared=True)`), or None.
+        """
+        from fliq.shared_snapshot import SharedSnapshot
+
+        return self._source if isinstance(self._source, SharedSnapshot) else None
+
     def partition(self, by: Union[IndexSelector[T], Predicate[T]], n: int = 2) \
             -> Tuple[Query[T], ...]:
         # noinspection GrazieInspection
@@ -258,7 +411,7 @@ class Query(Generic[T], Iterable[T]):
 
         # Adjust self._items to a new iterator that starts with the consumed items
         # followed by the remaining items
-        self._items = chain(first_n_items, self._iterator)
+        self._source = chain(first_n_items, self._iterator)
 
         # Create a new iterator from the adjusted self._items
         self._iterator = iter(self._items)
@@ -267,6 +420,339 @@ class Query(Generic[T], Iterable[T]):
 
         return padded_result if n > 1 else padded_result[0]
 
+    def compile(self) -> Callable[[Iterable[Any]], Query[T]]:
+        """
+        Compiles the mappers of the query into a single generated loop, and returns a function
+        that applies them on any iterable (returning a new query).
+        The query itself is left intact, and its own items are not used.
+        Compile once and reuse the returned function, for pipelines running many times.
+
+        Examples:
+            >>> from fliq import q
+            >>> names = q([]).where(lambda p: p['age'] > 30).select(lambda p: p['name']).compile()
+            >>> names([{'name': 'Alice', 'age': 31}, {'name': 'Bob', 'age': 25}]).to_list()
+            ['Alice']
+            >>> names([{'name': 'Carol', 'age': 40}]).first()
+            'Carol'
+
+        Notes:
+            Supports where, exclude, select, distinct, slice, take, skip, append and prepend.
+            Mappers applied after compiling are not part of the compiled pipeline.
+            Plain lambdas (of a single argument and without closures) are inlined into the
+            generated loop, saving a function call per element (requires Python 3.11+).
+
+        Raises:
+            TypeError: In case the query contains a mapper that cannot be compiled.
+        """
+        function = _compiler.compile_plan(self._plan)
+        return lambda iterable: Query(function(iterable))
+
+    def adaptive(self, sample_size: int = 2000) -> Query[T]:
+        """
+        Yields the same elements, while enabling adaptive filtering for the query.
+        Consecutive `where` and `exclude` mappers are reordered at runtime: the first
+        `sample_size` elements are filtered in the declared order, while measuring the cost and
+        selectivity of every predicate. The rest of the elements are filtered by cheap and selective
+        predicates first, so fewer (and cheaper) predicate calls are made.
+
+        Examples:
+            >>> from fliq import q
+            >>> q(range(10)).adaptive().where(lambda x: x % 2 == 0).where(lambda x: x > 5).to_list()
+            [6, 8]
+
+        Notes:
+            Results are identical to the declared order, for predicates without side effects
+            (elements a predicate raises on are filtered again in the declared order).
+            Errors a predicate would raise for elements rejected by a reordered predicate are not
+            raised.
+            The chosen order is logged (in debug level) by the `fliq._plan` logger.
+
+        Args:
+            sample_size: Optional. The number of elements to measure the predicates on.
+                Defaults to 2000.
+
+        Raises:
+            ValueError: In case sample_size is not positive.
+        """
+        if sample_size < 1:
+            raise ValueError(f"sample_size must be positive, got {sample_size}")
+        query: Query[T] = self._self()
+        query._adaptive_sample = sample_size
+        return query
+
+    def parallel(self,
+                 workers: Optional[int] = None,
+                 backend: str = 'process',
+                 chunksize: int = 1000,
+                 ordered: bool = True) -> Query[T]:
+        """
+        Yields the same elements, while executing the element-wise mappers following it
+        (`where`, `exclude` and `select`, up to the first other mapper) on a pool of workers.
+        Elements are sent to the workers in chunks, and only a bounded number of chunks is
+        processed at a time, so consumers that stop early (e.g., `first()` or `take()`) stop
+        feeding the workers.
+        A `group_by()` or `to_dict()` directly following these mappers is executed on the workers
+        as well (each grouping its chunks, merged by the consumer), and so is an `order()` (each
+        sorting a run of the elements, merged as the result is consumed), and so are `sum()`,
+        `min()`, `max()` and `aggregate()` (each reducing its chunks, combined by the consumer).
+
+        Examples:
+            >>> from fliq import q
+            >>> q(range(5)).parallel(workers=2, chunksize=2).select(abs).where(bool).to_list()
+            [1, 2, 3, 4]
+            >>> q(range(5)).parallel(backend='thread').select(lambda x: x * 2).first()
+            0
+
+        Notes:
+            For the process backend, callables must be picklable (e.g., module level functions,
+            rather than lambdas or local functions), and so must the elements and the results.
+            Use it for CPU-bound callables, where the work per element outweighs sending the
+            elements to the workers. The thread backend accepts any callable, and fits callables
+            that release the GIL (e.g., I/O).
+
+        Args:
+            workers: Optional. The number of workers. Defaults to the number of CPUs.
+            backend: Optional. Either 'process' (a process pool) or 'thread' (a thread pool).
+                Defaults to 'process'.
+            chunksize: Optional. The number of elements sent to a worker at once. Defaults to 1000.
+            ordered: Optional. Whether to yield the elements in their original order. Otherwise,
+                chunks are yielded as soon as they are processed. Defaults to True.
+
+        Raises:
+            ValueError: In case workers or chunksize are not positive, or the backend is unknown.
+            TypeError: In case a callable cannot be pickled for the process backend
+                (upon materialization).
+        """
+        if workers is not None and workers < 1:
+            raise ValueError(f"workers must be positive, got {workers}")
+        if chunksize < 1:
+            raise ValueError(f"chunksize must be positive, got {chunksize}")
+        if backend not in _parallel.BACKENDS:
+            raise ValueError(f"backend must be one of {_parallel.BACKENDS}, got {backend!r}")
+        return self._self(_plan.Parallel(workers, backend, chunksize, ordered))
+
+    def distributed(self,
+                    cluster: Cluster,
+                    by: Optional[IndexSelector[T]] = None,
+                    chunksize: int = 1000,
+                    ordered: bool = True) -> Query[T]:
+        """
+        Yields the same elements, while executing the element-wise mappers following it
+        (`where`, `exclude` and `select`, up to the first other mapper) on the workers of a
+        cluster (e.g., processes on other machines, see `Cluster`).
+        The elements are partitioned into chunks, which are sent to the workers (along with the
+        mappers), and only a bounded number of chunks is in flight per worker. Chunks in flight on
+        a lost worker (e.g., its process died) are re-dispatched to the other workers.
+        A `sum()`, `count()`, `to_dict()`, `min()`, `max()` or `aggregate()` directly following
+        these mappers is partially executed on the workers as well (each reducing its chunks,
+        combined by the consumer).
+
+        Examples:
+            >>> from fliq import q, Cluster
+            >>> with Cluster.local(workers=2) as cluster:
+            ...     q(range(10)).distributed(cluster, chunksize=3).where(bool).select(abs).to_list()
+            [1, 2, 3, 4, 5, 6, 7, 8, 9]
+
+        Notes:
+            Callables (and elements) must be picklable (e.g., module level functions, rather than
+            lambdas or local functions), and importable by the workers.
+            Partitioning by index (similarly to `partition()`) sends every element to the worker
+            of its partition (unless that worker is lost). Reductions must then be commutative,
+            and groups of `to_dict()` may be in a different order.
+
+        Args:
+            cluster: The cluster to execute on.
+            by: Optional. IndexSelector that returns the index of the worker (partition) of each
+                element, in the range [0, cluster.workers). Defaults to chunks of consecutive
+                elements, sent to any worker with room (round-robin).
+            chunksize: Optional. The number of elements sent to a worker at once. Defaults to 1000.
+            ordered: Optional. Whether to yield the elements in their original order. Otherwise,
+                chunks are yielded as soon as they are processed. Defaults to True.
+
+        Raises:
+            ValueError: In case chunksize is not positive, or a partition index is out of range
+                (upon materialization).
+            TypeError: In case a callable cannot be pickled, or a partition index is not an
+                integer (upon materialization).
+            ConnectionError: In case no worker is reachable, or all workers were lost
+                (upon materialization).
+        """
+        if chunksize < 1:
+            raise ValueError(f"chunksize must be positive, got {chunksize}")
+        return self._self(_plan.Distributed(cluster, by, chunksize, ordered))
+
+    def pipelined(self, buffer: int = 64, name: Optional[str] = None) -> Query[T]:
+        """
+        Yields the same elements, while executing the query thus far (the source and the mappers
+        before it, back to the previous `pipelined()`) as a stage on a thread of its own.
+        The stage hands its elements to the rest of the query over a queue of up to `buffer`
+        elements, so it runs ahead while the following stages are busy, and waits once the queue
+        is full (backpressure).
+        Stages are ended by calling `pipelined()` after every mapper, or after a group of mappers.
+
+        Metrics of every stage (see `stages`) show the bottleneck: the stages before it have
+        (mostly) full queues, and the stages from it on have (mostly) empty ones.
+
+        Examples:
+            >>> from fliq import q
+            >>> query = q(range(5)).pipelined().select(lambda x: x * 2).pipelined(name='doubled')
+            >>> query.to_list()
+            [0, 2, 4, 6, 8]
+            >>> [(stage.name, stage.items) for stage in query.stages]
+            [('source', 5), ('doubled', 5)]
+
+        Notes:
+            Stages overlap where they release the GIL (e.g., I/O, decompression, or native code),
+            pure Python stages still run one at a time. Stages stop once the query is exhausted,
+            or stops being iterated.
+
+        Args:
+            buffer: Optional. The maximal number of elements in the queue. Defaults to 64.
+            name: Optional. The name of the stage, for its metrics.
+                Defaults to the names of the mappers in the stage.
+
+        Raises:
+            ValueError: In case buffer is not positive.
+        """
+        if buffer < 1:
+            raise ValueError(f"buffer must be positive, got {buffer}")
+        if name is None:
+            name = self._stage_name()
+        metrics = _parallel.StageMetrics(name, buffer)
+        query: Query[T] = self._self(_plan.Pipelined(buffer, metrics))
+        query._stages.append(metrics)
+        return query
+
+    def prefetch(self, n: int = 64, batch: int = 1) -> Query[T]:
+        """
+        Yields the same elements, while reading about `n` of them ahead (from the query thus
+        far, e.g., a slow source) on a thread of their own, so the consumer does not wait on
+        every element.
+        Elements are handed over in batches of `batch` elements, which costs less per element,
+        though the consumer waits for a whole batch to be read.
+
+        An exception raised while reading is raised after the elements preceding it.
+        Reading stops once the query is exhausted, or stops being iterated (e.g., by `take()`).
+
+        Examples:
+            >>> from fliq import q
+            >>> q(range(10)).prefetch(4, batch=2).select(lambda x: x * 2).take(3).to_list()
+            [0, 2, 4]
+
+        Args:
+            n: Optional. The number of elements read ahead (rounded up to whole batches, besides
+                the batches being read and consumed). Defaults to 64.
+            batch: Optional. The number of elements handed over at once. Defaults to 1.
+
+        Raises:
+            ValueError: In case n or batch are not positive.
+        """
+        if n < 1:
+            raise ValueError(f"n must be positive, got {n}")
+        if batch < 1:
+            raise ValueError(f"batch must be positive, got {batch}")
+        return self._self(_plan.Prefetch(n, batch))
+
+    def _stage_name(self) -> str:
+        names: List[str] = []
+        for node in reversed(self._plan):
+            if isinstance(node, _plan.Pipelined):
+                break
+            names.append(getattr(node, 'kind', repr(node).lower()))
+        else:
+            names.append('source')
+        return ', '.join(reversed(names))
+
+    @property
+    def stages(self) -> List[_parallel.StageMetrics]:
+        """
+        The metrics of the pipelined stages of the query (see `pipelined()`), in order.
+        """
+        return self._stages
+
+    def with_deadline(self, seconds: float) -> Query[T]:
+        """
+        Yields the same elements, while aborting the query once `seconds` have passed (from this
+        call), by raising `QueryCancelledException`.
+        The deadline is checked while the source and every mapper are iterated (including
+        blocking ones, e.g., `order()`, `group_by()` or `top()`, while they read their input),
+        and by the materializer consuming the query, about once a millisecond.
+
+        Examples:
+            >>> import time
+            >>> from fliq import q
+            >>> q(range(5)).with_deadline(seconds=10).select(lambda x: x * 2).to_list()
+            [0, 2, 4, 6, 8]
+            >>> q(range(5)).with_deadline(seconds=0.01).select(lambda x: time.sleep(0.01)).to_list()
+            Traceback (most recent call last):
+            ...
+            fliq.exceptions.QueryCancelledException: Query exceeded its deadline
+
+        Notes:
+            Cancellation is cooperative: a callable (or a sort) that is running is not
+            interrupted, and the query is aborted at the next check following it. Chunks already
+            sent to workers (see `parallel()` and `distributed()`) are not interrupted either,
+            though chunks not started yet are cancelled.
+            Given more than one deadline, the earliest applies.
+
+        Args:
+            seconds: The time budget of the query (a budget already spent aborts it on its first
+                check).
+        """
+        query: Query[T] = self._self()
+        query._budget = (query._budget or Budget()).until(monotonic() + seconds)
+        return query
+
+    def with_cancel(self, token: CancelToken) -> Query[T]:
+        """
+        Yields the same elements, while aborting the query once the token is cancelled (e.g.,
+        from another thread), by raising `QueryCancelledException`.
+        The token is checked as the deadline of `with_deadline()` is.
+
+        Examples:
+            >>> from fliq import q, CancelToken
+            >>> token = CancelToken()
+            >>> query = q(range(5)).with_cancel(token)
+            >>> query.first()
+            0
+            >>> token.cancel()
+            >>> query.to_list()
+            Traceback (most recent call last):
+            ...
+            fliq.exceptions.QueryCancelledException: Query was cancelled
+
+        Args:
+            token: The token cancelling the query.
+        """
+        query: Query[T] = self._self()
+        query._budget = (query._budget or Budget()).cancelled_by(token)
+        return query
+
+    @staticmethod
+    def aio(iterable: Union[AsyncIterable[U], Iterable[U]]) -> AsyncQuery[U]:
+        """
+        Creates an AsyncQuery over the given async iterable (e.g., an async generator), for
+        fluent processing without blocking the event loop.
+        Callables given to its mappers and materializers may be sync or async.
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> async def numbers():
+            ...     for i in range(5):
+            ...         yield i
+            >>> async def double(x):
+            ...     return x * 2
+            >>> asyncio.run(q.aio(numbers()).select(double).take(3).to_list())
+            [0, 2, 4]
+
+        Args:
+            iterable: The async iterable to query. Sync iterables are accepted as well.
+        """
+        # imported lazily, so importing fliq does not import asyncio
+        from fliq.async_query import AsyncQuery
+        return AsyncQuery(iterable)
+
     # endregion
 
     # region Mappers
@@ -288,8 +774,7 @@ class Query(Generic[T], Iterable[T]):
             # supported to ease syntax in higher level streamers and collectors
             return self._self()
 
-        items = filter(predicate, self._items)
-        return self._self(items)
+        return self._self(_plan.Where(predicate))
 
     def select(self, selector: Selector[T, U]) -> Query[U]:
         """
@@ -303,8 +788,134 @@ class Query(Generic[T], Iterable[T]):
         Args:
             selector: The selector function to apply to each element.
         """
-        items = map(selector, self._items)
-        return self._self(items)
+        return self._self(_plan.Select(selector))
+
+    def select_concurrent(self,
+                          selector: Selector[T, U],
+                          max_workers: Optional[int] = None,
+                          max_in_flight: Optional[int] = None,
+                          ordered: bool = True) -> Query[U]:
+        """
+        Yields the result of applying the selector function to each element, running the selector
+        concurrently on a pool of threads. Fits I/O-bound selectors (e.g., reading files, or
+        querying a database), which release the GIL while waiting.
+        Only a bounded number of elements is in flight (submitted, but not yet consumed) at any
+        time, so memory stays flat on infinite iterables. Pending calls are cancelled once the
+        query stops being iterated.
+
+        Examples:
+            >>> from fliq import q
+            >>> q(range(5)).select_concurrent(lambda x: x * 2, max_workers=2).to_list()
+            [0, 2, 4, 6, 8]
+
+        Args:
+            selector: The selector function to apply to each element.
+            max_workers: Optional. The number of threads.
+                Defaults to the default of `ThreadPoolExecutor`.
+            max_in_flight: Optional. The maximal number of elements in flight.
+                Defaults to twice the number of threads.
+            ordered: Optional. Whether to yield the results in the order of the elements.
+                Otherwise, results are yielded as soon as they are ready. Defaults to True.
+
+        Raises:
+            ValueError: In case max_workers or max_in_flight are not positive.
+        """
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"max_workers must be positive, got {max_workers}")
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be positive, got {max_in_flight}")
+        return self._self(_plan.SelectConcurrent(selector, max_workers, max_in_flight, ordered))
+
+    def select_async(self,
+                     selector: AsyncSelector[T, U],
+                     concurrency: int = 64,
+                     ordered: bool = True,
+                     batch_size: Optional[int] = None) -> AsyncQuery[U]:
+        """
+        Yields (asynchronously) the result of applying the async selector function to each
+        element, awaiting up to `concurrency` calls concurrently on the running event loop.
+        Fits I/O-bound coroutines (e.g., HTTP requests, or database queries).
+        Elements are pulled from the query only as calls complete, so memory stays flat on large
+        (or infinite) iterables. Pending calls are cancelled once the query stops being iterated.
+        The query is iterated in batches on the default executor of the running loop (see
+        `to_list_async()`), so its sync mappers do not block the event loop either.
+
+        Returns an AsyncQuery, to be iterated with `async for` or materialized with `await`.
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> async def double(x):
+            ...     await asyncio.sleep(0.01)
+            ...     return x * 2
+            >>> asyncio.run(q(range(5)).select_async(double, concurrency=2).to_list())
+            [0, 2, 4, 6, 8]
+
+        Args:
+            selector: The selector function (sync or async) to apply to each element.
+            concurrency: Optional. The maximal number of calls awaited concurrently.
+                Defaults to 64.
+            ordered: Optional. Whether to yield the results in the order of the elements.
+                Otherwise, results are yielded as soon as they are ready. Defaults to True.
+            batch_size: Optional. The number of elements pulled from the query per batch.
+                Defaults to `concurrency`.
+
+        Raises:
+            ValueError: In case concurrency or batch_size are not positive.
+        """
+        # (a non-positive concurrency is reported by the select itself)
+        return self._iterate_async(max(concurrency, 1) if batch_size is None else batch_size) \
+            .select(selector, concurrency=concurrency, ordered=ordered)
+
+    def where_async(self,
+                    predicate: AsyncPredicate[T],
+                    concurrency: int = 64,
+                    ordered: bool = True,
+                    batch_size: Optional[int] = None) -> AsyncQuery[T]:
+        """
+        Yields (asynchronously) the elements that satisfy the async predicate, awaiting up to
+        `concurrency` calls concurrently on the running event loop (see `select_async()`).
+        The query is iterated in batches on the default executor of the running loop.
+
+        Returns an AsyncQuery, to be iterated with `async for` or materialized with `await`.
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> async def is_even(x):
+            ...     await asyncio.sleep(0.01)
+            ...     return x % 2 == 0
+            >>> asyncio.run(q(range(5)).where_async(is_even, concurrency=2).to_list())
+            [0, 2, 4]
+
+        Args:
+            predicate: The predicate (sync or async) to filter the query by.
+            concurrency: Optional. The maximal number of calls awaited concurrently.
+                Defaults to 64.
+            ordered: Optional. Whether to yield the elements in their original order.
+                Otherwise, elements are yielded as soon as their call completes. Defaults to True.
+            batch_size: Optional. The number of elements pulled from the query per batch.
+                Defaults to `concurrency`.
+
+        Raises:
+            ValueError: In case concurrency or batch_size are not positive.
+        """
+        return self._iterate_async(max(concurrency, 1) if batch_size is None else batch_size) \
+            .where(predicate, concurrency=concurrency, ordered=ordered)
+
+    def _iterate_async(self, batch_size: int) -> AsyncQuery[T]:
+        """
+        Returns an AsyncQuery over the query, iterated in batches on the default executor of the
+        running loop (see `to_list_async()`).
+
+        Raises:
+            ValueError: In case batch_size is not positive.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        from fliq import _async
+        from fliq.async_query import AsyncQuery
+        return AsyncQuery(_async.iterate_in_batches(self._iter, batch_size))
 
     def exclude(self, predicate: Predicate[T]) -> Query[T]:
         """
@@ -318,8 +929,7 @@ class Query(Generic[T], Iterable[T]):
         Args:
             predicate: The predicate to filter the query by.
         """
-        items = filter(lambda x: not predicate(x), self._items)
-        return self._self(items)
+        return self._self(_plan.Exclude(predicate))
 
     def distinct(self) -> Query[T]:
         """
@@ -335,22 +945,14 @@ class Query(Generic[T], Iterable[T]):
         Raises:
             TypeError: In case one or more items in the query are not hashable.
             """
-
-        def generator(internal_items: Iterable[T]) -> Iterable[T]:
-            seen = set()
-            for item in internal_items:
-                if item not in seen:
-                    seen.add(item)
-                    yield item
-
-        items = generator(self._items)
-
-        return self._self(items)
+        return self._self(_plan.Distinct())
 
     def order(self,
               by: Optional[Selector[T, U]] = None,
               ascending: bool = True) -> Query[T]:
         """Yields elements in sorted order.
+        The sort is stable. Following `parallel()` (and the element-wise mappers after it), runs
+        of the elements are sorted on the workers, and merged as the result is consumed.
 
         Examples:
             >>> from fliq import q
@@ -363,12 +965,7 @@ class Query(Generic[T], Iterable[T]):
                 If exists, assumes the key is comparable.
             ascending: whether to sort in ascending or descending order, defaults to True.
         """
-        # assumed to be comparable
-        if by is None:
-            items = sorted(self._items, reverse=not ascending)  # type: ignore
-        else:
-            items = sorted(self._items, key=by, reverse=not ascending)  # type: ignore
-        return self._self(items)
+        return self._self(_plan.Order(by, ascending))
 
     def shuffle(self,
                 buffer_size: int = 10,
@@ -404,51 +1001,9 @@ class Query(Generic[T], Iterable[T]):
 
         Raises:
             TypeError: In case a fair shuffle is requested for a non-sizeable iterable.
+                Error will be raised when the query is collected.
         """
-        ran = random.Random(seed) if seed is not None else random.Random()
-
-        if fair:
-            if isinstance(self._items, List):
-                shuffled_items = self._items
-            elif isinstance(self._items, Sized):
-                shuffled_items = list(self._items)
-            else:
-                raise TypeError("Fair shuffle is not supported for non-sizeable iterables")
-            ran.shuffle(shuffled_items)
-            return self._self(shuffled_items)
-
-        def shuffled_generator(internal_items: Iterable[T]) -> Iterable[T]:
-            buffer: List[T] = []
-            sentinel = object()
-            items_iter = iter(internal_items)
-
-            # fill the buffer
-            for _ in range(buffer_size):
-                item = next(items_iter, sentinel)
-                if item is sentinel:
-                    # iterable exhausted (smaller than buffer size)
-                    break
-                buffer.append(item)  # type: ignore # (item is of type T)
-
-            ran.shuffle(buffer)
-
-            # if buffer was not filled, it means the iterable was too short
-            if len(buffer) < buffer_size:
-                yield from buffer
-                return
-
-            for item in items_iter:
-                # yield a random item from the buffer and replace it with the new item
-                idx = ran.randrange(len(buffer))
-                yield buffer[idx]
-                buffer[idx] = item
-
-            # yield the remaining items in the buffer
-            yield from buffer
-
-        items = shuffled_generator(self._items)
-
-        return self._self(items)
+        return self._self(_plan.Shuffle(buffer_size, seed, fair))
 
     def reverse(self) -> Query[T]:
         """
@@ -465,12 +1020,9 @@ class Query(Generic[T], Iterable[T]):
 
         Raises:
             TypeError: In case the iterable is irreversible.
+                Error will be raised when the query is collected.
         """
-        if isinstance(self._items, collections.abc.Iterator):
-            items = reversed(list(self._items))
-        else:
-            items = reversed(self._items)  # type: ignore
-        return self._self(items)
+        return self._self(_plan.Reverse())
 
     def slice(self, start: int = 0, stop: Optional[int] = None, step: int = 1) -> Query[T]:
         """
@@ -486,8 +1038,7 @@ class Query(Generic[T], Iterable[T]):
             stop: Optional. The stop index of the slice. Defaults to None.
             step: Optional. The step of the slice. Defaults to 1.
         """
-        items = islice(self._items, start, stop, step)
-        return self._self(items)
+        return self._self(_plan.Slice(start, stop, step))
 
     def take(self, n: int = 1, predicate: Optional[Predicate[T]] = None) -> Query[T]:
         """
@@ -498,8 +1049,7 @@ class Query(Generic[T], Iterable[T]):
             n: Optional. The number of elements to take. Defaults to 1.
             predicate: Optional. The predicate to filter the query by.
         """
-        query = self.where(predicate).slice(stop=n)
-        return self._self(query._items)
+        return self.where(predicate).slice(stop=n)
 
     def skip(self, n: int = 1) -> Query[T]:
         """
@@ -519,8 +1069,7 @@ class Query(Generic[T], Iterable[T]):
             n: Optional. The number of items to take. Defaults to 1.
                 If n=0, query is returned as is.
         """
-        query = self.slice(start=n)
-        return self._self(query._items)
+        return self.slice(start=n)
 
     def zip(self,
             *iterables: Iterable[U],
@@ -550,14 +1099,7 @@ class Query(Generic[T], Iterable[T]):
             fill: The value to use for padding when the longest iterable is exhausted.
                 relevant only when `longest` is True.
         """
-        zip_func: Callable[..., Iterable[Tuple[T, U]]]
-        if longest:
-            zip_func = lambda *args: zip_longest(*args, fillvalue=fill)  # noqa: E731
-        else:
-            zip_func = zip
-
-        items: Iterable[Tuple[T, U]] = zip_func(self._items, *iterables)
-        return self._self(items)
+        return self._self(_plan.Zip(iterables, longest, fill))
 
     def slide(self, window: int, overlap: int, pad: Optional[T] = None) -> Query[Tuple[T, ...]]:
         """
@@ -579,32 +1121,7 @@ class Query(Generic[T], Iterable[T]):
             >>> q([1, 2, 3, 4]).slide(window=3, overlap=1, pad=-1).to_list()
             [(1, 2, 3), (3, 4, -1)]
         """
-        deque_window: deque[Optional[T]] = deque(maxlen=window)
-
-        def _window(items: Iterable[T]) -> Generator[Tuple[Optional[T], ...], None, None]:
-            has_any_items = False
-
-            for item in items:
-                has_any_items = True
-                if len(deque_window) == window:
-                    # make room for new items (leave 'overlap' items in the window)
-                    for _ in range(window - overlap):
-                        deque_window.popleft()
-                # insert new items to the window
-                deque_window.append(item)
-                if len(deque_window) == window:
-                    yield tuple(deque_window)
-
-            if not has_any_items or len(deque_window) == window:
-                # last window contained the last item, no need for another window
-                return
-
-            # another window needed, pad with 'fill'
-            while len(deque_window) < window:
-                deque_window.append(pad)
-            yield tuple(deque_window)
-
-        return self._self(_window(self._items))  # type: ignore
+        return self._self(_plan.Slide(window, overlap, pad))
 
     def pairwise(self, pad: Optional[T] = None) -> Query[Tuple[T, T]]:
         """
@@ -640,8 +1157,7 @@ class Query(Generic[T], Iterable[T]):
         Args:
             *single_items: One or more elements to add to the end of the query.
         """
-        items = chain(self._items, single_items)
-        return self._self(items)
+        return self._self(_plan.Append(single_items))
 
     def append_many(self, items: Iterable[T]) -> Query[T]:
         """
@@ -661,8 +1177,7 @@ class Query(Generic[T], Iterable[T]):
             TypeError: In case the elements are not iterable.
                 Error will be raised when query is collected.
         """
-        items = chain(self._items, items)
-        return self._self(items)
+        return self._self(_plan.Append(items))
 
     def prepend(self, *single_items: T) -> Query[T]:
         """
@@ -681,8 +1196,7 @@ class Query(Generic[T], Iterable[T]):
         Args:
             *single_items: One or more elements to add to the start of the query.
         """
-        items = chain(single_items, self._items)
-        return self._self(items)
+        return self._self(_plan.Prepend(single_items))
 
     def prepend_many(self, items: Iterable[T]) -> Query[T]:
         """
@@ -702,8 +1216,7 @@ class Query(Generic[T], Iterable[T]):
             TypeError: In case the items are not iterable.
                 Error will be raised when the query is collected.
         """
-        items = chain(items, self._items)
-        return self._self(items)
+        return self._self(_plan.Prepend(items))
 
     def group_by(self, key: Union[str, Selector[T, U]]) -> Query[List[T]]:
         """
@@ -719,22 +1232,7 @@ class Query(Generic[T], Iterable[T]):
             key: A function that takes an element and returns its grouping key,
                 or a string representing the name of an attribute to group by.
         """
-        groups = self._group_by(key)
-
-        return self._self(groups.values())
-
-    def _group_by(self, key: Union[str, Selector[T, U]]) -> Dict[U, List[T]]:
-        groups = defaultdict(list)
-        key_selector: Selector[T, U]
-        if callable(key):
-            key_selector = key
-        else:
-            # key is a string
-            key_selector = attrgetter(key)
-        for item in self._items:
-            group_key = key_selector(item)
-            groups[group_key].append(item)
-        return groups
+        return self._self(_plan.GroupBy(key))
 
     def top(self, n: int = 1, by: Optional[NumericSelector[T]] = None) -> Query[T]:
         """
@@ -754,27 +1252,7 @@ class Query(Generic[T], Iterable[T]):
             n: Optional. The number of elements to take. Defaults to 1.
             by: Optional. The selector function to apply to each element. Defaults to the identity.
         """
-        items: Iterable[T]
-        if n <= 0:
-            return self._self([])
-
-        # heap holds tuples of (value, item), where value is either a numeric value
-        # from the selector or the item itself if no selector is provided
-        heap: List[Tuple[Union[T, int, float], T]] = []
-        for item in self._items:
-            value = item if by is None else by(item)
-            if len(heap) < n:
-                heapq.heappush(heap, (value, item))
-            else:
-                heapq.heappushpop(heap, (value, item))
-
-        items = (
-            Query(heap)
-            .order(ascending=False)
-            .select(lambda heap_pair: heap_pair[1])
-        )
-
-        return self._self(items)
+        return self._self(_plan.Top(n, by))
 
     def bottom(self, n: int = 1, by: Optional[NumericSelector[T]] = None) -> Query[T]:
         """
@@ -829,19 +1307,7 @@ class Query(Generic[T], Iterable[T]):
         if max_depth is not None and max_depth < 0:
             raise ValueError(f"max_depth must be non-negative (or -1 by default), got {max_depth}")
 
-        def _flatten(iterable: Iterable[Any], current_depth: int) -> Iterable[Any]:
-            for item in iterable:
-                type_ignored = ignore_types is not None and isinstance(item, ignore_types)
-                single_char_byte = isinstance(item, (str, bytes)) and len(item) == 1
-                if not single_char_byte and isinstance(item, Iterable) and not type_ignored:
-                    if max_depth is None or current_depth < max_depth:
-                        yield from _flatten(item, current_depth + 1)
-                    else:
-                        yield item
-                else:
-                    yield item
-
-        return self._self(_flatten(self._items, 0))
+        return self._self(_plan.Flatten(max_depth, ignore_types))
 
     def interleave(self, *iterables: Iterable[U]) -> Query[Union[T, U]]:
         """
@@ -858,13 +1324,7 @@ class Query(Generic[T], Iterable[T]):
         Args:
             *iterables: One or more iterables to unify with the query.
         """
-        sentinel = object()
-        items: zip_longest[Tuple[T, U]] = zip_longest(self._items, *iterables,
-                                                      fillvalue=sentinel)  # type: ignore
-        flattened_items: Iterable[Union[T, U]] = chain.from_iterable(items)
-        non_sentinel_items: Iterable[Union[T, U]] = filter(lambda x: x is not sentinel,
-                                                           flattened_items)
-        return self._self(non_sentinel_items)
+        return self._self(_plan.Interleave(iterables))
 
     def most_common(self, n: int = 1) -> Query[T]:
         """
@@ -883,12 +1343,9 @@ class Query(Generic[T], Iterable[T]):
 
         Raises:
             NotEnoughElementsException: In case the query does not have n items.
+                Error will be raised when the query is collected.
         """
-        top_counts = Counter(self._items).most_common(n)
-        if len(top_counts) < n:
-            raise NotEnoughElementsException(f"Found {len(top_counts)} items, expected {n}")
-        top_elements = [item for item, count in top_counts]
-        return self._self(top_elements)
+        return self._self(_plan.MostCommon(n))
 
     # endregion
 
@@ -924,7 +1381,7 @@ class Query(Generic[T], Iterable[T]):
             >>> q([]).first(default=None) # returns None
         """
         query = self.where(predicate)
-        first_item = next(query, MISSING)
+        first_item = next(query._iter(limit=1), MISSING)
         if first_item is MISSING:
             # query is empty
             if default is MISSING:
@@ -1013,10 +1470,11 @@ class Query(Generic[T], Iterable[T]):
             ElementNotFoundException: In case the query is too short.
             QueryIsUnexpectedlyEmptyException: In case the query is empty.
         """
+        items = self._lowered(limit=index + 1 if index >= 0 else None)
         # if items can be accessed using index, do that
-        if isinstance(self._items, collections.abc.Sequence):
+        if isinstance(items, collections.abc.Sequence):
             try:
-                return self._items[index]  # type: ignore # (item is of type T)
+                return items[index]  # type: ignore # (item is of type T)
             except IndexError:
                 if default is MISSING:
                     raise ElementNotFoundException()
@@ -1107,12 +1565,22 @@ class Query(Generic[T], Iterable[T]):
             >>> q([1, 2, 3]).count()
             3
         """
-        # If the iterable is sized, return the length
-        if isinstance(self._items, Sized):
-            return len(self._items)
+        # If the length is known without iterating (e.g., a sized iterable, mapped or sliced),
+        # return it
+        length = _plan.length(self._source, self._plan)
+        if length is not None:
+            return length
+
+        counts = self._reduced_in_parallel(_plan.counted)
+        if counts is not None:
+            return sum(counts)
+
+        items, _ = self._unordered()
+        if isinstance(items, Sized):
+            return len(items)
 
         # Otherwise, iterate over the iterable
-        return sum(1 for _ in self)
+        return sum(1 for _ in items)
 
     def any(self, predicate: Optional[Predicate[T]] = None) -> bool:
         """
@@ -1134,7 +1602,7 @@ class Query(Generic[T], Iterable[T]):
             predicate: Optional. The predicate to filter the iterable by.
         """
         query = self.where(predicate)
-        return any(query)
+        return any(query._unordered()[0])
 
     def all(self, predicate: Optional[Predicate[T]] = None) -> bool:
         """
@@ -1156,14 +1624,22 @@ class Query(Generic[T], Iterable[T]):
             predicate: Optional. The predicate to filter the query by.
         """
         query = self.where(predicate)
-        return all(query)
+        return all(query._unordered()[0])
 
-    def aggregate(self, by: Callable[[T, T], U], initial: Optional[U] = None) -> T:
+    def aggregate(self,
+                  by: Callable[[T, T], U],
+                  initial: Optional[U] = None,
+                  combine: Optional[Callable[[U, U], U]] = None) -> T:
         """
         Applies an accumulator function over the query.
 
         For an optimized summation of numeric values, use `sum`.
 
+        Following `parallel()` (and the element-wise mappers after it), every chunk is accumulated
+        on the workers, and the partial results are combined (in order) by `combine`.
+        This requires the accumulation to be associative, and `initial` (which starts every chunk)
+        to be neutral (e.g., 0 for a sum).
+
         Examples:
             >>> from fliq.tests.fliq_test_utils import Point
             >>> from fliq import q
@@ -1177,11 +1653,23 @@ class Query(Generic[T], Iterable[T]):
             initial: Optional. The initial value of the accumulator. Defaults to None.
                 If provided, it will also serve as the default value for an empty query.
                 If not provided, the first element of the query will be used as the initial value.
-        """
+            combine: Optional. The function combining two partial results, when accumulating in
+                parallel. Defaults to `by`.
+        """
+        partials = self._reduced_in_parallel(
+            partial(_plan.reduced, function=by, initial=MISSING if initial is None else initial))
+        if partials is not None:
+            by = combine or by  # type: ignore # (partial results are combined)
+            items: Iterable[Any] = partials
+        else:
+            items = self._items
         if initial is not None:
-            return reduce(by, self._items, initial)  # type: ignore # (by items of the same type)
+            if partials:
+                # chunks already started from the initial value
+                return reduce(by, partials)  # type: ignore # (by items of the same type)
+            return reduce(by, items, initial)  # type: ignore # (by items of the same type)
         else:
-            return reduce(by, self._items)  # type: ignore # (by items of the same type)
+            return reduce(by, items)  # type: ignore # (by items of the same type)
 
     def max(self,
             by: Optional[Selector[T, U]] = None) -> T:
@@ -1207,11 +1695,20 @@ class Query(Generic[T], Iterable[T]):
         Raises:
             ValueError: In case the query is empty.
         """
+        items: Optional[Iterable[T]] = None
+        ascending = self._sorted_by(by)
+        if ascending is not None:
+            # only the elements that may be maximal are compared
+            items = self._extremes(by, first=not ascending, ascending=ascending)
+        if items is None:
+            items = self._reduced_in_parallel(partial(_plan.extremum, function=max, by=by))
+        if items is None:
+            items = self._iter()
         # assumed to be comparable
         if by is None:
-            return max(self)  # type: ignore
+            return max(items)  # type: ignore
         else:
-            return max(self, key=by)  # type: ignore
+            return max(items, key=by)  # type: ignore
 
     def min(self,
             by: Optional[Selector[T, U]] = None) -> T:
@@ -1237,11 +1734,20 @@ class Query(Generic[T], Iterable[T]):
         Raises:
             ValueError: In case the query is empty.
         """
+        items: Optional[Iterable[T]] = None
+        ascending = self._sorted_by(by)
+        if ascending is not None:
+            # only the elements that may be minimal are compared
+            items = self._extremes(by, first=ascending, ascending=ascending)
+        if items is None:
+            items = self._reduced_in_parallel(partial(_plan.extremum, function=min, by=by))
+        if items is None:
+            items = self._iter()
         # assumed to be comparable
         if by is None:
-            return min(self)  # type: ignore
+            return min(items)  # type: ignore
         else:
-            return min(self, key=by)  # type: ignore
+            return min(items, key=by)  # type: ignore
 
     def contains(self, item: Any) -> bool:
         """
@@ -1260,7 +1766,10 @@ class Query(Generic[T], Iterable[T]):
         Args:
             item: The item to test for.
         """
-        return item in self._items
+        items, properties = self._unordered()
+        if properties.sorted_by(None) and isinstance(items, collections.abc.Sequence):
+            return self._bisect_contains(items, item)
+        return item in items
 
     def equals(self, other: Iterable[T], bag_compare: bool = False) -> bool:
         """
@@ -1282,7 +1791,7 @@ class Query(Generic[T], Iterable[T]):
                 ignoring order and duplicate items. Defaults to False.
         """
         if bag_compare:
-            return set(self) == set(other)
+            return set(self._unordered()[0]) == set(other)
         else:
             return self == other
 
@@ -1320,7 +1829,9 @@ class Query(Generic[T], Iterable[T]):
         query = self
         if by is not None:
             query = self.select(by)  # type: ignore # (here `by` is subtype of select `by`)
-        return sum(query, start=accumulator)  # type: ignore # (query type is okay)
+        partials = query._reduced_in_parallel(_plan.summed)
+        items = query._iter() if partials is None else partials
+        return sum(items, start=accumulator)
 
     # endregion
 
@@ -1328,26 +1839,275 @@ class Query(Generic[T], Iterable[T]):
         """
         Returns the elements of the query as a list.
         """
-        return list(self)
+        return list(self._iter())
 
+    @overload
     def to_dict(self, key: Union[str, Selector[T, U]]) -> Dict[U, List[T]]:
+        ...  # pragma: no cover
+
+    @overload
+    def to_dict(self,
+                key: Union[str, Selector[T, U]],
+                combine: Callable[[T, T], T]) -> Dict[U, T]:
+        ...  # pragma: no cover
+
+    def to_dict(self,
+                key: Union[str, Selector[T, U]],
+                combine: Optional[Callable[[T, T], T]] = None) -> Dict[U, Any]:
         """
         Returns the elements of the query as a dictionary, grouped by the given key.
         If you don't require the group key, consider using `group_by()` instead.
 
+        Groups keep the order of their first appearance. Following `parallel()` or `distributed()`
+        (and the element-wise mappers after it), the grouping is executed on the workers.
+
         Examples:
             >>> from fliq import q
             >>> q([1, 2, 3]).to_dict(key=lambda x: x % 2 == 0)
             {False: [1, 3], True: [2]}
+            >>> q([1, 2, 3]).to_dict(key=lambda x: x % 2 == 0, combine=lambda a, b: a + b)
+            {False: 4, True: 2}
+
+        Args:
+            key: The selector function to apply to each element, or a string representing
+                the name of an attribute to group by.
+            combine: Optional. A function combining two elements (of the same group) into one.
+                If given, every group is combined into a single value (left to right), instead of
+                a list. Must be associative when executed in parallel, where the workers combine
+                their own groups, sending back compact values rather than lists.
+        """
+        partial_groups = self._reduced_on_workers(partial(_plan.group_by, key=key, combine=combine))
+        if partial_groups is not None:
+            return _plan.merge_groups(partial_groups, combine)
+        return dict(_plan.group_by(self._items, key, combine=combine))
+
+    # endregion
+
+    # region Async Materializers
+
+    async def to_list_async(self, batch_size: int = 1000) -> List[T]:
+        """
+        Returns (asynchronously) the elements of the query as a list, without blocking the event
+        loop. The query is iterated in batches on the default executor of the running loop, so
+        CPU-bound mappers (e.g., `order()`) do not block other tasks, which run between batches.
+        Once cancelled, no further batches are started (the query is left partially consumed).
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> asyncio.run(q([3, 1, 2]).order().to_list_async())
+            [1, 2, 3]
+
+        Args:
+            batch_size: Optional. The number of elements pulled per batch. Defaults to 1000.
+
+        Raises:
+            ValueError: In case batch_size is not positive.
+        """
+        # imported lazily, so importing fliq does not import asyncio
+        from fliq import _async
+
+        items: List[T] = []
+        await _async.run_in_batches(self._iter, items.extend, batch_size)
+        return items
+
+    async def first_async(self,
+                          predicate: Optional[Predicate[T]] = None,
+                          default: MissingOrOptional[T] = MISSING,
+                          batch_size: int = 1000) -> Optional[T]:
+        """
+        Returns (asynchronously) the first element in the query that satisfies the predicate
+        (if provided), or a default value if the query is empty, without blocking the event loop
+        (see `first()` and `to_list_async()`).
+        The query is scanned in batches, so once cancelled, no further batches are scanned.
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> asyncio.run(q(range(10)).first_async(lambda x: x > 3))
+            4
+
+        Args:
+            predicate: Optional. The predicate to filter the query by.
+            default: Optional. The default value to return in case the query is empty.
+                Defaults to raise an exception if the query is empty.
+            batch_size: Optional. The number of elements scanned per batch. Defaults to 1000.
+
+        Raises:
+            QueryIsUnexpectedlyEmptyException: In case the query is empty.
+            ValueError: In case batch_size is not positive.
+        """
+        from fliq import _async
+
+        found: List[T] = []
+
+        def find(batch: List[T]) -> None:
+            found.extend(islice(batch if predicate is None else filter(predicate, batch), 1))
+
+        await _async.run_in_batches(lambda: self._iter(limit=1 if predicate is None else None),
+                                    find, batch_size, done=lambda: bool(found))
+        if found:
+            return found[0]
+        if default is MISSING:
+            raise QueryIsUnexpectedlyEmptyException()
+        return default  # type: ignore # default is not MISSING
+
+    async def count_async(self, batch_size: int = 1000) -> int:
+        """
+        Returns (asynchronously) the number of elements in the query, without blocking the event
+        loop (see `to_list_async()`).
+        In case the length is known without iterating, it is returned right away.
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> asyncio.run(q(range(10)).where(lambda x: x % 3 == 0).count_async())
+            4
+
+        Args:
+            batch_size: Optional. The number of elements pulled per batch. Defaults to 1000.
+
+        Raises:
+            ValueError: In case batch_size is not positive.
+        """
+        length = _plan.length(self._source, self._plan)
+        if length is not None:
+            return length
+        from fliq import _async
+
+        counts: List[int] = []
+        await _async.run_in_batches(lambda: self._unordered()[0],
+                                    lambda batch: counts.append(len(batch)),
+                                    batch_size)
+        return sum(counts)
+
+    async def to_dict_async(self,
+                            key: Union[str, Selector[T, U]],
+                            combine: Optional[Callable[[T, T], T]] = None,
+                            batch_size: int = 1000) -> Dict[U, Any]:
+        """
+        Returns (asynchronously) the elements of the query as a dictionary, grouped by the given
+        key, without blocking the event loop (see `to_dict()` and `to_list_async()`).
+
+        Examples:
+            >>> import asyncio
+            >>> from fliq import q
+            >>> asyncio.run(q([1, 2, 3]).to_dict_async(key=lambda x: x % 2 == 0))
+            {False: [1, 3], True: [2]}
+            >>> asyncio.run(q([1, 2, 3]).to_dict_async(key=lambda x: x % 2 == 0,
+            ...                                        combine=lambda a, b: a + b))
+            {False: 4, True: 2}
 
         Args:
             key: The selector function to apply to each element, or a string representing
                 the name of an attribute to group by.
+            combine: Optional. A function combining two elements (of the same group) into one.
+                If given, every group is combined into a single value (left to right), instead of
+                a list.
+            batch_size: Optional. The number of elements pulled per batch. Defaults to 1000.
+
+        Raises:
+            ValueError: In case batch_size is not positive.
         """
-        return dict(self._group_by(key))
+        from fliq import _async
+
+        groups: Dict[U, Any] = {} if combine is not None else defaultdict(list)
+        await _async.run_in_batches(self._iter,
+                                    partial(_plan.group_by, key=key, groups=groups,
+                                            combine=combine),
+                                    batch_size)
+        return dict(groups)
 
     # endregion
 
+    def _reduced_in_parallel(self,
+                             reducer: Callable[[Iterable[Any]], List[Any]]) -> Optional[List[Any]]:
+        """
+        Reduces the chunks of the query on the workers, in case it ends with `parallel()` or
+        `distributed()` (and the element-wise mappers after it). Returns the partial results (of
+        all chunks, in order), or None in case the query is not parallel (left intact).
+
+        Args:
+            reducer: Reduces the elements of a chunk into a list of partial results (picklable,
+                for the process backend and clusters).
+        """
+        partials = self._reduced_on_workers(reducer)
+        return None if partials is None else list(chain.from_iterable(partials))
+
+    def _reduced_on_workers(self,
+                            reducer: Callable[[Iterable[Any]], Any]) -> Optional[Iterator[Any]]:
+        """
+        Same as `_reduced_in_parallel`, returning the result of the reducer of every chunk.
+        """
+        run = _optimizer.detach_parallel(self._plan)
+        if run is not None:
+            parallel, nodes = run
+            return _parallel.parallel_chunks(self._items,
+                                             tuple([node.kind for node in nodes]),
+                                             [node.function for node in nodes],
+                                             reducer,
+                                             parallel.workers, parallel.backend, parallel.chunksize)
+        distributed_run = _optimizer.detach_distributed(self._plan)
+        if distributed_run is not None:
+            distributed, nodes = distributed_run
+            return distributed.scatter(self._items, nodes, reducer)
+        return None
+
+    def _sorted_by(self, by: Optional[Selector[T, U]]) -> Optional[bool]:
+        """
+        Returns whether the query (once materialized) is sorted ascending (True) or descending
+        (False) by the given key, or None in case it is not known to be sorted by it.
+        """
+        if self._iterator is not None:
+            # partially consumed
+            return None
+        return _plan.properties(self._properties, self._plan).sorted_by(by)
+
+    def _extremes(self,
+                  by: Optional[Selector[T, U]],
+                  first: bool,
+                  ascending: bool) -> Optional[Iterable[T]]:
+        """
+        Returns the elements that may be extreme (the first of which is), in a query sorted by the
+        given key. These are either the first element (if `first`), or the last run of equal
+        elements. Returns None in case the last run cannot be found without iterating.
+        """
+        if first:
+            # sorts ending the plan are bounded to the first element (see `top_k`)
+            return islice(self._iter(limit=1), 1)
+        items = self._lowered()
+        if not isinstance(items, collections.abc.Sequence):
+            return None
+        key: Callable[[Any], Any] = (lambda x: x) if by is None else by
+        start = len(items) - 1
+        if start <= 0:
+            return items
+        last = key(items[start])
+        while start > 0 and not (key(items[start - 1]) < last if ascending
+                                 else last < key(items[start - 1])):
+            start -= 1
+        return items[start:]
+
+    @staticmethod
+    def _bisect_contains(items: Sequence[Any], item: Any) -> bool:
+        """
+        Returns whether an ascending sorted sequence contains the given item (by equality), using a
+        binary search. Falls back to a linear search for items incomparable with the elements.
+        """
+        try:
+            index = bisect_left(items, item)
+            # elements equal (by order) to the item, are not necessarily equal to it
+            while index < len(items):
+                element = items[index]
+                if element == item:
+                    return True
+                if item < element:
+                    return False
+                index += 1
+            return False
+        except TypeError:
+            return item in items
+
     @staticmethod
     def _validate_partition_index(item_partition_idx: Union[int, bool], n: int) -> None:
         if isinstance(item_partition_idx, bool) and n != 2:
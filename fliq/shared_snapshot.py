@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import struct
+import sys
+from multiprocessing import shared_memory
+from types import TracebackType
+from typing import Any, Iterator, List, Optional, Sequence, Type, Union, overload
+
+# the header of a block: the number of elements, followed by the (null padded) struct format
+_HEADER = struct.Struct('Q56s')
+
+
+class SharedSnapshot(Sequence[Any]):
+    """
+    A read-only sequence of fixed-width elements (numbers, or records of numbers and bytes),
+    stored in a block of shared memory (see `multiprocessing.shared_memory`).
+    Other processes attach to the block by its name, and read the elements without copying them.
+
+    A snapshot is pickled by its name (so sending it to another process, e.g., a worker of a pool,
+    attaches to the same block regardless of its size), and is created by `Query.snap(shared=True)`
+    or `SharedSnapshot.create()`.
+
+    The process creating the block owns it, and must `unlink()` it once no longer needed
+    (every process should `close()` its view, once done reading it). Used as a context manager,
+    the view is closed on exit (and unlinked, by the owner).
+
+    Examples:
+        >>> from fliq import q, SharedSnapshot
+        >>> with SharedSnapshot.create([1, 2, 3]) as snapshot:
+        ...     with SharedSnapshot.attach(snapshot.name) as attached:
+        ...         q(attached).select(lambda x: x * 2).to_list()
+        [2, 4, 6]
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool):
+        """
+        Create a view over a block of shared memory, use `create()` or `attach()` instead.
+        """
+        self._memory = memory
+        self._owner = owner
+        length, encoded = _HEADER.unpack_from(memory.buf)
+        self._length: int = length
+        self.format: str = encoded.rstrip(b'\0').decode('ascii')
+        self._record = struct.Struct(self.format)
+        # elements of a single format character are read straight from a typed memoryview
+        self._view: Optional[memoryview] = None
+        data = memory.buf[_HEADER.size:_HEADER.size + length * self._record.size]
+        if len(self.format) == 1:
+            try:
+                self._view = data.cast(self.format)
+            except (TypeError, ValueError):
+                pass  # not a native type (e.g., 's'), read as records
+        self._data = data
+        self._closed = False
+
+    @staticmethod
+    def create(items: Sequence[Any], format: Optional[str] = None) -> SharedSnapshot:
+        """
+        Creates a block of shared memory holding the items, owned by the current process.
+
+        Args:
+            items: The items to store.
+            format: Optional. The struct format of an element. A single format character
+                for numbers (e.g., 'q' for integers, or 'd' for floats), or the format of a
+                fixed-width record (e.g., 'qd' or '8sq'), in which case elements are tuples.
+                Defaults to 'q' for integers, and 'd' for numbers (or '?' for booleans).
+
+        Raises:
+            TypeError: In case the format is not given, and the items are not all numbers.
+            ValueError: In case the format is invalid, or the items do not fit it.
+        """
+        if format is None:
+            format = _inferred_format(items)
+        try:
+            record = struct.Struct(format)
+        except struct.error as e:
+            raise ValueError(f"Invalid format for a shared snapshot: {format!r}") from e
+        encoded = format.encode('ascii')
+        if record.size == 0:
+            raise ValueError(f"Format of a shared snapshot must not be empty: {format!r}")
+        if len(encoded) > _HEADER.size - 8:
+            raise ValueError(f"Format of a shared snapshot is too long: {format!r}")
+
+        memory = shared_memory.SharedMemory(create=True,
+                                            size=_HEADER.size + len(items) * record.size)
+        try:
+            _HEADER.pack_into(memory.buf, 0, len(items), encoded)
+            if len(format) == 1:
+                struct.pack_into(f'{len(items)}{format}', memory.buf, _HEADER.size, *items)
+            else:
+                for i, item in enumerate(items):
+                    record.pack_into(memory.buf, _HEADER.size + i * record.size, *item)
+        except (struct.error, TypeError) as e:
+            memory.close()
+            memory.unlink()
+            raise ValueError(f"Items do not fit the format of a shared snapshot {format!r}") from e
+        return SharedSnapshot(memory, owner=True)
+
+    @staticmethod
+    def attach(name: str) -> SharedSnapshot:
+        """
+        Attaches to a block of shared memory (created by another process), by its name.
+
+        Notes:
+            Before Python 3.13, the block is also tracked by the resource tracker of the
+            attaching process, so processes not started by the owner (e.g., unlike the workers of
+            its pool) may unlink the block once they exit.
+
+        Args:
+            name: The name of the block (see `name`).
+
+        Raises:
+            FileNotFoundError: In case no such block exists (e.g., it was unlinked).
+        """
+        if sys.version_info >= (3, 13):
+            memory = shared_memory.SharedMemory(name, track=False)  # type: ignore # (3.13+)
+        else:
+            memory = shared_memory.SharedMemory(name)
+        return SharedSnapshot(memory, owner=False)
+
+    @property
+    def name(self) -> str:
+        """
+        The name of the block of shared memory, to attach to it from other processes.
+        """
+        return self._memory.name
+
+    def close(self) -> None:
+        """
+        Closes the view of the current process over the block (the block itself remains, until
+        unlinked). Elements can no longer be read through this view.
+        """
+        if self._closed:
+            return
+        if self._view is not None:
+            self._view.release()
+        self._data.release()
+        self._memory.close()
+        self._closed = True
+
+    def unlink(self) -> None:
+        """
+        Frees the block of shared memory, once all processes closed their views over it.
+        Should be called once, by the owner of the block.
+        """
+        self._memory.unlink()
+
+    def __enter__(self) -> SharedSnapshot:
+        return self
+
+    def __exit__(self,
+                 exc_type: Optional[Type[BaseException]],
+                 exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    def __reduce__(self) -> Any:
+        return SharedSnapshot.attach, (self.name,)
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> Any:
+        ...  # pragma: no cover
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Any]:
+        ...  # pragma: no cover
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        self._check_open()
+        if self._view is not None:
+            item = self._view[index]
+            return item.tolist() if isinstance(item, memoryview) else item
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("SharedSnapshot index out of range")
+        return self._record.unpack_from(self._data, index * self._record.size)
+
+    def __iter__(self) -> Iterator[Any]:
+        self._check_open()
+        if self._view is not None:
+            return iter(self._view)
+        return self._record.iter_unpack(self._data)
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise ValueError("Cannot read elements of a closed SharedSnapshot")
+
+    def __repr__(self) -> str:
+        return f"SharedSnapshot(name={self.name!r}, format={self.format!r}, length={len(self)})"
+
+
+def _inferred_format(items: Sequence[Any]) -> str:
+    types = set(map(type, items))
+    if types <= {int}:
+        return 'q'
+    if types == {bool}:
+        return '?'
+    if types <= {int, float}:
+        return 'd'
+    raise TypeError("Shared snapshots hold numbers, or fixed-width records given their format "
+                    "(e.g., format='qd' for tuples of an integer and a float)")
@@ -0,0 +1,19 @@
+import asyncio
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.async_iterator import AsyncIterator
+
+
+class TestAsyncDistinct:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi_dup())
+    def test_distinct_hasDuplicates_firstAppearances(self, iter_type, iterable, iterable_list):
+        query = q.aio(AsyncIterator(iterable)).distinct()
+
+        assert asyncio.run(query.to_list()) == list(dict.fromkeys(iterable_list))
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_distinct_emptySource_empty(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q.aio(AsyncIterator(iterable)).distinct().to_list()) == []
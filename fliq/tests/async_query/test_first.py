@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from fliq import q
+from fliq.exceptions import QueryIsUnexpectedlyEmptyException
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.async_iterator import AsyncIterator
+
+
+async def _greater_than_two(x):
+    return x > 2
+
+
+class TestAsyncFirst:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_first_hasItems_firstItem(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q.aio(AsyncIterator(iterable)).first()) == iterable_list[0]
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_first_emptySource_raisesEmptyException(self, iter_type, iterable, iterable_list):
+        with pytest.raises(QueryIsUnexpectedlyEmptyException):
+            asyncio.run(q.aio(AsyncIterator(iterable)).first())
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_first_emptySourceWithDefault_default(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q.aio(AsyncIterator(iterable)).first(default=None)) is None
+
+    def test_first_asyncPredicate_firstSatisfying(self):
+        assert asyncio.run(q.aio(AsyncIterator(range(10))).first(_greater_than_two)) == 3
+
+    def test_first_hasItems_sourcePulledOnceAndClosed(self):
+        source = AsyncIterator(range(10))
+
+        assert asyncio.run(q.aio(source).first()) == 0
+        assert source.count == 1
+        assert source.closed
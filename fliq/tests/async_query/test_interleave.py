@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.async_iterator import AsyncIterator
+
+
+async def _delayed(items, delay):
+    for item in items:
+        await asyncio.sleep(delay)
+        yield item
+
+
+class TestAsyncInterleave:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_interleave_allEmpty_empty(self, iter_type, iterable, iterable_list):
+        query = q.aio(AsyncIterator(iterable)).interleave(AsyncIterator([]))
+
+        assert asyncio.run(query.to_list()) == []
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_interleave_multipleSources_allItemsInSourceOrder(self,
+                                                              iter_type,
+                                                              iterable,
+                                                              iterable_list):
+        query = q.aio(AsyncIterator(iterable)).interleave(AsyncIterator('ab'), [-1, -2, -3])
+        items = asyncio.run(query.to_list())
+
+        assert sorted(items, key=str) == sorted([*iterable_list, 'a', 'b', -1, -2, -3], key=str)
+        assert [x for x in items if x in iterable_list] == iterable_list
+        assert [x for x in items if x in ('a', 'b')] == ['a', 'b']
+        assert [x for x in items if x in (-1, -2, -3)] == [-1, -2, -3]
+
+    def test_interleave_readySources_takeTurns(self):
+        assert asyncio.run(q.aio([1, 2, 3]).interleave([4], [5, 6]).to_list()) == [1, 4, 5, 2, 6, 3]
+
+    def test_interleave_weights_servedByWeightPerTurn(self):
+        query = q.aio(range(9)).interleave(range(100, 103), weights=[3, 1], buffer=20)
+
+        assert asyncio.run(query.to_list()) == [0, 1, 2, 100, 3, 4, 5, 101, 6, 7, 8, 102]
+
+    def test_interleave_slowSource_fastSourceNotStalled(self):
+        query = q.aio(_delayed(['slow'], 0.2)).interleave(_delayed(range(10), 0.001))
+
+        assert asyncio.run(query.take(10).to_list()) == list(range(10))
+
+    def test_interleave_earlyStop_sourcesNotPumpedFurther(self):
+        fast = AsyncIterator(range(1000))
+
+        async def run():
+            items = await q.aio(_delayed([], 0)).interleave(fast, buffer=2).take(3).to_list()
+            pulled = fast.count
+            await asyncio.sleep(0.01)
+            return items, pulled, fast.count
+
+        items, pulled, pulled_later = asyncio.run(run())
+
+        assert items == [0, 1, 2]
+        assert pulled <= 6
+        assert pulled_later == pulled
+
+    def test_interleave_sourceRaises_errorPropagated(self):
+        async def failing():
+            yield 1
+            raise KeyError('source failed')
+
+        query = q.aio(_delayed(range(100), 0.001)).interleave(failing())
+
+        with pytest.raises(KeyError):
+            asyncio.run(query.to_list())
+
+    @pytest.mark.parametrize("weights,buffer", [
+        ([1], 1),
+        ([1, 1, 1], 1),
+        ([0, 1], 1),
+        ([1, 1], 0),
+    ])
+    def test_interleave_invalidArguments_raisesValueError(self, weights, buffer):
+        with pytest.raises(ValueError):
+            q.aio([1]).interleave([2], weights=weights, buffer=buffer)
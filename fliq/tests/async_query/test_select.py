@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.async_iterator import AsyncIterator
+
+
+async def _double(x):
+    await asyncio.sleep(0)
+    return int(x) * 2
+
+
+class TestAsyncSelect:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_select_syncSelector_mapped(self, iter_type, iterable, iterable_list):
+        query = q.aio(AsyncIterator(iterable)).select(lambda x: int(x) * 2)
+
+        assert asyncio.run(query.to_list()) == [int(x) * 2 for x in iterable_list]
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_select_asyncSelector_mapped(self, iter_type, iterable, iterable_list):
+        query = q.aio(AsyncIterator(iterable)).select(_double)
+
+        assert asyncio.run(query.to_list()) == [int(x) * 2 for x in iterable_list]
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_select_emptySource_empty(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q.aio(AsyncIterator(iterable)).select(_double).to_list()) == []
+
+    def test_select_chained_appliedInOrder(self):
+        query = q.aio(AsyncIterator(range(3))).select(_double).select(str)
+
+        assert asyncio.run(query.to_list()) == ['0', '2', '4']
+
+    def test_select_selectorRaises_errorPropagated(self):
+        query = q.aio(AsyncIterator([1, 0])).select(lambda x: 1 / x)
+
+        with pytest.raises(ZeroDivisionError):
+            asyncio.run(query.to_list())
+
+    def test_select_concurrency_sameAsSequential(self):
+        query = q.aio(AsyncIterator(range(20))).select(_double, concurrency=5)
+
+        assert asyncio.run(query.to_list()) == [x * 2 for x in range(20)]
@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.async_iterator import AsyncIterator
+
+
+class TestAsyncSlide:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_slide_hasNoItems(self, iter_type, iterable, iterable_list):
+        query = q.aio(AsyncIterator(iterable)).slide(window=2, overlap=1)
+
+        assert asyncio.run(query.to_list()) == []
+
+    @pytest.mark.parametrize("window,overlap,pad", [
+        (2, 1, None),
+        (3, 1, None),
+        (4, 2, -1),
+        (3, 0, None),
+        (1, 0, None),
+    ])
+    @pytest.mark.parametrize("items", [[0], [0, 1, 2, 3], [0, 1, 2, 3, 4]])
+    def test_slide_sameAsSyncQuery(self, items, window, overlap, pad):
+        query = q.aio(AsyncIterator(items)).slide(window=window, overlap=overlap, pad=pad)
+
+        assert (asyncio.run(query.to_list()) ==
+                q(items).slide(window=window, overlap=overlap, pad=pad).to_list())
@@ -0,0 +1,26 @@
+import asyncio
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.async_iterator import AsyncIterator
+
+
+async def _double(x):
+    return x * 2
+
+
+class TestAsyncSum:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_sum_emptySource_accumulator(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q.aio(AsyncIterator(iterable)).sum(accumulator=5)) == 5
+
+    def test_sum_hasItems_sum(self):
+        assert asyncio.run(q.aio(AsyncIterator(range(5))).sum()) == 10
+
+    def test_sum_asyncSelector_sumOfSelected(self):
+        assert asyncio.run(q.aio(AsyncIterator(range(5))).sum(by=_double)) == 20
+
+    def test_sum_floats_sum(self):
+        assert asyncio.run(q.aio(AsyncIterator([0.5, 1.5])).sum(by=lambda x: x)) == 2.0
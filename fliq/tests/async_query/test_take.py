@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.async_iterator import AsyncIterator
+
+
+async def _is_odd(x):
+    return x % 2 == 1
+
+
+class TestAsyncTake:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_take_lessThanAvailable_firstN(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q.aio(AsyncIterator(iterable)).take(3).to_list()) == iterable_list[:3]
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_take_moreThanAvailable_allItems(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q.aio(AsyncIterator(iterable)).take(10).to_list()) == iterable_list
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_take_emptySource_empty(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q.aio(AsyncIterator(iterable)).take(2).to_list()) == []
+
+    def test_take_asyncPredicate_firstNSatisfying(self):
+        assert asyncio.run(q.aio(AsyncIterator(range(10))).take(2, _is_odd).to_list()) == [1, 3]
+
+    def test_take_zero_sourceNotPulled(self):
+        source = AsyncIterator(range(10))
+
+        assert asyncio.run(q.aio(source).take(0).to_list()) == []
+        assert source.count == 0
+
+    def test_take_n_sourcePulledOnlyAsNeededAndClosed(self):
+        source = AsyncIterator(range(10))
+
+        assert asyncio.run(q.aio(source).take(3).to_list()) == [0, 1, 2]
+        assert source.count == 3
+        assert source.closed
+
+    def test_take_negative_raisesValueError(self):
+        with pytest.raises(ValueError):
+            q.aio(AsyncIterator(range(3))).take(-1)
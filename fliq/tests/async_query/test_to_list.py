@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.async_iterator import AsyncIterator
+
+
+class TestAsyncToList:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_toList_asyncSource_allItems(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q.aio(AsyncIterator(iterable)).to_list()) == iterable_list
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_toList_syncSource_allItems(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q.aio(iterable).to_list()) == iterable_list
+
+    def test_toList_asyncGenerator_allItems(self):
+        async def numbers():
+            for i in range(3):
+                await asyncio.sleep(0)
+                yield i
+
+        assert asyncio.run(q.aio(numbers()).to_list()) == [0, 1, 2]
+
+    def test_asyncFor_asyncQuery_allItems(self):
+        async def collect():
+            return [x async for x in q.aio(AsyncIterator(range(3))).select(str)]
+
+        assert asyncio.run(collect()) == ['0', '1', '2']
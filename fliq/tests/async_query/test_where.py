@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.async_iterator import AsyncIterator
+
+
+async def _is_even(x):
+    await asyncio.sleep(0)
+    return int(x) % 2 == 0
+
+
+class TestAsyncWhere:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_where_syncPredicate_filtered(self, iter_type, iterable, iterable_list):
+        query = q.aio(AsyncIterator(iterable)).where(lambda x: int(x) % 2 == 0)
+
+        assert asyncio.run(query.to_list()) == [x for x in iterable_list if int(x) % 2 == 0]
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_where_asyncPredicate_filtered(self, iter_type, iterable, iterable_list):
+        query = q.aio(AsyncIterator(iterable)).where(_is_even)
+
+        assert asyncio.run(query.to_list()) == [x for x in iterable_list if int(x) % 2 == 0]
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_where_emptySource_empty(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q.aio(AsyncIterator(iterable)).where(_is_even).to_list()) == []
+
+    def test_where_noPredicate_sameItems(self):
+        assert asyncio.run(q.aio(AsyncIterator(range(3))).where().to_list()) == [0, 1, 2]
+
+    def test_where_syncSource_filtered(self):
+        assert asyncio.run(q.aio(range(5)).where(_is_even).to_list()) == [0, 2, 4]
+
+    def test_where_concurrency_sameAsSequential(self):
+        query = q.aio(AsyncIterator(range(20))).where(_is_even, concurrency=5)
+
+        assert asyncio.run(query.to_list()) == list(range(0, 20, 2))
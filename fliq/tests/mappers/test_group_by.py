@@ -12,7 +12,7 @@ class TestGroupBy:
     @pytest.mark.parametrize(Params.sig_iterable_obj, Params.iterable_obj_single())
     def test_groupBy_hasSingleItem_attributeDoesNotExist(self, iter_type, iterable):
         with pytest.raises(AttributeError):
-            q(iterable).group_by('id')
+            q(iterable).group_by('id').to_list()
 
     @pytest.mark.parametrize(Params.sig_iterable_obj, Params.iterable_obj_single())
     def test_groupBy_hasSingleItem_attributeExists_keyIsString(self, iter_type, iterable):
@@ -1,6 +1,7 @@
 import pytest
 
 from fliq import q
+from fliq import _optimizer, _plan
 from fliq.tests.fliq_test_utils import Params
 
 
@@ -34,3 +35,63 @@ class TestOrderBy:
         expected = list(sorted(iterable_list, key=lambda x: (int(x) % 2)))
         actual = list(q(iterable).order(by=lambda x: (int(x) % 2)))
         assert actual == expected
+
+    @pytest.mark.parametrize("ascending", [True, False])
+    @pytest.mark.parametrize("k", [0, 1, 3, 10])
+    def test_orderBy_take_sameAsFullSortStable(self, ascending, k):
+        items = [(i % 3, i) for i in range(8)]
+        expected = sorted(items, key=lambda x: x[0], reverse=not ascending)[:k]
+
+        actual = q(items).order(by=lambda x: x[0], ascending=ascending).take(k).to_list()
+
+        assert actual == expected
+
+    @pytest.mark.parametrize("ascending", [True, False])
+    @pytest.mark.parametrize("build", [
+        lambda items: items[:8],  # few elements, sorted
+        lambda items: items,  # many elements, selected using a heap
+        lambda items: iter(items[:8]),  # unknown length, selected using a heap
+    ])
+    def test_sortedHead_sortedOrHeap_sameAsFullSortStable(self, ascending, build):
+        items = [(i % 7, i) for i in range(500)]
+        expected = sorted(build(items), key=lambda x: x[0], reverse=not ascending)[:5]
+
+        assert _plan.sorted_head(build(items), 5, lambda x: x[0], ascending) == expected
+
+    @pytest.mark.parametrize("ascending", [True, False])
+    def test_orderBy_selectThenSlice_sameAsFullSort(self, ascending):
+        items = [5, 3, 8, 1, 9, 2, 7]
+        expected = [x * 10 for x in sorted(items, reverse=not ascending)][1:6:2]
+
+        actual = (q(iter(items))
+                  .order(ascending=ascending)
+                  .select(lambda x: x * 10)
+                  .slice(start=1, stop=6, step=2)
+                  .to_list())
+
+        assert actual == expected
+
+    @pytest.mark.parametrize("ascending", [True, False])
+    def test_orderBy_first_firstOfStableSort(self, ascending):
+        items = [(1, 'a'), (0, 'b'), (1, 'c'), (0, 'd')]
+        expected = sorted(items, key=lambda x: x[0], reverse=not ascending)[0]
+
+        assert q(items).order(by=lambda x: x[0], ascending=ascending).first() == expected
+
+    @pytest.mark.parametrize("index", [0, 2, 3, -1])
+    def test_orderBy_at_sameAsFullSort(self, index):
+        items = [(1, 'a'), (0, 'b'), (1, 'c'), (0, 'd')]
+        expected = sorted(items, key=lambda x: x[0])[index]
+
+        assert q(items).order(by=lambda x: x[0]).at(index) == expected
+
+    def test_orderBy_iteratedAfterFirst_restStillSorted(self):
+        query = q([3, 1, 2, 0]).order()
+
+        assert query.first() == 0
+        assert query.to_list() == [1, 2, 3]
+
+    def test_orderBy_take_boundedSelection(self):
+        plan = [_plan.Order(by=None, ascending=True), _plan.Select(str), _plan.Slice(0, 5, 1)]
+
+        assert repr(_optimizer.top_k(plan)[0]) == "Order(limit=5)"
@@ -47,7 +47,7 @@ class TestReverse:
             return
 
         with pytest.raises(TypeError):
-            q(iterable).reverse()
+            q(iterable).reverse().to_list()
 
     @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_single())
     def test_reverse_irreversible_single(self,
@@ -58,7 +58,7 @@ class TestReverse:
             return
 
         with pytest.raises(TypeError):
-            q(iterable).reverse()
+            q(iterable).reverse().to_list()
 
     @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
     def test_reverse_irreversible_multi(self,
@@ -69,4 +69,4 @@ class TestReverse:
             return
 
         with pytest.raises(TypeError):
-            q(iterable).reverse()
+            q(iterable).reverse().to_list()
@@ -0,0 +1,173 @@
+import asyncio
+import itertools
+import time
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+
+async def _get_a(x):
+    await asyncio.sleep(0)
+    return x.a
+
+
+async def _double(x):
+    return x * 2
+
+
+def _slow(x):
+    time.sleep(0.001)
+    return x
+
+
+class TestSelectAsync:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_selectAsync_hasNoItems(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q(iterable).select_async(_get_a).to_list()) == []
+
+    @pytest.mark.parametrize(Params.sig_iterable_obj, Params.iterable_obj_single())
+    def test_selectAsync_hasSingleItem(self, iter_type, iterable):
+        assert asyncio.run(q(iterable).select_async(_get_a).to_list()) == [0]
+
+    @pytest.mark.parametrize(Params.sig_iterable_obj, Params.iterable_obj_multi())
+    def test_selectAsync_hasMultipleItems(self, iter_type, iterable):
+        results = asyncio.run(q(iterable).select_async(_get_a, concurrency=2).to_list())
+
+        assert sorted(results) == [0, 1, 2, 3, 4]
+
+    def test_selectAsync_syncSelector_mapped(self):
+        assert asyncio.run(q(range(3)).select_async(lambda x: x * 2).to_list()) == [0, 2, 4]
+
+    def test_selectAsync_slowFirstElement_orderPreserved(self):
+        async def selector(x):
+            await asyncio.sleep(0.05 if x == 0 else 0)
+            return x
+
+        query = q(range(10)).select_async(selector, concurrency=4)
+
+        assert asyncio.run(query.to_list()) == list(range(10))
+
+    def test_selectAsync_unordered_readyResultsFirst(self):
+        async def selector(x):
+            await asyncio.sleep(0.05 if x == 0 else 0)
+            return x
+
+        results = asyncio.run(q(range(4)).select_async(selector, ordered=False).to_list())
+
+        assert sorted(results) == [0, 1, 2, 3]
+        assert results[-1] == 0
+
+    @pytest.mark.parametrize("ordered", [True, False])
+    def test_selectAsync_concurrency_boundsRunningCalls(self, ordered):
+        running = []
+        peak = []
+
+        async def selector(x):
+            running.append(x)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(x)
+            return x
+
+        query = q(range(20)).select_async(selector, concurrency=4, ordered=ordered)
+
+        assert sorted(asyncio.run(query.to_list())) == list(range(20))
+        assert max(peak) == 4
+
+    def test_selectAsync_ioBound_runsConcurrently(self):
+        async def selector(x):
+            await asyncio.sleep(0.05)
+            return x
+
+        async def timed():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            results = await q(range(50)).select_async(selector, concurrency=50).to_list()
+            return results, loop.time() - start
+
+        results, elapsed = asyncio.run(timed())
+
+        assert results == list(range(50))
+        assert elapsed < 1
+
+    def test_selectAsync_source_pulledOnlyAsNeeded(self):
+        tracking_iterable = TrackingIterator(range(100))
+
+        async def first_item():
+            return await q(tracking_iterable).select_async(_double, concurrency=4).first()
+
+        assert asyncio.run(first_item()) == 0
+        # up to a window of calls, and a batch pulled to refill it
+        assert tracking_iterable.count <= 8
+
+    @pytest.mark.parametrize("batch_size", [1, 3, 100])
+    def test_selectAsync_batchSizes_sameAsSync(self, batch_size):
+        query = q(range(10)).order(lambda x: -x).select_async(_double, batch_size=batch_size)
+
+        assert asyncio.run(query.to_list()) == [x * 2 for x in range(9, -1, -1)]
+
+    def test_selectAsync_batchSizeOne_sourcePulledOnlyAsNeeded(self):
+        tracking_iterable = TrackingIterator(range(100))
+
+        async def first_item():
+            return await q(tracking_iterable).select_async(_double, concurrency=4,
+                                                           batch_size=1).first()
+
+        assert asyncio.run(first_item()) == 0
+        assert tracking_iterable.count <= 6
+
+    def test_selectAsync_cpuBoundSource_loopNotBlocked(self):
+        async def run():
+            ticks = 0
+            task = asyncio.ensure_future(
+                q(range(100)).select(_slow).select_async(_double, batch_size=10).to_list())
+            while not task.done():
+                ticks += 1
+                await asyncio.sleep(0.001)
+            return await task, ticks
+
+        items, ticks = asyncio.run(run())
+
+        assert items == [x * 2 for x in range(100)]
+        assert ticks >= 10
+
+    def test_selectAsync_infiniteSource_takeTerminates(self):
+        query = q(itertools.count()).select_async(_double, concurrency=8).take(3)
+
+        assert asyncio.run(query.to_list()) == [0, 2, 4]
+
+    def test_selectAsync_consumerStops_pendingCallsCancelled(self):
+        started = []
+        cancelled = []
+
+        async def selector(x):
+            started.append(x)
+            try:
+                await asyncio.sleep(0 if x == 0 else 10)
+            except asyncio.CancelledError:
+                cancelled.append(x)
+                raise
+            return x
+
+        query = q(range(10)).select_async(selector, concurrency=4)
+
+        assert asyncio.run(query.first()) == 0
+        assert len(started) == len(cancelled) + 1
+
+    def test_selectAsync_selectorRaises_errorPropagated(self):
+        async def selector(x):
+            return 1 / x
+
+        with pytest.raises(ZeroDivisionError):
+            asyncio.run(q([1, 0, 2]).select_async(selector, concurrency=2).to_list())
+
+    def test_selectAsync_nonPositiveConcurrency_raisesValueError(self):
+        with pytest.raises(ValueError):
+            q([1]).select_async(_double, concurrency=0)
+
+    def test_selectAsync_nonPositiveBatchSize_raisesValueError(self):
+        with pytest.raises(ValueError):
+            q([1]).select_async(_double, batch_size=0)
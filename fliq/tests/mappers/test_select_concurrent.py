@@ -0,0 +1,104 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+
+class TestSelectConcurrent:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_selectConcurrent_hasNoItems(self, iter_type, iterable, iterable_list):
+        assert list(q(iterable).select_concurrent(lambda x: x.a)) == []
+
+    @pytest.mark.parametrize(Params.sig_iterable_obj, Params.iterable_obj_single())
+    def test_selectConcurrent_hasSingleItem(self, iter_type, iterable):
+        assert list(q(iterable).select_concurrent(lambda x: x.a)) == [0]
+
+    @pytest.mark.parametrize(Params.sig_iterable_obj, Params.iterable_obj_multi())
+    def test_selectConcurrent_hasMultipleItems(self, iter_type, iterable):
+        assert list(q(iterable).select_concurrent(lambda x: x.a, max_workers=2)) == [0, 1, 2, 3, 4]
+
+    def test_selectConcurrent_slowFirstElement_orderPreserved(self):
+        def selector(x):
+            time.sleep(0.05 if x == 0 else 0)
+            return x
+
+        assert q(range(10)).select_concurrent(selector, max_workers=4).to_list() == list(range(10))
+
+    def test_selectConcurrent_unordered_readyResultsFirst(self):
+        def selector(x):
+            time.sleep(0.1 if x == 0 else 0)
+            return x
+
+        results = q(range(4)).select_concurrent(selector, max_workers=4, ordered=False).to_list()
+
+        assert sorted(results) == [0, 1, 2, 3]
+        assert results[-1] == 0
+
+    def test_selectConcurrent_ioBound_runsConcurrently(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def selector(x):
+            with lock:
+                running.append(x)
+                peak.append(len(running))
+            time.sleep(0.01)
+            with lock:
+                running.remove(x)
+            return x
+
+        q(range(20)).select_concurrent(selector, max_workers=4).to_list()
+
+        assert max(peak) == 4
+
+    def test_selectConcurrent_infiniteIterable_boundedInFlight(self):
+        tracking_iterable = TrackingIterator(itertools.count())
+        query = q(tracking_iterable).select_concurrent(lambda x: x * 2, max_workers=2,
+                                                       max_in_flight=5)
+
+        assert [next(query) for _ in range(3)] == [0, 2, 4]
+        # the consumed elements, and a full window of in flight elements
+        assert tracking_iterable.count <= 3 + 5
+
+    def test_selectConcurrent_take_onlyTakenSelected(self):
+        called = []
+
+        def selector(x):
+            called.append(x)
+            return x
+
+        assert q(range(100)).select_concurrent(selector).take(3).to_list() == [0, 1, 2]
+        assert sorted(called) == [0, 1, 2]
+
+    def test_selectConcurrent_consumerStops_pendingCancelled(self):
+        called = []
+
+        def selector(x):
+            called.append(x)
+            time.sleep(0.01)
+            return x
+
+        query = q(range(100)).select_concurrent(selector, max_workers=1, max_in_flight=4)
+        assert next(query) == 0
+        del query
+        time.sleep(0.05)
+
+        # at most the window (and the running call), rather than all elements
+        assert len(called) <= 6
+
+    def test_selectConcurrent_selectorRaises_errorPropagated(self):
+        query = q([1, 0, 2]).select_concurrent(lambda x: 1 / x, max_workers=2)
+
+        with pytest.raises(ZeroDivisionError):
+            query.to_list()
+
+    @pytest.mark.parametrize("kwargs", [{'max_workers': 0}, {'max_in_flight': 0}])
+    def test_selectConcurrent_invalidArguments_raisesValueError(self, kwargs):
+        with pytest.raises(ValueError):
+            q([]).select_concurrent(lambda x: x, **kwargs)
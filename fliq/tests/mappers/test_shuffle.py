@@ -21,7 +21,7 @@ class TestShuffle:
                                             iterable_list):
         if iter_type == 'generator':
             with pytest.raises(TypeError):
-                q(iterable).shuffle(fair=True)
+                q(iterable).shuffle(fair=True).to_list()
         else:
             assert q(iterable).shuffle(fair=True) == iterable_list
 
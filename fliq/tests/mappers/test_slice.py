@@ -46,4 +46,32 @@ class TestSlice:
 
     # start, stop, step
     def test_skip_hasMultipleItems_startStopStep(self):
-        assert list(q(range(10)).slice(start=1, stop=6, step=2)) == [1, 3, 5]
\ No newline at end of file
+        assert list(q(range(10)).slice(start=1, stop=6, step=2)) == [1, 3, 5]
+
+    @pytest.mark.parametrize("create", [list, tuple, lambda items: items, iter],
+                             ids=["list", "tuple", "range", "iterator"])
+    @pytest.mark.parametrize("start,stop,step", [
+        (0, None, 1), (15, None, 1), (15, 17, 1), (3, 30, 4), (19, 5, 2), (25, None, 1)
+    ])
+    def test_slice_sequenceOrIterator_sameElements(self, create, start, stop, step):
+        expected = list(range(20))[start:stop:step]
+
+        actual = q(create(range(20))).slice(start=start, stop=stop, step=step).to_list()
+
+        assert actual == expected
+
+    def test_slice_afterSelect_slicedOutNotSelected(self):
+        selected = []
+
+        def selector(x):
+            selected.append(x)
+            return x * 10
+
+        result = q(range(100)).select(selector).select(str).skip(90).take(3).to_list()
+
+        assert result == ['900', '910', '920']
+        assert selected == [90, 91, 92]
+
+    def test_slice_negativeStart_raisesValueError(self):
+        with pytest.raises(ValueError):
+            q([1, 2, 3]).select(str).slice(start=-1).to_list()
@@ -8,6 +8,9 @@ class TestTop:
     def test_top_topZero(self):
         assert q(range(10)).top(n=0) == []
 
+    def test_top_topZero_afterAppend(self):
+        assert q(range(10)).append(10).top(n=0) == []
+
     @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
     def test_top_hasNoItems(self,
                             iter_type,
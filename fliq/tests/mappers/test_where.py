@@ -40,3 +40,44 @@ class TestWhere:
                                                   iterable_list):
         query = q(iterable).where(lambda x: int(x) > 2)
         assert list(query) == iterable_list[3:]
+
+    @pytest.mark.parametrize("ascending", [True, False])
+    def test_where_afterOrder_onlyFilteredSorted(self, ascending):
+        keyed = []
+
+        def key(x):
+            keyed.append(x)
+            return x
+
+        query = q(range(10)).order(by=key, ascending=ascending).where(lambda x: x % 3 == 0)
+
+        assert query.to_list() == sorted([0, 3, 6, 9], reverse=not ascending)
+        assert keyed == [0, 3, 6, 9]
+
+    @pytest.mark.parametrize("build", [
+        lambda query: query.select(lambda x: x).reverse(),
+        lambda query: query.shuffle(fair=False),
+    ])
+    def test_where_afterReorderingMapper_sameElements(self, build):
+        actual = build(q(range(10))).where(lambda x: x % 3 == 0).to_list()
+
+        assert sorted(actual) == [0, 3, 6, 9]
+
+    def test_where_afterOrder_sameAsFilteringSorted(self):
+        items = [(i % 4, i) for i in range(20)]
+        expected = [x for x in sorted(items, key=lambda x: x[0]) if x[1] % 3 != 0]
+
+        actual = q(items).order(by=lambda x: x[0]).where(lambda x: x[1] % 3 != 0).to_list()
+
+        assert actual == expected
+
+    def test_where_afterSeededShuffle_notReordered(self):
+        expected = [x for x in q(range(20)).shuffle(seed=42, fair=False) if x % 2 == 0]
+
+        actual = q(range(20)).shuffle(seed=42, fair=False).where(lambda x: x % 2 == 0).to_list()
+
+        assert actual == expected
+
+    def test_where_afterReversedSource_irreversibleStillRaises(self):
+        with pytest.raises(TypeError):
+            q({1, 2, 3}).reverse().where(lambda x: x > 1).to_list()
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+
+
+async def _is_even(x):
+    await asyncio.sleep(0)
+    return int(x) % 2 == 0
+
+
+def _slow(x):
+    time.sleep(0.001)
+    return x
+
+
+class TestWhereAsync:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_whereAsync_hasNoItems(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q(iterable).where_async(_is_even).to_list()) == []
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_whereAsync_hasMultipleItems(self, iter_type, iterable, iterable_list):
+        query = q(iterable).where_async(_is_even, concurrency=2)
+
+        assert asyncio.run(query.to_list()) == [x for x in iterable_list if int(x) % 2 == 0]
+
+    def test_whereAsync_syncPredicate_filtered(self):
+        assert asyncio.run(q(range(5)).where_async(lambda x: x > 2).to_list()) == [3, 4]
+
+    def test_whereAsync_unordered_readyElementsFirst(self):
+        async def predicate(x):
+            await asyncio.sleep(0.05 if x == 0 else 0)
+            return True
+
+        results = asyncio.run(q(range(4)).where_async(predicate, ordered=False).to_list())
+
+        assert sorted(results) == [0, 1, 2, 3]
+        assert results[-1] == 0
+
+    def test_whereAsync_asyncIteration_sameItems(self):
+        async def collect():
+            return [x async for x in q(range(6)).where_async(_is_even, concurrency=3)]
+
+        assert asyncio.run(collect()) == [0, 2, 4]
+
+    def test_whereAsync_nonPositiveConcurrency_raisesValueError(self):
+        with pytest.raises(ValueError):
+            q([1]).where_async(_is_even, concurrency=-1)
+
+    def test_whereAsync_nonPositiveBatchSize_raisesValueError(self):
+        with pytest.raises(ValueError):
+            q([1]).where_async(_is_even, batch_size=-1)
+
+    @pytest.mark.parametrize("batch_size", [1, 3, 100])
+    def test_whereAsync_batchSizes_sameAsSync(self, batch_size):
+        query = q(range(10)).order(lambda x: -x).where_async(_is_even, batch_size=batch_size)
+
+        assert asyncio.run(query.to_list()) == [8, 6, 4, 2, 0]
+
+    def test_whereAsync_cpuBoundSource_loopNotBlocked(self):
+        async def run():
+            ticks = 0
+            task = asyncio.ensure_future(
+                q(range(100)).select(_slow).where_async(_is_even, batch_size=10).to_list())
+            while not task.done():
+                ticks += 1
+                await asyncio.sleep(0.001)
+            return await task, ticks
+
+        items, ticks = asyncio.run(run())
+
+        assert items == list(range(0, 100, 2))
+        assert ticks >= 10
@@ -1,3 +1,5 @@
+from operator import length_hint
+
 import pytest
 
 from fliq import q
@@ -60,3 +62,11 @@ class TestZip:
         query = q(range(5))
         zipped = query.zip(range(3))
         assert list(zipped) == [(0, 0), (1, 1), (2, 2)]
+
+    @pytest.mark.parametrize("longest", [False, True])
+    def test_zip_noIterables_lengthOfQuery(self, longest):
+        query = q([1, 2, 3]).zip(longest=longest)
+
+        assert query.count() == 3
+        assert length_hint(query) == 3
+        assert len(list(q([1, 2, 3]).zip(longest=longest))) == 3
@@ -16,3 +16,19 @@ class TestCount:
     @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
     def test_get_hasMultipleItems(self, iter_type, iterable, iterable_list):
         assert q(iterable).count() == len(iterable_list)
+
+    @pytest.mark.parametrize("build, expected", [
+        (lambda query: query.select(lambda x: 1 / 0), 10),
+        (lambda query: query.order(by=lambda x: 1 / 0).take(3), 3),
+        (lambda query: query.select(lambda x: 1 / 0).slice(1, 8, 2), 4),
+        (lambda query: query.zip(range(4)).reverse(), 4),
+        (lambda query: query.append_many([1, 2]).prepend(0), 13),
+        (lambda query: query.slide(window=3, overlap=1), 5),
+        (lambda query: query.interleave([1, 2], 'abc'), 15),
+        (lambda query: query.top(20, by=lambda x: 1 / 0), 10),
+    ])
+    def test_count_lengthKnownFromPlan_notIterated(self, build, expected):
+        assert build(q(range(10))).count() == expected
+
+    def test_count_lengthUnknownFromPlan_iterated(self):
+        assert q(range(10)).where(lambda x: x % 2 == 0).distinct().count() == 5
@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+
+class TestCountAsync:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_countAsync_hasNoItems(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q(iterable).count_async()) == 0
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_countAsync_hasMultipleItems(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q(iterable).count_async(batch_size=2)) == len(iterable_list)
+
+    @pytest.mark.parametrize("batch_size", [1, 4, 5, 6])
+    def test_countAsync_filtered_counted(self, batch_size):
+        query = q(range(20)).where(lambda x: x % 4 == 0)
+
+        assert asyncio.run(query.count_async(batch_size)) == 5
+
+    def test_countAsync_knownLength_notIterated(self):
+        tracking_iterable = TrackingIterator([1, 2, 3])
+        query = q([1, 2, 3]).select(lambda x: next(tracking_iterable))
+
+        assert asyncio.run(query.count_async()) == 3
+        assert tracking_iterable.count == 0
@@ -0,0 +1,72 @@
+import asyncio
+import itertools
+import time
+
+import pytest
+
+from fliq import q
+from fliq.exceptions import QueryIsUnexpectedlyEmptyException
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+
+def _slow_never(x):
+    time.sleep(0.001)
+    return False
+
+
+class TestFirstAsync:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_firstAsync_hasNoItems_defaultProvided(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q(iterable).first_async(default=-1)) == -1
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_firstAsync_hasNoItems_raisesEmptyException(self, iter_type, iterable, iterable_list):
+        with pytest.raises(QueryIsUnexpectedlyEmptyException):
+            asyncio.run(q(iterable).first_async())
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_firstAsync_hasMultipleItems(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q(iterable).first_async()) == iterable_list[0]
+
+    def test_firstAsync_predicate_firstSatisfying(self):
+        assert asyncio.run(q(itertools.count()).first_async(lambda x: x > 5)) == 6
+
+    @pytest.mark.parametrize("batch_size", [1, 3, 1000])
+    def test_firstAsync_predicate_sameAsFirst(self, batch_size):
+        items = list(range(10))
+        assert asyncio.run(q(items).first_async(lambda x: x > 5, batch_size=batch_size)) == \
+            q(items).first(lambda x: x > 5)
+
+    def test_firstAsync_predicateNeverSatisfied_default(self):
+        assert asyncio.run(q(range(10)).first_async(lambda x: x > 20, default=-1,
+                                                     batch_size=3)) == -1
+
+    def test_firstAsync_invalidBatchSize_raisesValueError(self):
+        with pytest.raises(ValueError):
+            asyncio.run(q(range(10)).first_async(batch_size=0))
+
+    def test_firstAsync_found_noFurtherBatches(self):
+        tracking_iterable = TrackingIterator(itertools.count())
+
+        assert asyncio.run(q(tracking_iterable).first_async(lambda x: x == 7, batch_size=5)) == 7
+        assert tracking_iterable.count == 10
+
+    def test_firstAsync_cancelled_noFurtherBatches(self):
+        tracking_iterable = TrackingIterator(itertools.count())
+
+        async def run():
+            task = asyncio.ensure_future(
+                q(tracking_iterable).first_async(_slow_never, batch_size=5))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            # let a batch that already started complete
+            await asyncio.sleep(0.05)
+            return tracking_iterable.count
+
+        pulled = asyncio.run(run())
+        time.sleep(0.05)
+
+        assert tracking_iterable.count == pulled
@@ -12,7 +12,7 @@ class TestMostCommon:
                                                              iterable,
                                                              iterable_list):
         with pytest.raises(NotEnoughElementsException):
-            q(iterable).most_common()
+            q(iterable).most_common().to_list()
 
     @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
     def test_mostCommon_hasNoItems_multiMostCommonRequests(self,
@@ -20,7 +20,7 @@ class TestMostCommon:
                                                            iterable,
                                                            iterable_list):
         with pytest.raises(NotEnoughElementsException):
-            q(iterable).most_common(n=2)
+            q(iterable).most_common(n=2).to_list()
 
     @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_single())
     def test_mostCommon_hasSingleItem_singleRequested(self,
@@ -35,7 +35,7 @@ class TestMostCommon:
                                                      iterable,
                                                      iterable_list):
         with pytest.raises(NotEnoughElementsException):
-            q(iterable).most_common(n=2)
+            q(iterable).most_common(n=2).to_list()
 
     @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
     def test_mostCommon_hasMultipleItems_multiRequested(self,
@@ -34,3 +34,15 @@ class TestToDict:
             True: [MyTestClass(0, 0), MyTestClass(2, 2 * 2), MyTestClass(4, 4 * 2)],
             False: [MyTestClass(1, 1 * 2), MyTestClass(3, 3 * 2)],
         }
+
+    def test_toDict_combine_groupsCombined(self):
+        assert q(range(10)).to_dict(lambda x: x % 3, combine=lambda a, b: a + b) == {
+            0: 0 + 3 + 6 + 9,
+            1: 1 + 4 + 7,
+            2: 2 + 5 + 8,
+        }
+
+    def test_toDict_combine_leftToRightInOrderOfFirstAppearance(self):
+        groups = q('bacab').to_dict(lambda x: x, combine=lambda a, b: a + b.upper())
+
+        assert list(groups.items()) == [('b', 'bB'), ('a', 'aA'), ('c', 'c')]
@@ -0,0 +1,38 @@
+import asyncio
+from collections import defaultdict
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+
+
+class TestToDictAsync:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_toDictAsync_hasNoItems(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q(iterable).to_dict_async(key=lambda x: x)) == {}
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi_dup())
+    def test_toDictAsync_hasMultipleItems_sameAsSync(self, iter_type, iterable, iterable_list):
+        expected = q(iterable_list).to_dict(key=lambda x: int(x) % 2)
+
+        assert asyncio.run(q(iterable).to_dict_async(key=lambda x: int(x) % 2,
+                                                     batch_size=2)) == expected
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi_dup())
+    def test_toDictAsync_combine_sameAsSync(self, iter_type, iterable, iterable_list):
+        expected = q(iterable_list).to_dict(key=lambda x: int(x) % 2, combine=lambda a, b: a + b)
+
+        assert asyncio.run(q(iterable).to_dict_async(key=lambda x: int(x) % 2,
+                                                     combine=lambda a, b: a + b,
+                                                     batch_size=2)) == expected
+
+    @pytest.mark.parametrize(Params.sig_iterable_obj, Params.iterable_obj_multi())
+    def test_toDictAsync_attributeKey_groupedByAttribute(self, iter_type, iterable):
+        groups = asyncio.run(q(iterable).to_dict_async(key='b', batch_size=3))
+
+        assert sorted(groups) == [0, 2, 4, 6, 8]
+        assert all(item.b == key for key, items in groups.items() for item in items)
+
+    def test_toDictAsync_plainDict(self):
+        assert not isinstance(asyncio.run(q([1]).to_dict_async(key=str)), defaultdict)
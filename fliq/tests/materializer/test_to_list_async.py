@@ -0,0 +1,75 @@
+import asyncio
+import itertools
+import time
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+
+def _slow(x):
+    time.sleep(0.001)
+    return x
+
+
+class TestToListAsync:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_toListAsync_hasNoItems(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q(iterable).to_list_async()) == iterable_list
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_single())
+    def test_toListAsync_hasSingleItem(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q(iterable).to_list_async()) == iterable_list
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_toListAsync_hasMultipleItems(self, iter_type, iterable, iterable_list):
+        assert asyncio.run(q(iterable).to_list_async(batch_size=2)) == iterable_list
+
+    @pytest.mark.parametrize("batch_size", [1, 3, 10, 11, 1000])
+    def test_toListAsync_batchSizes_sameAsSync(self, batch_size):
+        query = q(range(10)).order(lambda x: -x).select(str)
+
+        assert asyncio.run(query.to_list_async(batch_size)) == [str(x) for x in range(9, -1, -1)]
+
+    def test_toListAsync_cpuBoundPipeline_loopNotBlocked(self):
+        async def run():
+            ticks = 0
+            task = asyncio.ensure_future(q(range(100)).select(_slow).to_list_async(batch_size=10))
+            while not task.done():
+                ticks += 1
+                await asyncio.sleep(0.001)
+            return await task, ticks
+
+        items, ticks = asyncio.run(run())
+
+        assert items == list(range(100))
+        assert ticks >= 10
+
+    def test_toListAsync_cancelled_noFurtherBatches(self):
+        tracking_iterable = TrackingIterator(itertools.count())
+
+        async def run():
+            task = asyncio.ensure_future(
+                q(tracking_iterable).select(_slow).to_list_async(batch_size=5))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            # let a batch that already started complete
+            await asyncio.sleep(0.05)
+            return tracking_iterable.count
+
+        pulled = asyncio.run(run())
+        time.sleep(0.05)
+
+        assert tracking_iterable.count == pulled
+
+    def test_toListAsync_nonPositiveBatchSize_raisesValueError(self):
+        with pytest.raises(ValueError):
+            asyncio.run(q([1]).to_list_async(batch_size=0))
+
+    def test_toListAsync_mapperRaises_errorPropagated(self):
+        with pytest.raises(ZeroDivisionError):
+            asyncio.run(q([1, 0]).select(lambda x: 1 / x).to_list_async())
@@ -0,0 +1,90 @@
+import logging
+
+import pytest
+
+from fliq import q
+from fliq import _optimizer, _plan
+from fliq.tests.fliq_test_utils import Params
+
+
+class TestAdaptive:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_adaptive_multipleFilters_sameAsDeclaredOrder(self, iter_type, iterable, iterable_list):
+        def build(query):
+            return (query
+                    .where(lambda x: int(x) > 0)
+                    .exclude(lambda x: int(x) == 3)
+                    .select(int)
+                    .where(lambda x: x % 2 == 0)
+                    .where(lambda x: x < 4))
+
+        assert (build(q(iterable).adaptive(sample_size=2)).to_list()
+                == build(q(iterable_list)).to_list())
+
+    def test_adaptive_filterRun_replacedByAdaptiveNode(self):
+        plan = [
+            _plan.Where(lambda x: x > 0),
+            _plan.Exclude(lambda x: x == 3),
+            _plan.Select(str),
+            _plan.Where(bool),
+        ]
+
+        optimized = _optimizer.optimize(plan, adaptive_sample=10)
+
+        assert [repr(node) for node in optimized] == [
+            "AdaptiveFilter(where, exclude)", "Select", "Where"
+        ]
+
+    def test_adaptive_selectiveFilterLast_calledFirstAfterSample(self):
+        calls = []
+
+        def unselective(x):
+            calls.append(x)
+            return True
+
+        query = q(range(1000)).adaptive(sample_size=10).where(unselective).where(lambda x: x < 5)
+
+        assert query.to_list() == [0, 1, 2, 3, 4]
+        # called for every sampled element, and only for kept ones after
+        assert calls == list(range(10))
+
+    def test_adaptive_chosenOrder_visibleForDebugging(self, caplog):
+        node = _plan.AdaptiveFilter(
+            [_plan.Where(lambda x: True), _plan.Exclude(lambda x: x % 2 == 0)], sample_size=4)
+
+        with caplog.at_level(logging.DEBUG, logger='fliq._plan'):
+            assert list(node.lower(range(10))) == [1, 3, 5, 7, 9]
+
+        assert node.order == [1, 0]
+        assert repr(node) == "AdaptiveFilter(exclude#1, where#0)"
+        assert "exclude#1" in caplog.text
+
+    def test_adaptive_reorderedPredicateRaises_declaredOrderUsed(self):
+        items = [1, 2, 3, None, 4]
+        query = (q(items)
+                 .adaptive(sample_size=3)
+                 .where(lambda x: x is not None)
+                 .where(lambda x: x % 2 == 0))
+
+        assert query.to_list() == [2, 4]
+
+    def test_adaptive_declaredOrderRaises_errorPropagated(self):
+        query = (q([1, 5, 6, 3])
+                 .adaptive(sample_size=2)
+                 .where(lambda x: 1 / (x - 3) != 0)
+                 .where(lambda x: x < 4))
+
+        with pytest.raises(ZeroDivisionError):
+            query.to_list()
+
+    def test_adaptive_snapped_enabledForBranches(self):
+        query = q(range(10)).adaptive(sample_size=2).snap()
+        branch = query.where(lambda x: x > 2).where(lambda x: x % 2 == 0)
+
+        assert branch._adaptive_sample == 2
+        assert branch.to_list() == [4, 6, 8]
+
+    @pytest.mark.parametrize("sample_size", [0, -1])
+    def test_adaptive_invalidSampleSize_raisesValueError(self, sample_size):
+        with pytest.raises(ValueError):
+            q([]).adaptive(sample_size)
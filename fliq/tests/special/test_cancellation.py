@@ -0,0 +1,187 @@
+import threading
+import time
+from itertools import count
+
+import pytest
+
+from fliq import q, CancelToken
+from fliq.exceptions import QueryCancelledException, BaseQueryException
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+
+def _slow(x):
+    time.sleep(0.001)
+    return x
+
+
+def _cancel_soon(token, seconds=0.05):
+    timer = threading.Timer(seconds, token.cancel)
+    timer.start()
+    return timer
+
+
+class TestCancellation:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_withDeadline_notExceeded_sameElements(self, iter_type, iterable, iterable_list):
+        query = q(iterable).with_deadline(60).select(lambda x: x).where(lambda x: True).order()
+
+        assert query.to_list() == sorted(iterable_list)
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_withCancel_notCancelled_sameElements(self, iter_type, iterable, iterable_list):
+        assert q(iterable).with_cancel(CancelToken()).distinct().to_list() == iterable_list
+
+    @pytest.mark.parametrize("materialize", [
+        lambda query: query.to_list(),
+        lambda query: query.order().to_list(),
+        lambda query: query.group_by(lambda x: x % 3).to_list(),
+        lambda query: query.to_dict(lambda x: x % 3),
+        lambda query: query.top(3).to_list(),
+        lambda query: query.shuffle(buffer_size=100).to_list(),
+        lambda query: query.sample(5, budget_factor=None, stop_factor=None),
+        lambda query: query.where(lambda x: x < 0).first(default=None),
+        lambda query: query.where(lambda x: True).count(),
+        lambda query: query.sum(),
+    ])
+    def test_withDeadline_exceeded_raisedWithinStage(self, materialize):
+        # about 5 seconds of work, aborted after 0.05 seconds
+        query = q(list(range(5000))).with_deadline(0.05).select(_slow)
+
+        start = time.perf_counter()
+        with pytest.raises(QueryCancelledException, match="deadline"):
+            materialize(query)
+        assert time.perf_counter() - start < 1
+
+    @pytest.mark.parametrize("materialize, expected", [
+        (lambda query: query.shuffle(fair=True, seed=1).order().to_list(), [0, 1, 2, 3]),
+        (lambda query: query.reverse().to_list(), [3, 2, 1, 0]),
+        (lambda query: query.order().max(), 3),
+        (lambda query: query.order().contains(2), True),
+        (lambda query: query.count(), 4),
+    ])
+    def test_withDeadline_sequenceSource_sequenceMappersSupported(self, materialize, expected):
+        assert materialize(q([0, 1, 2, 3]).with_deadline(60)) == expected
+
+    @pytest.mark.parametrize("with_budget", [
+        lambda query: query.with_deadline(60),
+        lambda query: query.with_cancel(CancelToken()),
+    ], ids=["deadline", "cancel"])
+    @pytest.mark.parametrize("build", [
+        lambda query: query,
+        lambda query: query.zip(range(10)),
+        lambda query: query.interleave(range(10, 13)),
+        lambda query: query.shuffle(seed=42),
+        lambda query: query.distinct(),
+        lambda query: query.pipelined(buffer=2),
+        lambda query: query.order().reverse(),
+    ])
+    def test_withBudget_reverse_sameAsWithout(self, with_budget, build):
+        def source():
+            return (x for x in range(5))
+
+        expected = build(q(source())).reverse().to_list()
+
+        assert build(with_budget(q(source()))).reverse().to_list() == expected
+
+    @pytest.mark.parametrize("with_budget", [
+        lambda query: query.with_deadline(60),
+        lambda query: query.with_cancel(CancelToken()),
+    ], ids=["deadline", "cancel"])
+    def test_withBudget_reverseIrreversible_raisesTypeError(self, with_budget):
+        with pytest.raises(TypeError):
+            with_budget(q({1, 2, 3})).reverse().to_list()
+
+    def test_withDeadline_blockingStageOverSlowSource_raisedWhileReading(self):
+        tracking_iterable = TrackingIterator(map(_slow, range(5000)))
+
+        with pytest.raises(QueryCancelledException):
+            q(tracking_iterable).with_deadline(0.05).order().to_list()
+        assert tracking_iterable.count < 1000
+
+    def test_withDeadline_slowConsumer_raised(self):
+        query = q(range(5000)).with_deadline(0.05)
+
+        with pytest.raises(QueryCancelledException):
+            for _ in query:
+                time.sleep(0.001)
+
+    def test_withDeadline_spent_nothingRead(self):
+        tracking_iterable = TrackingIterator(range(10))
+
+        with pytest.raises(QueryCancelledException):
+            q(tracking_iterable).with_deadline(-1).to_list()
+        assert tracking_iterable.count == 0
+
+    def test_withDeadline_twice_earliestApplies(self):
+        query = q(range(5000)).with_deadline(0.05).select(_slow).with_deadline(60)
+
+        with pytest.raises(QueryCancelledException):
+            query.to_list()
+
+    def test_withCancel_cancelledFromAnotherThread_infiniteQueryRaised(self):
+        token = CancelToken()
+        query = q(count()).with_cancel(token).where(lambda x: x < 0)
+
+        timer = _cancel_soon(token)
+        with pytest.raises(QueryCancelledException, match="cancelled"):
+            query.to_list()
+        timer.join()
+        assert token.cancelled
+
+    def test_withCancel_partiallyConsumed_raisedOnResume(self):
+        token = CancelToken()
+        query = q(range(10)).with_cancel(token).select(lambda x: x * 2)
+
+        assert query.first() == 0
+        token.cancel()
+        with pytest.raises(QueryCancelledException):
+            query.to_list()
+
+    def test_withCancel_snapped_followingPassesRaise(self):
+        token = CancelToken()
+        query = q(range(10)).with_cancel(token).snap()
+
+        assert query.where(lambda x: x > 7).to_list() == [8, 9]
+        token.cancel()
+        with pytest.raises(QueryCancelledException):
+            query.where(lambda x: x > 7).to_list()
+
+    @pytest.mark.parametrize("configure", [
+        lambda query: query.parallel(workers=2, backend='thread', chunksize=1).select(_slow),
+        lambda query: query.select(_slow).pipelined(buffer=4),
+        lambda query: query.select(_slow).prefetch(4),
+    ])
+    def test_withCancel_concurrentStages_raisedAndStopped(self, configure):
+        token = CancelToken()
+        processed = []
+        query = configure(q(range(5000)).with_cancel(token)).select(processed.append)
+
+        timer = _cancel_soon(token)
+        with pytest.raises(QueryCancelledException):
+            query.to_list()
+        timer.join()
+        assert len(processed) < 1000
+
+    def test_withCancel_parallelCancelled_workersShutDown(self):
+        token = CancelToken()
+        started = []
+
+        def record(x):
+            started.append(x)
+            time.sleep(0.01)
+            return x
+
+        query = q(range(1000)).with_cancel(token).parallel(workers=2, backend='thread',
+                                                            chunksize=1).select(record)
+        timer = _cancel_soon(token)
+        with pytest.raises(QueryCancelledException):
+            query.to_list()
+        timer.join()
+        started_when_cancelled = len(started)
+        time.sleep(0.1)
+        # at most the chunks that were already running
+        assert len(started) <= started_when_cancelled + 4
+
+    def test_queryCancelledException_isQueryException(self):
+        assert issubclass(QueryCancelledException, BaseQueryException)
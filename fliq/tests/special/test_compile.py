@@ -0,0 +1,128 @@
+import sys
+
+import pytest
+
+from fliq import q
+from fliq import _compiler
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+OFFSET = 10
+
+
+def _plus_one(x):
+    return x + 1
+
+
+class TestCompile:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi_dup())
+    def test_compile_allSupportedMappers_sameAsNonCompiled(self,
+                                                          iter_type,
+                                                          iterable,
+                                                          iterable_list):
+        def build(query):
+            return (query
+                    .select(str)
+                    .where(lambda x: x != '2')
+                    .exclude(lambda x: x == '4')
+                    .distinct()
+                    .prepend('p')
+                    .skip(1)
+                    .append('a', 'b')
+                    .slice(start=1, stop=6, step=2)
+                    .take(2, lambda x: x != 'x'))
+
+        compiled = build(q([])).compile()
+
+        assert compiled(iterable).to_list() == build(q(iterable_list)).to_list()
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_compile_emptySource_emptyQuery(self, iter_type, iterable, iterable_list):
+        compiled = q([]).where(lambda x: x > 0).select(lambda x: x * 2).compile()
+
+        assert compiled(iterable).to_list() == []
+
+    def test_compile_noMappers_sourceAsIs(self):
+        assert q([]).compile()([1, 2, 3]).to_list() == [1, 2, 3]
+
+    def test_compile_reusedAcrossSources_independentResults(self):
+        compiled = q([]).where(lambda x: x % 2 == 0).distinct().take(2).compile()
+
+        assert compiled([4, 4, 1, 2, 6]).to_list() == [4, 2]
+        assert compiled(range(10)).to_list() == [0, 2]
+        assert compiled([]).to_list() == []
+
+    def test_compile_queryItself_leftIntact(self):
+        query = q([1, 2, 3]).select(lambda x: x * 10)
+        compiled = query.compile()
+
+        assert compiled([5]).to_list() == [50]
+        assert query.to_list() == [10, 20, 30]
+
+    def test_compile_sameShape_codeGeneratedOnce(self):
+        def build():
+            return q([]).where(lambda x: x > 1).select(lambda x: -x).take(3).compile()
+
+        build()
+        codes = len(_compiler._codes)
+        build()
+
+        assert len(_compiler._codes) == codes
+
+    def test_compile_take_pulledOnlyAsNeeded(self):
+        tracking_iterable = TrackingIterator(range(10))
+        compiled = q([]).where(lambda x: x > 2).take(2).compile()
+
+        assert compiled(tracking_iterable).to_list() == [3, 4]
+        assert tracking_iterable.count == 5
+
+    def test_compile_infiniteSource_takeTerminates(self):
+        def naturals():
+            i = 0
+            while True:
+                yield i
+                i += 1
+
+        compiled = q([]).select(lambda x: x * x).skip(2).take(3).compile()
+
+        assert compiled(naturals()).to_list() == [4, 9, 16]
+
+    def test_compile_closuresAndNonLambdas_calledAsIs(self):
+        offset = 100
+        compiled = q([]).select(lambda x: x + offset).select(_plus_one).select(abs).compile()
+
+        assert compiled([-200, 1]).to_list() == [99, 102]
+
+    def test_compile_lambdaUsingGlobals_resolvedAtCallTime(self):
+        global OFFSET
+        compiled = q([]).select(lambda x: x + OFFSET).compile()
+        try:
+            OFFSET = 20
+            assert compiled([1]).to_list() == [21]
+        finally:
+            OFFSET = 10
+
+    @pytest.mark.skipif(sys.version_info < (3, 11), reason="inlining requires Python 3.11+")
+    def test_compile_plainLambdas_inlined(self):
+        q([]).where(lambda p: p.age > 2).select(lambda p: p.name).compile()
+
+        assert (('where', '(_fliq_x.age > 2)'), ('select', '(_fliq_x.name)')) in _compiler._codes
+
+    def test_compile_lambdaRaises_errorPropagated(self):
+        compiled = q([]).select(lambda x: 1 / x).compile()
+
+        with pytest.raises(ZeroDivisionError):
+            compiled([1, 0]).to_list()
+
+    @pytest.mark.parametrize("build", [
+        lambda query: query.order(),
+        lambda query: query.where(lambda x: x > 0).reverse(),
+        lambda query: query.zip([1]),
+    ])
+    def test_compile_unsupportedMapper_raisesTypeError(self, build):
+        with pytest.raises(TypeError):
+            build(q([])).compile()
+
+    def test_compile_negativeSlice_raisesValueError(self):
+        with pytest.raises(ValueError):
+            q([]).slice(start=-1).compile()
@@ -0,0 +1,171 @@
+import os
+import time
+from functools import partial
+
+import pytest
+
+from fliq import q, Cluster
+from fliq import _optimizer, _plan
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+
+def _square(x):
+    return int(x) ** 2
+
+
+def _is_even(x):
+    return x % 2 == 0
+
+
+def _inverse(x):
+    return 1 / x
+
+
+def _mod_three(x):
+    return x % 3
+
+
+def _add(a, b):
+    return a + b
+
+
+def _slow_first(x):
+    time.sleep(0.5 if x == 0 else 0)
+    return x
+
+
+def _crash_once(flag_path, x):
+    # the first worker processing 7 dies (as if its machine went down)
+    if x == 7 and not os.path.exists(flag_path):
+        open(flag_path, 'w').close()
+        os._exit(1)
+    return x
+
+
+@pytest.fixture(scope='module')
+def cluster():
+    with Cluster.local(workers=2) as local_cluster:
+        yield local_cluster
+
+
+class TestDistributed:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_distributed_sameAsSerial(self, cluster, iter_type, iterable, iterable_list):
+        query = q(iterable).distributed(cluster, chunksize=2).select(_square).where(_is_even)
+
+        assert query.to_list() == [x for x in map(_square, iterable_list) if _is_even(x)]
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_distributed_emptySource_empty(self, cluster, iter_type, iterable, iterable_list):
+        assert q(iterable).distributed(cluster).select(_square).to_list() == []
+
+    def test_distributed_unordered_sameElements(self, cluster):
+        query = q(range(100)).distributed(cluster, chunksize=7, ordered=False).select(_square)
+
+        assert sorted(query.to_list()) == [x ** 2 for x in range(100)]
+
+    @pytest.mark.parametrize("ordered", [True, False])
+    def test_distributed_partitionedByIndex_sameElements(self, cluster, ordered):
+        items = [(x * 7919) % 101 for x in range(300)]
+        query = q(items).distributed(cluster, by=_is_even, chunksize=5, ordered=ordered)
+
+        result = query.where(_is_even).select(_square).to_list()
+
+        expected = [_square(x) for x in items if _is_even(x)]
+        assert result == expected if ordered else sorted(result) == sorted(expected)
+
+    @pytest.mark.parametrize("materialize", [
+        lambda query: query.sum(),
+        lambda query: query.count(),
+        lambda query: query.to_dict(_mod_three),
+        lambda query: query.to_dict(_mod_three, combine=_add),
+        lambda query: query.max(),
+        lambda query: query.aggregate(_add),
+    ])
+    def test_distributed_reduction_sameAsSerial(self, cluster, materialize):
+        items = [(x * 7919) % 101 for x in range(300)]
+        query = q(items).distributed(cluster, chunksize=7).where(_is_even).select(_square)
+
+        assert materialize(query) == materialize(q(items).where(_is_even).select(_square))
+
+    def test_distributed_partitionedReduction_sameAsSerial(self, cluster):
+        query = q(range(100)).distributed(cluster, by=_is_even, chunksize=4).select(_square)
+
+        assert query.sum() == sum(x ** 2 for x in range(100))
+
+    def test_distributed_partitionIndexOutOfRange_raisesValueError(self, cluster):
+        with pytest.raises(ValueError):
+            q(range(10)).distributed(cluster, by=lambda x: 5).select(_square).to_list()
+
+    def test_distributed_callableRaises_errorPropagated(self, cluster):
+        query = q([1, 2, 0, 3]).distributed(cluster, chunksize=1).select(_inverse)
+
+        with pytest.raises(ZeroDivisionError):
+            query.to_list()
+        # the cluster serves following queries
+        assert q([1, 2]).distributed(cluster).select(_inverse).to_list() == [1.0, 0.5]
+
+    def test_distributed_unpicklableCallable_raisesTypeError(self, cluster):
+        query = q(range(10)).distributed(cluster).select(lambda x: x)
+
+        with pytest.raises(TypeError, match="picklable"):
+            query.to_list()
+
+    def test_distributed_consumedPartially_clusterReusable(self, cluster):
+        assert q(range(10_000)).distributed(cluster, chunksize=10).select(_square).first() == 0
+        assert q(range(5)).distributed(cluster).select(_square).to_list() == [0, 1, 4, 9, 16]
+
+    def test_distributed_workerLost_chunkRedispatched(self, tmp_path):
+        crash = partial(_crash_once, str(tmp_path / 'crashed'))
+        with Cluster.local(workers=2) as local_cluster:
+            query = q(range(40)).distributed(local_cluster, chunksize=3).select(crash)
+
+            assert query.to_list() == list(range(40))
+            assert (tmp_path / 'crashed').exists()
+            # the remaining worker serves following queries
+            assert q(range(5)).distributed(local_cluster).select(_square).count() == 5
+
+    def test_distributed_allWorkersLost_raisesConnectionError(self, tmp_path):
+        crash = partial(_crash_once, str(tmp_path / 'crashed'))
+        with Cluster.local(workers=1) as local_cluster:
+            with pytest.raises(ConnectionError):
+                q(range(40)).distributed(local_cluster, chunksize=3).select(crash).to_list()
+
+    def test_distributed_elementWiseRun_replacedUpToOtherMapper(self, cluster):
+        plan = [_plan.Distributed(cluster, None, 10, True), _plan.Select(_square),
+                _plan.Where(_is_even), _plan.Distinct(), _plan.Select(_square)]
+
+        assert [repr(node) for node in _optimizer.optimize(plan)] == [
+            "DistributedMap(select, where)", "Distinct", "Select"
+        ]
+
+    def test_distributed_slowHeadChunk_readsBoundedByWindow(self, cluster):
+        tracking_iterable = TrackingIterator(range(10_000))
+        query = q(tracking_iterable).distributed(cluster, chunksize=1).select(_slow_first)
+
+        assert next(query) == 0
+        # chunks in flight, and completed ones waiting for the head chunk, fill the window
+        assert tracking_iterable.count <= 8
+
+    def test_distributed_rarePartitionHoldsMerge_readsBounded(self, cluster):
+        tracking_iterable = TrackingIterator(range(10_000))
+        query = (q(tracking_iterable)
+                 .distributed(cluster, by=lambda x: 0 if x == 0 else 1, chunksize=10)
+                 .select(_square))
+
+        assert next(query) == 0
+        assert tracking_iterable.count <= 100
+        assert query.to_list() == [x ** 2 for x in range(1, 10_000)]
+
+    @pytest.mark.parametrize("ordered, expected_sorted", [(True, True), (False, None)])
+    def test_distributed_sortedInput_sortednessKeptOnlyIfOrdered(self, cluster, ordered,
+                                                                 expected_sorted):
+        plan = [_plan.Order(by=None, ascending=True),
+                _plan.Distributed(cluster, None, 10, ordered), _plan.Where(_is_even)]
+
+        assert _plan.properties(_plan.UNKNOWN, plan).sorted_by(None) is expected_sorted
+
+    def test_distributed_invalidChunksize_raisesValueError(self, cluster):
+        with pytest.raises(ValueError):
+            q([]).distributed(cluster, chunksize=0)
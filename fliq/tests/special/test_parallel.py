@@ -0,0 +1,284 @@
+import time
+
+import pytest
+
+from fliq import q
+from fliq import _optimizer, _plan
+from fliq.tests.fliq_test_utils import Params, MyTestClass
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+
+def _square(x):
+    return int(x) ** 2
+
+
+def _is_even(x):
+    return x % 2 == 0
+
+
+def _inverse(x):
+    return 1 / x
+
+
+def _mod_three(x):
+    return x % 3
+
+
+def _add(a, b):
+    return a + b
+
+
+def _add_square(a, b):
+    return a + _square(b)
+
+
+def _first_chunk_slow(x):
+    # the first elements complete last (the very first one, latest), on an unordered pool
+    time.sleep(max(0, 3 - x) * 0.02)
+    return True
+
+
+class TestParallel:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_parallel_processBackend_sameAsSerial(self, iter_type, iterable, iterable_list):
+        query = q(iterable).parallel(workers=2, chunksize=2).select(_square).where(_is_even)
+
+        assert query.to_list() == [x for x in map(_square, iterable_list) if _is_even(x)]
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_parallel_emptySource_empty(self, iter_type, iterable, iterable_list):
+        assert q(iterable).parallel(workers=2).select(_square).to_list() == []
+
+    def test_parallel_threadBackend_lambdasSupported(self):
+        query = q(range(50)).parallel(workers=3, backend='thread', chunksize=4).select(
+            lambda x: x + 1).exclude(lambda x: x % 5 == 0)
+
+        assert query.to_list() == [x + 1 for x in range(50) if (x + 1) % 5 != 0]
+
+    @pytest.mark.parametrize("backend", ['process', 'thread'])
+    def test_parallel_unordered_sameElements(self, backend):
+        query = q(range(100)).parallel(workers=2, backend=backend, chunksize=7, ordered=False)
+
+        assert sorted(query.select(_square).to_list()) == [x ** 2 for x in range(100)]
+
+    def test_parallel_unpicklableCallable_raisesTypeError(self):
+        query = q(range(10)).parallel(workers=2).select(lambda x: x)
+
+        with pytest.raises(TypeError, match="backend='thread'"):
+            query.to_list()
+
+    @pytest.mark.parametrize("backend", ['process', 'thread'])
+    def test_parallel_callableRaises_errorPropagated(self, backend):
+        query = q([1, 2, 0, 3]).parallel(workers=2, backend=backend, chunksize=1).select(_inverse)
+
+        with pytest.raises(ZeroDivisionError):
+            query.to_list()
+
+    @pytest.mark.parametrize("materialize,expected", [
+        (lambda query: query.first(), 0),
+        (lambda query: query.take(3).to_list(), [0, 1, 4]),
+    ])
+    def test_parallel_limitedConsumer_workersNotFed(self, materialize, expected):
+        tracking_iterable = TrackingIterator(range(1000))
+        query = q(tracking_iterable).parallel(workers=1, chunksize=10).select(_square)
+
+        assert materialize(query) == expected
+        # only the initial window of chunks is pulled from the source
+        assert tracking_iterable.count <= 21
+
+    def test_parallel_consumedBeyondLimit_remainingProcessedInOrder(self):
+        query = q(range(100)).parallel(workers=2, backend='thread', chunksize=3).select(_square)
+
+        assert query.first() == 0
+        assert query.to_list() == [x ** 2 for x in range(1, 100)]
+
+    def test_parallel_markerWithoutElementWiseMappers_dropped(self):
+        plan = [_plan.Parallel(None, 'process', 10, True), _plan.Distinct()]
+
+        assert [repr(node) for node in _optimizer.optimize(plan)] == ["Distinct"]
+
+    def test_parallel_elementWiseRun_replacedUpToOtherMapper(self):
+        plan = [
+            _plan.Parallel(None, 'process', 10, True),
+            _plan.Select(_square),
+            _plan.Where(_is_even),
+            _plan.Distinct(),
+            _plan.Select(_square),
+            _plan.Slice(0, 5, 1),
+        ]
+
+        assert [repr(node) for node in _optimizer.optimize(plan)] == [
+            "ParallelMap(select, where)", "Distinct", "Slice", "Select"
+        ]
+
+    def test_parallel_followedByTake_sliceAppliedBeforeWorkers(self):
+        plan = [_plan.Parallel(None, 'process', 10, True), _plan.Select(_square),
+                _plan.Slice(2, 4, 1)]
+
+        assert [repr(node) for node in _optimizer.optimize(plan)] == [
+            "Slice", "ParallelMap(select)"
+        ]
+
+    @pytest.mark.parametrize("backend", ['process', 'thread'])
+    @pytest.mark.parametrize("chunksize", [1, 4, 1000])
+    def test_parallel_toDict_sameAsSerialIncludingOrder(self, backend, chunksize):
+        items = [7, 3, 9, 4, 1, 8, 5, 2, 6, 0] * 3
+        query = q(items).parallel(workers=2, backend=backend, chunksize=chunksize).where(bool)
+
+        groups = query.to_dict(_mod_three)
+
+        assert groups == q(items).where(bool).to_dict(_mod_three)
+        assert list(groups) == [1, 0, 2]
+
+    @pytest.mark.parametrize("backend", ['process', 'thread'])
+    def test_parallel_toDictCombine_sameAsSerial(self, backend):
+        query = q(range(100)).parallel(workers=2, backend=backend, chunksize=7).select(_square)
+
+        assert query.to_dict(_mod_three, combine=_add) == (
+            q(range(100)).select(_square).to_dict(_mod_three, combine=_add))
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_parallel_toDictEmptySource_empty(self, iter_type, iterable, iterable_list):
+        assert q(iterable).parallel(workers=2).to_dict(_mod_three) == {}
+
+    def test_parallel_groupBy_sameAsSerial(self):
+        query = q(range(20)).parallel(workers=2, chunksize=3).select(_square).group_by(_mod_three)
+
+        assert query.to_list() == q(range(20)).select(_square).group_by(_mod_three).to_list()
+
+    def test_parallel_toDictAttributeKey_picklable(self):
+        items = [MyTestClass(i % 2, i) for i in range(10)]
+
+        assert q(items).parallel(workers=2, chunksize=3).to_dict('a') == q(items).to_dict('a')
+
+    def test_parallel_toDictUnpicklableKey_raisesTypeError(self):
+        with pytest.raises(TypeError, match="backend='thread'"):
+            q(range(10)).parallel(workers=2).to_dict(lambda x: x % 2)
+
+    def test_parallel_toDictAfterOtherMapper_onlyWorkersRunGrouping(self):
+        query = q(range(10)).parallel(backend='thread').select(_square).distinct()
+
+        assert query.to_dict(_mod_three) == q(range(10)).select(_square).to_dict(_mod_three)
+
+    def test_parallel_groupByAfterRun_executedOnWorkers(self):
+        plan = [_plan.Parallel(None, 'process', 10, True), _plan.Where(_is_even),
+                _plan.GroupBy(_mod_three), _plan.Select(len)]
+
+        assert [repr(node) for node in _optimizer.optimize(plan)] == [
+            "ParallelGroupBy(where, group_by)", "Select"
+        ]
+
+    @pytest.mark.parametrize("backend", ['process', 'thread'])
+    @pytest.mark.parametrize("by", [None, _mod_three])
+    @pytest.mark.parametrize("ascending", [True, False])
+    def test_parallel_order_sameAsSerial(self, backend, by, ascending):
+        items = [(x * 7919) % 101 for x in range(300)]
+        query = q(items).parallel(workers=3, backend=backend, chunksize=10).order(by, ascending)
+
+        assert query.to_list() == q(items).order(by, ascending).to_list()
+
+    @pytest.mark.parametrize("ascending", [True, False])
+    def test_parallel_orderTies_stableAsSerial(self, ascending):
+        items = [MyTestClass(i % 3, i) for i in range(60)]
+        query = q(items).parallel(workers=4, backend='thread', chunksize=5)
+
+        assert (query.order(lambda x: x.a, ascending).to_list() ==
+                q(items).order(lambda x: x.a, ascending).to_list())
+
+    @pytest.mark.parametrize("materialize", [
+        lambda query: query.take(5).to_list(),
+        lambda query: query.first(),
+        lambda query: query.to_list()[-3:],
+    ])
+    def test_parallel_orderConsumedPartially_sameAsSerial(self, materialize):
+        items = [(x * 31) % 17 for x in range(100)]
+
+        assert (materialize(q(items).parallel(workers=2, chunksize=10).select(_square).order()) ==
+                materialize(q(items).select(_square).order()))
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_parallel_orderEmptySource_empty(self, iter_type, iterable, iterable_list):
+        assert q(iterable).parallel(workers=2).order().to_list() == []
+
+    def test_parallel_orderAfterRun_executedOnWorkers(self):
+        plan = [_plan.Parallel(None, 'process', 10, True), _plan.Where(_is_even),
+                _plan.Order(None, True), _plan.Slice(0, 3, 1)]
+
+        assert [repr(node) for node in _optimizer.optimize(plan)] == [
+            "ParallelOrder(where, order, limit=3)", "Slice"
+        ]
+
+    @pytest.mark.parametrize("backend", ['process', 'thread'])
+    @pytest.mark.parametrize("materialize", [
+        lambda query: query.sum(),
+        lambda query: query.sum(by=_mod_three),
+        lambda query: query.min(),
+        lambda query: query.max(),
+        lambda query: query.min(by=_mod_three),
+        lambda query: query.max(by=_mod_three),
+        lambda query: query.aggregate(_add),
+        lambda query: query.aggregate(_add, initial=0),
+    ])
+    def test_parallel_reduction_sameAsSerial(self, backend, materialize):
+        items = [(x * 7919) % 101 for x in range(300)]
+        query = q(items).parallel(workers=3, backend=backend, chunksize=7).select(_square)
+
+        assert materialize(query) == materialize(q(items).select(_square))
+
+    def test_parallel_minMaxTies_firstAsSerial(self):
+        items = [MyTestClass(i % 3, i) for i in range(60)]
+        query = q(items).parallel(workers=4, backend='thread', chunksize=5)
+
+        assert query.min(by=lambda x: x.a) is q(items).min(by=lambda x: x.a)
+        assert query.max(by=lambda x: x.a) is q(items).max(by=lambda x: x.a)
+
+    def test_parallel_aggregateCombine_combinesPartials(self):
+        query = q(range(10)).parallel(workers=2, chunksize=3)
+
+        assert query.aggregate(_add_square, initial=0, combine=_add) == sum(map(_square, range(10)))
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_parallel_reductionEmptySource_sameAsSerial(self, iter_type, iterable, iterable_list):
+        query = q(iterable).parallel(workers=2)
+
+        assert query.sum() == 0
+        assert query.aggregate(_add, initial=5) == 5
+        with pytest.raises(ValueError):
+            query.min()
+        with pytest.raises(TypeError):
+            query.aggregate(_add)
+
+    def test_parallel_aggregateUnpicklable_raisesTypeError(self):
+        with pytest.raises(TypeError, match="backend='thread'"):
+            q(range(10)).parallel(workers=2).aggregate(lambda a, b: a + b)
+
+    def test_parallel_unorderedAfterOrder_minNotTakenFromFirst(self):
+        query = (q(range(20)).order()
+                 .parallel(workers=4, backend='thread', chunksize=3, ordered=False)
+                 .where(_first_chunk_slow))
+
+        assert query.min() == 0
+
+    def test_parallel_unorderedAfterOrder_distinctRemovesAllDuplicates(self):
+        query = (q([x // 2 for x in range(20)]).order()
+                 .parallel(workers=4, backend='thread', chunksize=3, ordered=False)
+                 .where(_first_chunk_slow)
+                 .distinct())
+
+        result = query.to_list()
+
+        assert sorted(result) == list(range(10))
+
+    @pytest.mark.parametrize("ordered, expected_sorted", [(True, True), (False, None)])
+    def test_parallel_sortedInput_sortednessKeptOnlyIfOrdered(self, ordered, expected_sorted):
+        plan = [_plan.Order(by=None, ascending=True),
+                _plan.Parallel(2, 'thread', 10, ordered), _plan.Where(_is_even)]
+
+        assert _plan.properties(_plan.UNKNOWN, plan).sorted_by(None) is expected_sorted
+
+    @pytest.mark.parametrize("kwargs", [
+        {'workers': 0}, {'chunksize': 0}, {'backend': 'gpu'},
+    ])
+    def test_parallel_invalidArguments_raisesValueError(self, kwargs):
+        with pytest.raises(ValueError):
+            q([]).parallel(**kwargs)
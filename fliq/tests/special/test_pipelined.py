@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from fliq import q
+from fliq import _optimizer, _parallel, _plan
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+class TestPipelined:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_pipelined_stages_sameAsSerial(self, iter_type, iterable, iterable_list):
+        query = (q(iterable).pipelined(buffer=2)
+                 .select(lambda x: int(x) * 2).pipelined()
+                 .where(lambda x: x > 2).pipelined(buffer=1))
+
+        assert query.to_list() == [int(x) * 2 for x in iterable_list if int(x) * 2 > 2]
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_pipelined_emptySource_empty(self, iter_type, iterable, iterable_list):
+        assert q(iterable).pipelined().select(str).pipelined().to_list() == []
+
+    def test_pipelined_stages_runOnSeparateThreads(self):
+        threads = {}
+
+        def record(stage):
+            def selector(x):
+                threads.setdefault(stage, set()).add(threading.get_ident())
+                return x
+            return selector
+
+        query = (q(range(100)).select(record('first')).pipelined()
+                 .select(record('second')).pipelined()
+                 .select(record('last')))
+        query.to_list()
+
+        assert threads['last'] == {threading.get_ident()}
+        assert len(threads['first'] | threads['second'] | threads['last']) == 3
+
+    def test_pipelined_slowConsumer_sourceBoundedByBuffer(self):
+        tracking_iterable = TrackingIterator(range(1000))
+        query = q(tracking_iterable).pipelined(buffer=10)
+
+        assert query.first() == 0
+        _wait_for(lambda: query.stages[0].items >= 11)
+        time.sleep(0.05)
+        # the consumed element, a full queue, and an element waiting for room
+        assert tracking_iterable.count <= 13
+
+    @pytest.mark.parametrize("materialize,expected", [
+        (lambda query: query.take(3).to_list(), [0, 1, 2]),
+        (lambda query: next(iter(query)), 0),
+    ])
+    def test_pipelined_consumerStops_sourceClosed(self, materialize, expected):
+        closed = threading.Event()
+
+        def source():
+            try:
+                yield from range(1000)
+            finally:
+                closed.set()
+
+        query = q(source()).pipelined(buffer=5)
+
+        assert materialize(query) == expected
+        del query
+        assert closed.wait(timeout=5)
+
+    def test_pipelined_stageRaises_errorPropagated(self):
+        query = q([1, 2, 0, 3]).select(lambda x: 1 / x).pipelined()
+
+        with pytest.raises(ZeroDivisionError):
+            query.to_list()
+
+    def test_pipelined_metrics_namesAndCounts(self):
+        query = (q(range(10)).select(str).where(bool).pipelined(buffer=4)
+                 .distinct().pipelined(name='unique'))
+
+        assert query.to_list() == [str(x) for x in range(10)]
+        assert [stage.name for stage in query.stages] == ['source, select, where', 'unique']
+        assert [stage.items for stage in query.stages] == [10, 10]
+        assert all(stage.max_depth <= stage.buffer for stage in query.stages)
+
+    def test_pipelined_slowConsumer_queueFull(self):
+        query = q(range(20)).pipelined(buffer=4)
+
+        for _ in query:
+            time.sleep(0.005)
+
+        stage = query.stages[0]
+        assert stage.put_wait > 0
+        assert stage.mean_depth > 2
+
+    def test_pipelined_slowStage_consumerWaits(self):
+        def slow(x):
+            time.sleep(0.005)
+            return x
+
+        query = q(range(20)).select(slow).pipelined(buffer=4)
+
+        assert query.to_list() == list(range(20))
+        stage = query.stages[0]
+        assert stage.get_wait > 0.05
+        assert stage.mean_depth < 2
+
+    def test_pipelined_followedByTake_sliceAppliedInStage(self):
+        metrics = _parallel.StageMetrics('source', 4)
+        plan = [_plan.Select(str), _plan.Pipelined(4, metrics), _plan.Slice(0, 3, 1)]
+
+        assert [repr(node) for node in _optimizer.optimize(plan)] == [
+            "Slice", "Select", "Pipelined"
+        ]
+
+    def test_pipelined_invalidBuffer_raisesValueError(self):
+        with pytest.raises(ValueError):
+            q([]).pipelined(buffer=0)
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from fliq import q
+from fliq.tests.fliq_test_utils import Params
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+
+def _failing(values, error_at):
+    for i, value in enumerate(values):
+        if i == error_at:
+            raise KeyError(i)
+        yield value
+
+
+class TestPrefetch:
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_multi())
+    def test_prefetch_sameAsSerial(self, iter_type, iterable, iterable_list):
+        assert q(iterable).prefetch(4, batch=2).to_list() == iterable_list
+
+    @pytest.mark.parametrize("n, batch", [(1, 1), (4, 2), (64, 1), (2, 10)])
+    def test_prefetch_batches_sameAsSerial(self, n, batch):
+        assert q(range(25)).prefetch(n, batch).to_list() == list(range(25))
+
+    @pytest.mark.parametrize(Params.sig_iterable, Params.iterable_empty())
+    def test_prefetch_emptySource_empty(self, iter_type, iterable, iterable_list):
+        assert q(iterable).prefetch(4, batch=3).to_list() == []
+
+    def test_prefetch_source_readOnAnotherThread(self):
+        threads = set()
+
+        def read(x):
+            threads.add(threading.get_ident())
+            return x
+
+        assert q(range(10)).select(read).prefetch().to_list() == list(range(10))
+        assert threads and threading.get_ident() not in threads
+
+    @pytest.mark.parametrize("batch", [1, 3, 4])
+    def test_prefetch_sourceRaises_raisedAfterPrecedingElements(self, batch):
+        consumed = []
+
+        with pytest.raises(KeyError):
+            for item in q(_failing(range(10), error_at=5)).prefetch(4, batch=batch):
+                consumed.append(item)
+
+        assert consumed == [0, 1, 2, 3, 4]
+
+    def test_prefetch_slowConsumer_readAheadBounded(self):
+        tracking_iterable = TrackingIterator(range(1000))
+        query = q(tracking_iterable).prefetch(8, batch=4)
+
+        assert query.first() == 0
+        time.sleep(0.1)
+        # a batch being consumed, two queued batches, and a batch waiting for room
+        assert tracking_iterable.count <= 17
+
+    @pytest.mark.parametrize("materialize,expected", [
+        (lambda query: query.take(3).to_list(), [0, 1, 2]),
+        (lambda query: query.first(), 0),
+    ])
+    def test_prefetch_queryAbandoned_sourceClosed(self, materialize, expected):
+        closed = threading.Event()
+
+        def source():
+            try:
+                yield from range(1000)
+            finally:
+                closed.set()
+
+        query = q(source()).prefetch(4, batch=2)
+
+        assert materialize(query) == expected
+        del query
+        assert closed.wait(timeout=5)
+
+    def test_prefetch_slowSource_overlapsWithConsumer(self):
+        def slow(x):
+            time.sleep(0.01)
+            return x
+
+        start = time.perf_counter()
+        for _ in q(range(10)).select(slow).prefetch(10):
+            time.sleep(0.01)
+
+        # 10 reads and 10 consumes of 10ms each, overlapped
+        assert time.perf_counter() - start < 0.18
+
+    @pytest.mark.parametrize("kwargs", [{'n': 0}, {'batch': 0}])
+    def test_prefetch_invalidArguments_raisesValueError(self, kwargs):
+        with pytest.raises(ValueError):
+            q([]).prefetch(**kwargs)
@@ -0,0 +1,98 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from fliq import q, SharedSnapshot
+
+
+def _attached_sum(snapshot):
+    return q(snapshot).sum()
+
+
+class TestSnapShared:
+    @pytest.mark.parametrize("items, expected_format", [
+        ([3, 1, 2], 'q'),
+        ([1.5, 2, -3.25], 'd'),
+        ([True, False], '?'),
+        ([], 'q'),
+    ])
+    def test_snapShared_numbers_formatInferred(self, items, expected_format):
+        query = q(items).snap(shared=True)
+        with query.shared as snapshot:
+            assert snapshot.format == expected_format
+            assert query.to_list() == items
+
+    def test_snapShared_differentPasses_snapshotUsed(self):
+        evens = q(range(10)).where(lambda x: x % 2 == 0).snap(shared=True)
+        with evens.shared:
+            assert evens.where(lambda x: x > 3).to_list() == [4, 6, 8]
+            assert evens.select(lambda x: x * 2).sum() == 40
+            assert evens.max() == 8
+
+    def test_snapShared_records_tuplesYielded(self):
+        records = [(1, 2.5, b'ab'), (2, -1.0, b'cd')]
+        query = q(records).snap(shared=True, format='qd2s')
+        with query.shared:
+            assert query.where(lambda r: r[0] > 1).to_list() == [records[1]]
+            assert query.to_list() == records
+
+    @pytest.mark.parametrize("format", ['q', 'qd'])
+    def test_snapShared_indexed_sameAsList(self, format):
+        items = [(i, i / 2) if format == 'qd' else i for i in range(10)]
+        with SharedSnapshot.create(items, format) as snapshot:
+            assert len(snapshot) == 10
+            assert snapshot[3] == items[3]
+            assert snapshot[-1] == items[-1]
+            assert snapshot[2:8:3] == items[2:8:3]
+            with pytest.raises(IndexError):
+                _ = snapshot[10]
+
+    def test_snapShared_attachedByName_sameElements(self):
+        query = q(range(5)).snap(shared=True)
+        with query.shared as snapshot:
+            with SharedSnapshot.attach(snapshot.name) as attached:
+                assert q(attached).to_list() == [0, 1, 2, 3, 4]
+
+    def test_snapShared_pickled_attachedByName(self):
+        query = q(range(100_000)).snap(shared=True)
+        with query.shared as snapshot:
+            assert len(pickle.dumps(snapshot)) < 200
+
+    def test_snapShared_sentToWorkers_sameElements(self):
+        query = q(range(1000)).snap(shared=True)
+        with query.shared as snapshot, ProcessPoolExecutor(2) as pool:
+            assert list(pool.map(_attached_sum, [snapshot] * 3)) == [sum(range(1000))] * 3
+
+    def test_snapShared_unlinked_cannotAttach(self):
+        query = q(range(5)).snap(shared=True)
+        name = query.shared.name
+        with query.shared:
+            pass
+        with pytest.raises(FileNotFoundError):
+            SharedSnapshot.attach(name)
+
+    def test_snapShared_closed_cannotRead(self):
+        query = q(range(5)).snap(shared=True)
+        query.shared.close()
+        query.shared.unlink()
+        with pytest.raises(ValueError):
+            query.to_list()
+
+    def test_snapShared_notNumbersWithoutFormat_raisesTypeError(self):
+        with pytest.raises(TypeError):
+            q(['a', 'b']).snap(shared=True)
+
+    @pytest.mark.parametrize("items, format", [
+        ([2 ** 70], 'q'),
+        ([(1, 2)], 'q'),
+        ([1, 2], 'qd'),
+        ([1], 'z'),
+        ([1], ''),
+    ])
+    def test_snapShared_itemsNotFittingFormat_raisesValueError(self, items, format):
+        with pytest.raises(ValueError):
+            q(items).snap(shared=True, format=format)
+
+    def test_snap_notShared_noSharedSnapshot(self):
+        assert q(range(5)).snap().shared is None
@@ -0,0 +1,99 @@
+import pytest
+
+from fliq import q
+from fliq import _codegen, _optimizer, _plan
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+
+class TestFusion:
+    def test_optimize_longElementWiseRun_fusedIntoSingleNode(self):
+        plan = [
+            _plan.Where(lambda x: x > 0),
+            _plan.Exclude(lambda x: x == 3),
+            _plan.Select(lambda x: x * 2),
+            _plan.Distinct(),
+            _plan.Select(lambda x: x + 1),
+        ]
+
+        optimized = _optimizer.optimize(plan)
+
+        assert [repr(node) for node in optimized] == [
+            "Fused(where, exclude, select)", "Distinct", "Select"
+        ]
+
+    def test_optimize_shortElementWiseRun_notFused(self):
+        plan = [
+            _plan.Where(lambda x: x > 0),
+            _plan.Select(lambda x: x * 2),
+            _plan.Distinct(),
+        ]
+
+        assert _optimizer.optimize(plan) == plan
+
+    @pytest.mark.parametrize("length, fused", [(None, True), (1_000, True), (10, False)])
+    def test_optimize_sourceLength_fusedOnlyUnlessShort(self, length, fused):
+        plan = [_plan.Where(lambda x: x > 0), _plan.Select(lambda x: x * 2),
+                _plan.Where(lambda x: x > 2)]
+
+        optimized = _optimizer.optimize(plan, length=length)
+
+        assert (len(optimized) == 1) is fused
+
+    @pytest.mark.parametrize("items", [range(20), list(range(20)), tuple(range(7)), []])
+    def test_fusedChain_sameAsUnfused(self, items):
+        query = (q(items)
+                 .where(lambda x: x % 2 == 0)
+                 .exclude(lambda x: x == 4)
+                 .select(lambda x: x * 3)
+                 .where(lambda x: x > 5)
+                 .select(str))
+
+        expected = list(
+            map(str, filter(lambda x: x > 5, map(lambda x: x * 3, filter(
+                lambda x: x != 4, filter(lambda x: x % 2 == 0, items))))))
+        assert query.to_list() == expected
+
+    def test_fusedChain_callOrderPerElementPreserved(self):
+        calls = []
+
+        def record(name, result):
+            def function(x):
+                calls.append((name, x))
+                return result(x)
+            return function
+
+        (q([1, 2, 3])
+         .where(record('where', lambda x: x != 2))
+         .select(record('select', lambda x: x * 10))
+         .exclude(record('exclude', lambda x: x == 30))
+         .to_list())
+
+        assert calls == [
+            ('where', 1), ('select', 1), ('exclude', 10),
+            ('where', 2),
+            ('where', 3), ('select', 3), ('exclude', 30),
+        ]
+
+    def test_fusedChain_shortCircuit_pulledOnlyAsNeeded(self):
+        tracking_iterable = TrackingIterator(range(10))
+        first = (q(tracking_iterable)
+                 .where(lambda x: x > 2)
+                 .exclude(lambda x: x == 3)
+                 .select(lambda x: x * 2)
+                 .first())
+
+        assert first == 8
+        assert tracking_iterable.count == 5
+
+    def test_fusedFunction_sameShape_generatedOnce(self):
+        kinds = ('where', 'select', 'exclude', 'select')
+
+        assert _codegen.fused_function(kinds) is _codegen.fused_function(kinds)
+
+    def test_fusedChain_snapped_eachBranchFusedSeparately(self):
+        query = q(range(10)).where(lambda x: x > 0).snap()
+        evens = query.where(lambda x: x % 2 == 0).select(lambda x: x * 2).exclude(lambda x: x == 4)
+        odds = query.exclude(lambda x: x % 2 == 0).select(lambda x: -x).where(lambda x: x < -1)
+
+        assert evens.to_list() == [8, 12, 16]
+        assert odds.to_list() == [-3, -5, -7, -9]
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import fliq
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(fliq.__file__)))
+
+
+def _imported_modules(statement):
+    code = f"import sys; {statement}; print(' '.join(sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            check=True, cwd=_ROOT).stdout
+    return set(output.split())
+
+
+class TestImports:
+    @pytest.mark.parametrize("module", [
+        "fliq.async_query",
+        "asyncio",
+        "fliq.cluster",
+        "multiprocessing.connection",
+        "fliq.shared_snapshot",
+        "multiprocessing.shared_memory",
+    ])
+    def test_importFliq_optionalModulesNotImported(self, module):
+        assert module not in _imported_modules("import fliq")
+
+    @pytest.mark.parametrize("name", ["AsyncQuery", "Cluster", "SharedSnapshot"])
+    def test_lazyExport_importedOnAccess(self, name):
+        assert getattr(fliq, name).__name__ == name
+        assert name in fliq.__all__
+
+    def test_missingAttribute_raisesAttributeError(self):
+        with pytest.raises(AttributeError):
+            fliq.NoSuchName  # noqa: B018
@@ -0,0 +1,83 @@
+import pytest
+
+from fliq import q
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+
+class TestLaziness:
+    def test_mappers_notMaterialized_nothingPulled(self):
+        tracking_iterable = TrackingIterator(range(10))
+        (q(tracking_iterable)
+         .where(lambda x: x % 2 == 0)
+         .exclude(lambda x: x == 4)
+         .select(lambda x: x * 2)
+         .distinct()
+         .order(ascending=False)
+         .shuffle(seed=42)
+         .slice(start=1, stop=3)
+         .zip(range(10))
+         .append(-1)
+         .prepend(-2)
+         .flatten()
+         .interleave([0])
+         .slide(window=2, overlap=1))
+
+        assert tracking_iterable.count == 0
+
+    def test_order_notMaterialized_nothingPulled(self):
+        tracking_iterable = TrackingIterator(range(10))
+        q(tracking_iterable).order(by=lambda x: -x)
+
+        assert tracking_iterable.count == 0
+
+    @pytest.mark.parametrize("name,build", [
+        ("order", lambda query: query.order(ascending=False)),
+        ("group_by", lambda query: query.group_by(lambda x: x % 3)),
+        ("top", lambda query: query.top(n=3)),
+        ("bottom", lambda query: query.bottom(n=3, by=lambda x: x)),
+        ("most_common", lambda query: query.most_common(n=3)),
+        ("reverse", lambda query: query.reverse()),
+    ])
+    def test_materializingMappers_notMaterialized_nothingPulled(self, name, build):
+        tracking_iterable = TrackingIterator(range(10))
+        build(q(tracking_iterable).where(lambda x: x > 0))
+
+        assert tracking_iterable.count == 0
+
+    @pytest.mark.parametrize("name,build,expected", [
+        ("order", lambda query: query.order(ascending=False), [9, 8, 7, 6, 5, 4, 3, 2, 1]),
+        ("group_by", lambda query: query.group_by(lambda x: x % 3),
+         [[1, 4, 7], [2, 5, 8], [3, 6, 9]]),
+        ("top", lambda query: query.top(n=3), [9, 8, 7]),
+        ("bottom", lambda query: query.bottom(n=3, by=lambda x: x), [1, 2, 3]),
+        ("most_common", lambda query: query.most_common(n=1), [1]),
+        ("reverse", lambda query: query.reverse(), [9, 8, 7, 6, 5, 4, 3, 2, 1]),
+    ])
+    def test_materializingMappers_materialized_pulledOnce(self, name, build, expected):
+        tracking_iterable = TrackingIterator(range(10))
+        query = build(q(tracking_iterable).where(lambda x: x > 0))
+
+        assert query.to_list() == expected
+        # 10 items and the final StopIteration
+        assert tracking_iterable.count == 11
+
+    def test_plan_materialized_pulledOnce(self):
+        tracking_iterable = TrackingIterator(range(10))
+        query = (q(tracking_iterable)
+                 .where(lambda x: x % 2 == 0)
+                 .select(lambda x: x * 2)
+                 .order(ascending=False))
+
+        assert query.to_list() == [16, 12, 8, 4, 0]
+        # 10 items and the final StopIteration
+        assert tracking_iterable.count == 11
+
+    def test_plan_shortCircuit_pulledOnlyAsNeeded(self):
+        tracking_iterable = TrackingIterator(range(10))
+        first = (q(tracking_iterable)
+                 .where(lambda x: x > 2)
+                 .select(lambda x: x * 2)
+                 .first())
+
+        assert first == 6
+        assert tracking_iterable.count == 4
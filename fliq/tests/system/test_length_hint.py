@@ -0,0 +1,48 @@
+from operator import length_hint
+
+import pytest
+
+from fliq import q
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+
+class TestLengthHint:
+    @pytest.mark.parametrize("build, expected", [
+        (lambda query: query, 10),
+        (lambda query: query.select(lambda x: x * 2), 10),
+        (lambda query: query.skip(3).take(5), 5),
+        (lambda query: query.zip(range(4), range(20)), 4),
+        (lambda query: query.zip(range(4), range(20), longest=True), 20),
+    ])
+    def test_lengthHint_sizedSource_exact(self, build, expected):
+        assert length_hint(build(q(range(10)))) == expected
+
+    @pytest.mark.parametrize("build", [
+        lambda query: query.where(lambda x: x > 5),
+        lambda query: query.distinct().order(),
+        lambda query: query.select(lambda x: x).where(lambda x: x == 0),
+    ])
+    def test_lengthHint_onlyUpperBoundKnown_noHint(self, build):
+        assert length_hint(build(q(range(10))), -1) == -1
+
+    def test_lengthHint_unsizedSource_noHint(self):
+        assert length_hint(q(TrackingIterator(range(10))).select(str), -1) == -1
+
+    def test_lengthHint_partiallyIterated_remainingElements(self):
+        query = q([1, 2, 3, 4])
+        next(query)
+
+        assert length_hint(query) == 3
+
+    def test_lengthHint_notIterated(self):
+        tracking_iterable = TrackingIterator(range(10))
+        query = q(tracking_iterable).select(lambda x: x + 1)
+
+        length_hint(query)
+
+        assert tracking_iterable.count == 0
+
+    def test_list_hintedQuery_sameAsToList(self):
+        query = q(range(10)).where(lambda x: x % 3 == 0).select(str)
+
+        assert list(query) == ['0', '3', '6', '9']
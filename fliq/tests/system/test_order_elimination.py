@@ -0,0 +1,73 @@
+import pytest
+
+from fliq import q
+from fliq import _optimizer, _plan
+
+
+class TestOrderElimination:
+    @pytest.mark.parametrize("name,materialize,expected", [
+        ("count", lambda query: query.count(), 5),
+        ("any", lambda query: query.any(lambda x: x > 3), True),
+        ("all", lambda query: query.all(lambda x: x > 3), True),
+        ("contains", lambda query: query.contains(2), True),
+        ("in", lambda query: 2 in query, True),
+        ("equals", lambda query: query.equals([4, 3, 2, 1, 0], bag_compare=True), True),
+    ])
+    def test_orderInsensitiveMaterializer_reordersNotExecuted(self, name, materialize, expected):
+        keyed = []
+
+        def key(x):
+            keyed.append(x)
+            return x
+
+        query = (q(range(5))
+                 .order(by=key, ascending=False)
+                 .shuffle(fair=True)
+                 .reverse()
+                 .select(lambda x: x))
+
+        assert materialize(query) == expected
+        assert keyed == []
+
+    @pytest.mark.parametrize("materialize", [
+        lambda query: query.count(),
+        lambda query: query.any(),
+        lambda query: query.all(),
+        lambda query: query.contains(2),
+        lambda query: 3 in query,
+        lambda query: query.equals([1, 2, 3], bag_compare=True),
+    ])
+    @pytest.mark.parametrize("source", [[3, 1, 2], lambda: iter([3, 1, 2])])
+    def test_orderInsensitiveMaterializer_materializedAgain_reordersKept(self, materialize, source):
+        items = source() if callable(source) else source
+        ordered = q(items).order()
+        shuffled = q(list(range(20))).shuffle(seed=42)
+        reversed_query = q([1, 2, 3]).reverse()
+
+        materialize(ordered)
+        materialize(shuffled)
+        materialize(reversed_query)
+
+        assert ordered.to_list() == [1, 2, 3]
+        assert shuffled.to_list() == q(range(20)).shuffle(seed=42).to_list() != list(range(20))
+        assert reversed_query.to_list() == [3, 2, 1]
+
+    def test_count_orderedSizedSource_lengthTakenDirectly(self):
+        class SizedOnly:
+            def __len__(self):
+                return 3
+
+            def __iter__(self):
+                raise AssertionError("should not be iterated")
+
+        assert q(SizedOnly()).order().count() == 3
+
+    def test_orderSensitiveMaterializer_reordersExecuted(self):
+        query = q([3, 1, 2]).order()
+
+        assert query.equals([1, 2, 3])
+
+    def test_dropReorders_orderBeforeSlice_kept(self):
+        plan = [_plan.Order(by=None, ascending=True), _plan.Slice(0, 2, 1), _plan.Reverse()]
+
+        assert [repr(node) for node in _optimizer.drop_reorders(plan)] == ["Order", "Slice"]
@@ -1,9 +1,12 @@
+import pickle
+import statistics
 from typing import Generator
 from unittest import TestCase
+from unittest.mock import patch
 
 from parameterized import parameterized
 
-from fliq import q
+from fliq import q, _optimizer
 from fliq.tests.fliq_test_utils import MyTestClass, FliqTestUtils
 from fliq.tests.timer import Timer
 
@@ -22,6 +25,14 @@ class TestPerformance(TestCase):
         )
         return item
 
+    _compiled_query = staticmethod(
+        q([]).where(lambda x: x.a == 50).select(lambda x: x.b).compile()
+    )
+
+    def _query_fliq_compiled(self, data: Generator):
+        item = self._compiled_query(data).first(default=-1)
+        return item
+
     @staticmethod
     def _generate_data(num: int):
         return (MyTestClass(a=i, b=i * 2) for i in range(num))
@@ -32,17 +43,25 @@ class TestPerformance(TestCase):
         ("large", 10_000_000)
     ])
     def test_performance_smallDataset(self, name, data):
-        self._test_performance(data)
+        self._test_performance(data, self._query_fliq, 0.01)
+
+    @parameterized.expand([
+        ("small", 100),
+        ("medium", 10_000),
+        ("large", 10_000_000)
+    ])
+    def test_performance_compiled_fasterThanBaseline(self, name, data):
+        self._test_performance(data, self._query_fliq_compiled, 0.0)
 
     @FliqTestUtils.retry(attempts=10)
-    def _test_performance(self, data, attempt: int):
+    def _test_performance(self, data, query_fliq, tolerance: float, attempt: int):
         expected_item = 100
 
         with Timer() as baseline_t:
             baseline_item = self._query_baseline(self._generate_data(data))
 
         with Timer() as fliq_t:
-            fliq_item = self._query_fliq(self._generate_data(data))
+            fliq_item = query_fliq(self._generate_data(data))
 
         self.assertEqual(
             expected_item,
@@ -60,6 +79,94 @@ class TestPerformance(TestCase):
         FliqTestUtils.assertSmallerOrCloseTo(
             fliq_t.elapsed,
             baseline_t.elapsed,
-            0.01,
+            tolerance,
+            f"Attempt {attempt}"
+        )
+
+    @parameterized.expand([
+        ("select_first", lambda data: q(data).select(lambda x: x + 1).first()),
+        ("where_select_first",
+         lambda data: q(data).where(lambda x: x > 3).select(lambda x: x + 1).first()),
+        ("where_select_where_toList",
+         lambda data: q(data).where(lambda x: x > 3).select(lambda x: x + 1)
+         .where(lambda x: x % 2).to_list()),
+    ])
+    def test_performance_smallQuery_optimizerOverheadSmall(self, name, query):
+        self._test_small_query_performance(query)
+
+    @FliqTestUtils.retry(attempts=10)
+    def _test_small_query_performance(self, query, attempt: int):
+        data = list(range(10))
+
+        with patch.object(_optimizer, 'optimize', lambda plan, *args: plan):
+            with Timer() as unoptimized_t:
+                for _ in range(2_000):
+                    unoptimized_result = query(data)
+        with Timer() as optimized_t:
+            for _ in range(2_000):
+                optimized_result = query(data)
+
+        self.assertEqual(unoptimized_result, optimized_result)
+        FliqTestUtils.assertSmallerOrCloseTo(
+            optimized_t.elapsed,
+            unoptimized_t.elapsed,
+            0.3,
+            f"Attempt {attempt}"
+        )
+
+    def test_performance_sharedSnapshotAttach_independentOfSize(self):
+        small = q(range(1_000)).snap(shared=True)
+        large = q(range(5_000_000)).snap(shared=True)
+        with small.shared, large.shared:
+            self._test_attach_performance(small.shared, large.shared)
+
+    @FliqTestUtils.retry(attempts=10)
+    def _test_attach_performance(self, small, large, attempt: int):
+        small_payload, large_payload = pickle.dumps(small), pickle.dumps(large)
+        self.assertEqual(len(small_payload), len(large_payload))
+
+        with Timer() as small_t:
+            for _ in range(100):
+                pickle.loads(small_payload).close()
+        with Timer() as large_t:
+            for _ in range(100):
+                pickle.loads(large_payload).close()
+
+        FliqTestUtils.assertSmallerOrCloseTo(
+            large_t.elapsed,
+            small_t.elapsed,
+            1.0,
+            f"Attempt {attempt}"
+        )
+
+    def test_performance_withDeadline_closeToWithout(self):
+        self._test_deadline_performance()
+
+    @FliqTestUtils.retry(attempts=10)
+    def _test_deadline_performance(self, attempt: int):
+        # checkpoints cost about 15ns per element (under 2% of this query), consecutive runs vary
+        # by more than that, so the median ratio of adjacent runs (in alternating order) is used
+        def plain():
+            return q(self._generate_data(1_000_000)).where(lambda x: x.a % 2).to_list()
+
+        def with_deadline():
+            return (q(self._generate_data(1_000_000)).with_deadline(60)
+                    .where(lambda x: x.a % 2).to_list())
+
+        ratios = []
+        for run in range(5):
+            runs = [plain, with_deadline] if run % 2 else [with_deadline, plain]
+            results, elapsed = {}, {}
+            for query in runs:
+                with Timer() as t:
+                    results[query] = query()
+                elapsed[query] = t.elapsed
+            self.assertEqual(results[plain], results[with_deadline])
+            ratios.append(elapsed[with_deadline] / elapsed[plain])
+
+        FliqTestUtils.assertSmallerOrCloseTo(
+            statistics.median(ratios),
+            1.0,
+            0.02,
             f"Attempt {attempt}"
         )
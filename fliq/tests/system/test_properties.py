@@ -0,0 +1,159 @@
+import pytest
+
+from fliq import q
+from fliq import _optimizer, _plan
+from fliq.tests.utils.tracking_iterator import TrackingIterator
+
+
+def _key(x):
+    return x // 10
+
+
+class _Compared(int):
+    """
+    An integer that counts the comparisons made with it.
+    """
+    comparisons = 0
+
+    def __lt__(self, other):
+        _Compared.comparisons += 1
+        return int(self) < int(other)
+
+    def __eq__(self, other):
+        _Compared.comparisons += 1
+        return int(self) == int(other)
+
+    __hash__ = int.__hash__
+
+
+def _compared(items):
+    _Compared.comparisons = 0
+    return [_Compared(item) for item in items]
+
+
+class _Person:
+    def __init__(self, name, age):
+        self.name = name
+        self.age = age
+
+
+class TestProperties:
+    @pytest.mark.parametrize("plan,expected", [
+        ([_plan.Order(None, True), _plan.Distinct()], ["Order", "ConsecutiveDistinct"]),
+        ([_plan.Order(None, False), _plan.Where(bool), _plan.Distinct()],
+         ["Order", "Where", "ConsecutiveDistinct"]),
+        ([_plan.Order(_key, True), _plan.Distinct()], ["Order", "Distinct"]),
+        ([_plan.Order(None, True), _plan.Select(abs), _plan.Distinct()],
+         ["Order", "Select", "Distinct"]),
+        ([_plan.Distinct(), _plan.Order(None, True), _plan.Distinct()], ["Distinct", "Order"]),
+        ([_plan.Order(_key, True), _plan.GroupBy(_key)], ["Order", "ConsecutiveGroupBy"]),
+        ([_plan.Order(_key, True), _plan.GroupBy(lambda x: x // 10)], ["Order", "GroupBy"]),
+        ([_plan.Order(_key, True), _plan.Shuffle(10, None), _plan.GroupBy(_key)],
+         ["Order", "Shuffle", "GroupBy"]),
+    ])
+    def test_exploitProperties_replacedByInputProperties(self, plan, expected):
+        assert [repr(node) for node in _optimizer.exploit_properties(plan)] == expected
+
+    def test_exploitProperties_presortedSource_replaced(self):
+        plan = [_plan.GroupBy('age')]
+
+        exploited = _optimizer.exploit_properties(plan, _plan.Properties(is_sorted=True, by='age'))
+
+        assert [repr(node) for node in exploited] == ["ConsecutiveGroupBy"]
+
+    @pytest.mark.parametrize("items", [[], [1], [0, 0, 1, 2, 2, 2, 3], [5, 3, 3, 1]])
+    def test_distinct_sortedInput_sameAsUnsorted(self, items):
+        ascending = sorted(items)
+
+        assert q(items).order().distinct().to_list() == list(dict.fromkeys(ascending))
+        assert q(ascending, presorted_by=None).distinct().to_list() == list(
+            dict.fromkeys(ascending))
+
+    def test_distinct_sortedInput_unhashableElementsSupported(self):
+        assert q([[1], [1], [2]], presorted_by=None).distinct().to_list() == [[1], [2]]
+
+    def test_groupBy_sortedByKey_groupsStreamed(self):
+        tracking_iterable = TrackingIterator([1, 2, 11, 15, 30, 31])
+        query = q(tracking_iterable, presorted_by=_key).group_by(_key)
+
+        assert next(query) == [1, 2]
+        assert tracking_iterable.count == 3
+        assert query.to_list() == [[11, 15], [30, 31]]
+
+    def test_groupBy_presortedByAttribute_sameAsUnsorted(self):
+        people = [_Person('a', 1), _Person('b', 1), _Person('c', 2)]
+
+        groups = q(people, presorted_by='age').group_by('age').select(
+            lambda group: [p.name for p in group]).to_list()
+
+        assert groups == [['a', 'b'], ['c']]
+
+    def test_minMax_presorted_endpointsWithoutIteration(self):
+        items = _compared(range(1000))
+
+        smallest = q(items, presorted_by=None).min()
+        largest = q(items, presorted_by=None).max()
+
+        # the last element is compared only with the one before it (to find ties)
+        assert _Compared.comparisons == 1
+        assert (smallest, largest) == (0, 999)
+
+    def test_minMax_presortedByKey_endpointsByKey(self):
+        items = [1, 5, 12, 18, 25, 29]
+
+        assert q(items, presorted_by=_key).min(by=_key) == 1
+        assert q(items, presorted_by=_key).max(by=_key) == 25
+
+    def test_minMax_ties_firstExtremeAsUnsorted(self):
+        items = [(1, 'a'), (1, 'b'), (2, 'c'), (2, 'd')]
+        by = lambda pair: pair[0]  # noqa: E731
+
+        assert q(items, presorted_by=by).min(by=by) == (1, 'a')
+        assert q(items, presorted_by=by).max(by=by) == (2, 'c')
+        assert q(items).order(by=by, ascending=False).min(by=by) == (1, 'a')
+        assert q(items).order(by=by, ascending=False).max(by=by) == (2, 'c')
+
+    def test_min_orderedQuery_notFullySorted(self):
+        keyed = []
+
+        def key(x):
+            keyed.append(x)
+            return x
+
+        assert q([3, 1, 2]).order(by=key).min(by=key) == 1
+        # selected by a bounded heap (keyed once per element), rather than sorted, and compared
+        assert len(keyed) == 4
+
+    @pytest.mark.parametrize("minmax", [min, max])
+    def test_minMax_presortedEmpty_raisesValueError(self, minmax):
+        with pytest.raises(ValueError):
+            getattr(q([], presorted_by=None), minmax.__name__)()
+
+    def test_minMax_sortedByOtherKey_regularComparison(self):
+        assert q([3, 12, 25], presorted_by=_key).max() == 25
+        assert q([3, 12, 25], presorted_by=_key).max(by=lambda x: -x) == 3
+
+    @pytest.mark.parametrize("item,expected", [(0, False), (1, True), (7, True), (8, False),
+                                               (100, False), ('a', False), (7.0, True)])
+    def test_contains_presortedSequence_sameAsLinear(self, item, expected):
+        items = [1, 3, 3, 5, 7]
+
+        assert q(items, presorted_by=None).contains(item) == expected
+        assert (item in q(items, presorted_by=None)) == expected
+
+    def test_contains_snappedSortedQuery_binarySearched(self):
+        query = q(_compared(range(999, -1, -1))).order().snap()
+        _Compared.comparisons = 0
+
+        assert query.contains(700)
+        assert not query.contains(1000)
+        assert _Compared.comparisons < 30
+
+    def test_minMax_partiallyConsumed_remainingElementsCompared(self):
+        smallest = q([0, 1, 2, 3], presorted_by=None)
+        largest = q([0, 1, 2, 3], presorted_by=None)
+        next(smallest)
+        next(largest)
+
+        assert smallest.min() == 1
+        assert largest.max() == 3
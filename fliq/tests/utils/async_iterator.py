@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+
+class AsyncIterator:
+    """
+    An async iterator over the given (sync) iterable, yielding control to the event loop before
+    every element. Counts the number of elements pulled, and whether it was closed.
+    """
+    def __init__(self, iterable) -> None:
+        self.iterable = iter(iterable)
+        self.count = 0
+        self.closed = False
+
+    def __aiter__(self) -> AsyncIterator:
+        return self
+
+    async def __anext__(self) -> Any:
+        await asyncio.sleep(0)
+        self.count += 1
+        try:
+            return next(self.iterable)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def aclose(self) -> None:
+        self.closed = True
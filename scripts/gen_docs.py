@@ -34,13 +34,31 @@ def create_api_docs():
     skipped_methods = [
         Query.__init__.__name__,
         Query._self.__name__,
+        Query._iter.__name__,
+        Query._lowered.__name__,
+        Query._sorted_by.__name__,
+        Query._extremes.__name__,
+        Query._bisect_contains.__name__,
+        Query._reduced_in_parallel.__name__,
+        Query._reduced_on_workers.__name__,
+        Query._stage_name.__name__,
+        Query.pipelined.__name__,
+        Query.prefetch.__name__,
         Query.__iter__.__name__,
         Query.__next__.__name__,
         Query.__repr__.__name__,
         Query.__eq__.__name__,
+        Query.__length_hint__.__name__,
         Query.snap.__name__,
         Query.peek.__name__,
         Query.partition.__name__,
+        Query.compile.__name__,
+        Query.adaptive.__name__,
+        Query.parallel.__name__,
+        Query.distributed.__name__,
+        Query.with_deadline.__name__,
+        Query.with_cancel.__name__,
+        Query.aio.__name__,
     ]
 
     for name, method in inspect.getmembers(Query, predicate=inspect.isfunction):
@@ -48,7 +66,7 @@ def create_api_docs():
             # skip constructor
             continue
         ret_type = inspect.signature(method).return_annotation
-        is_streamer = ret_type.startswith('Query')
+        is_streamer = ret_type.startswith(('Query', 'AsyncQuery'))
         exact_name_regex = f'"^{name}$"'
         if is_streamer:
             mappers.append(exact_name_regex)